@@ -0,0 +1,203 @@
+# admin_users.py
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, or_, update, delete
+
+from models import db, User, Payment, PasswordResetToken
+from pagination import keyset_page
+from identity import invalidate_identity
+from revocation import revoke_tokens
+
+DEFAULT_EXPIRING_DAYS = 7
+
+
+class FilterError(ValueError):
+    pass
+
+
+def _bool(value, name):
+    if isinstance(value, bool):
+        return value
+    if str(value).lower() in ("true", "1", "yes"):
+        return True
+    if str(value).lower() in ("false", "0", "no"):
+        return False
+    raise FilterError(f"{name} must be true or false")
+
+
+def _escape_like(value):
+    return (
+        value.replace("\\", "\\\\")
+        .replace("%", "\\%")
+        .replace("_", "\\_")
+    )
+
+
+# ---------------- FILTERS ----------------
+def user_filters(params, now=None):
+    """SQL criteria for the admin user filters in ``params``.
+
+    ``params`` is ``request.args`` or a JSON object. Supported keys:
+    ``role`` (default ``client``), ``approved``, ``is_active``,
+    ``subscription`` (``active``/``expired``/``expiring``/``none``) with
+    ``expiring_days``, and ``q``, a name/email prefix.
+    """
+    now = now or datetime.utcnow()
+    criteria = [User.role == params.get("role", "client")]
+
+    if params.get("approved") not in (None, ""):
+        criteria.append(User.approved == _bool(params["approved"], "approved"))
+
+    if params.get("is_active") not in (None, ""):
+        criteria.append(User.is_active == _bool(params["is_active"], "is_active"))
+
+    subscription = params.get("subscription")
+    if subscription == "active":
+        criteria.append(User.subscription_end > now)
+    elif subscription == "expired":
+        criteria.append(User.subscription_end <= now)
+    elif subscription == "none":
+        criteria.append(User.subscription_end.is_(None))
+    elif subscription == "expiring":
+        try:
+            days = int(params.get("expiring_days", DEFAULT_EXPIRING_DAYS))
+        except (TypeError, ValueError):
+            raise FilterError("expiring_days must be an integer")
+        criteria.append(User.subscription_end > now)
+        criteria.append(User.subscription_end <= now + timedelta(days=days))
+    elif subscription not in (None, ""):
+        raise FilterError("subscription must be active, expired, expiring or none")
+
+    q = (params.get("q") or "").strip().lower()
+    if q:
+        prefix = _escape_like(q) + "%"
+        criteria.append(or_(
+            func.lower(User.email).like(prefix, escape="\\"),
+            func.lower(User.name).like(prefix, escape="\\"),
+            func.lower(User.surname).like(prefix, escape="\\")
+        ))
+
+    return criteria
+
+
+# ---------------- LISTING ----------------
+def list_users(criteria, limit, cursor=None, now=None):
+    """One page of users plus the total matching ``criteria``.
+
+    Selects only the columns the admin tables render; newest users first.
+    """
+    now = now or datetime.utcnow()
+    subscription_active = case(
+        (User.subscription_end > now, True), else_=False
+    ).label("subscription_active")
+
+    query = db.session.query(
+        User.id, User.name, User.surname, User.email,
+        User.approved, User.is_active, User.subscription_end,
+        User.subscription_status, subscription_active
+    ).filter(*criteria)
+
+    total = db.session.query(func.count(User.id)).filter(*criteria).scalar()
+    rows, next_cursor = keyset_page(query, [User.id], limit, cursor)
+    return rows, total, next_cursor
+
+
+def serialize_user_row(u):
+    return {
+        "id": u.id,
+        "name": u.name,
+        "surname": u.surname,
+        "email": u.email,
+        "approved": u.approved,
+        "is_active": u.is_active,
+        "subscription_active": bool(u.subscription_active),
+        "subscription_status": u.subscription_status,
+        "expiry": u.subscription_end.isoformat() if u.subscription_end else None
+    }
+
+
+# ---------------- BULK ACTIONS ----------------
+BULK_ACTIONS = {
+    "approve": ("approved", {"approved": True}),
+    "deactivate": ("deactivated", {"is_active": False}),
+    "reactivate": ("reactivated", {"is_active": True}),
+    "reject": ("rejected", None),
+}
+# actions that must also end the users' sessions
+REVOKING_ACTIONS = ("deactivate", "reject")
+
+
+def bulk_user_action(action, ids=None, criteria=None, batch_size=500):
+    """Apply ``action`` to client accounts with set-based statements.
+
+    Targets either explicit ``ids`` or every user matching ``criteria``.
+    Runs one UPDATE (or DELETE for ``reject``) per ``batch_size`` ids in
+    the caller's transaction and returns ``{id: outcome}``; nothing is
+    committed here.
+    """
+    outcome, values = BULK_ACTIONS[action]
+    results = {}
+
+    if ids is not None:
+        wanted = list(dict.fromkeys(int(i) for i in ids))
+        found = {}
+        for batch in _chunks(wanted, batch_size):
+            found.update(
+                db.session.query(User.id, User.role).filter(User.id.in_(batch))
+            )
+        targets = []
+        for user_id in wanted:
+            role = found.get(user_id)
+            if role is None:
+                results[user_id] = "not_found"
+            elif role != "client":
+                results[user_id] = "skipped"
+            else:
+                targets.append(user_id)
+    else:
+        targets = [
+            row.id for row in
+            db.session.query(User.id).filter(*criteria).order_by(User.id)
+        ]
+
+    kept = set()
+    for batch in _chunks(targets, batch_size):
+        if values is None:
+            kept.update(set(batch) - set(delete_users(batch)))
+        else:
+            stmt = update(User).where(User.id.in_(batch)).values(**values)
+            db.session.execute(stmt.execution_options(synchronize_session=False))
+        if action in REVOKING_ACTIONS:
+            revoke_tokens(*batch)
+        # per batch, like the statements above: one call over every target
+        # would bind them all at once and pass SQLite's variable limit
+        invalidate_identity(*batch)
+
+    for user_id in targets:
+        results[user_id] = "has_payments" if user_id in kept else outcome
+
+    return results
+
+
+def delete_users(user_ids):
+    """Delete users with the rows that only exist for them; returns the ids
+    deleted. Users with payments are kept: the ledger must outlive them."""
+    paying = {
+        user_id for (user_id,) in
+        db.session.query(Payment.user_id)
+        .filter(Payment.user_id.in_(user_ids))
+        .distinct()
+    }
+    ids = [user_id for user_id in user_ids if user_id not in paying]
+    if ids:
+        for stmt in (
+            delete(PasswordResetToken).where(PasswordResetToken.user_id.in_(ids)),
+            delete(User).where(User.id.in_(ids)),
+        ):
+            db.session.execute(stmt.execution_options(synchronize_session=False))
+    return ids
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
@@ -4,26 +4,66 @@ import logging
 from datetime import datetime, timedelta
 from urllib.parse import quote_plus
 from models import db, User, Signal, SignalLot
-
-from itsdangerous import URLSafeTimedSerializer
-from flask_mail import Message
+import migrations
+import bootstrap
+from sqlalchemy.orm import selectinload
+from pagination import PaginationError, page_args, keyset_page, paged_response
+from events import broadcaster, record_signal_event, serialize_signal, collect_changes
+from cache import response_cache, bump_version
+from identity import identity_cache, get_identity_or_404, invalidate_identity
+from passwords import hasher, HashingBusy, hash_password, verify_password, needs_rehash
+from ratelimit import limiter, rate_limit
+from metrics import metrics
+from querybudget import budget_guard, query_budget
+from dbrouting import db_router, read_only
+from signal_lots import LOT_FIELDS, LotError, validate_lots, reconcile_lots
+from signal_import import ImportValidationError, parse_import, validate_import, import_signals
+from exports import ExportError, export_response
+from prices import PRICE_FIELDS, PriceError, price_columns, format_decimal
+from signal_filters import SignalFilterError, signal_filters
+from admin_users import (
+    BULK_ACTIONS,
+    FilterError,
+    user_filters,
+    list_users,
+    serialize_user_row,
+    bulk_user_action,
+    delete_users
+)
 
 from extensions import mail
 
-from mailer import send_new_signal_email
+from mailer import queue_new_signal_email, queue_signal_batch_email, mail_executor, MailQueueFull
+from outbox import outbox
+from scheduler import scheduler
+from subscriptions import activate_values, sweep_subscriptions
+from payments import payments, reconcile_payments
+from reset_tokens import sweep_reset_tokens
+from revocation import token_revocations, revoke_tokens, prune_revocations
+from digests import NOTIFY_MODES, instant_recipients, send_signal_digest
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, make_response, stream_with_context
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from dotenv import load_dotenv
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from auth import generate_token, login_required, admin_required
+from auth import (
+    generate_token,
+    login_required,
+    admin_required,
+    auth_bp,
+    issue_stream_ticket,
+    read_stream_ticket,
+    token_still_valid
+)
 
 from flask_jwt_extended import (
     JWTManager,
     create_access_token,
     jwt_required,
-    get_jwt_identity
+    get_jwt_identity,
+    get_jwt,
+    verify_jwt_in_request
 )
 
 
@@ -45,11 +85,25 @@ def create_app():
 
     jwt = JWTManager(app)
 
+    @jwt.token_in_blocklist_loader
+    def token_revoked(jwt_header, jwt_payload):
+        return token_revocations.is_revoked(jwt_payload)
+
     # ---------------- DATABASE ----------------
 # ---------------- DATABASE ----------------
     app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
+    # optional streaming replica for @read_only routes
+    app.config["DATABASE_REPLICA_URL"] = os.getenv("DATABASE_REPLICA_URL")
+
+    # per-engine pool; size and overflow are per worker process
+    app.config["DB_POOL_SIZE"] = int(os.getenv("DB_POOL_SIZE", "5"))
+    app.config["DB_MAX_OVERFLOW"] = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    app.config["DB_POOL_TIMEOUT"] = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    app.config["DB_POOL_RECYCLE"] = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    app.config["DB_POOL_PRE_PING"] = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
     # ---------------- MAIL ----------------
 
 
@@ -57,24 +111,144 @@ def create_app():
     # =========================
     # MAIL CONFIG
     # =========================
-    app.config["MAIL_SERVER"] = "smtp.gmail.com"
-    app.config["MAIL_PORT"] = 587
-    app.config["MAIL_USE_TLS"] = True
+    app.config["MAIL_SERVER"] = os.getenv("MAIL_SERVER", "smtp.gmail.com")
+    app.config["MAIL_PORT"] = int(os.getenv("MAIL_PORT", "587"))
+    app.config["MAIL_USE_TLS"] = os.getenv("MAIL_USE_TLS", "true").lower() == "true"
     app.config["MAIL_USERNAME"] = os.getenv("MAIL_USERNAME")
     app.config["MAIL_PASSWORD"] = os.getenv("MAIL_PASSWORD")
     app.config["MAIL_DEFAULT_SENDER"] = os.getenv("MAIL_USERNAME")
+
+    # ---------------- LIVE SIGNALS (SSE) ----------------
+    app.config["SSE_POLL_SECONDS"] = float(os.getenv("SSE_POLL_SECONDS", "1"))
+    app.config["SSE_HEARTBEAT_SECONDS"] = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+    app.config["SSE_REPLAY_LIMIT"] = int(os.getenv("SSE_REPLAY_LIMIT", "500"))
+    # open streams per process; gunicorn.conf.py sizes it to the worker class
+    app.config["SSE_MAX_STREAMS"] = int(os.getenv("SSE_MAX_STREAMS", "800"))
+    # a stream ticket only has to survive the trip to new EventSource(...)
+    app.config["SSE_TICKET_SECONDS"] = int(os.getenv("SSE_TICKET_SECONDS", "30"))
+    app.config["DELTA_MAX_EVENTS"] = int(os.getenv("DELTA_MAX_EVENTS", "1000"))
+    # cursors wait this long for a lower event id to commit; keep it above
+    # the longest transaction that writes signal events (bulk imports)
+    app.config["SIGNAL_EVENT_SETTLE_SECONDS"] = float(os.getenv("SIGNAL_EVENT_SETTLE_SECONDS", "5"))
+
+    # ---------------- EMAIL OUTBOX ----------------
+    app.config["OUTBOX_WORKERS"] = int(os.getenv("OUTBOX_WORKERS", "2"))
+    app.config["OUTBOX_BATCH_SIZE"] = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+    app.config["OUTBOX_MAX_ATTEMPTS"] = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+    app.config["OUTBOX_BACKOFF_SECONDS"] = int(os.getenv("OUTBOX_BACKOFF_SECONDS", "30"))
+
+    # ---------------- RESPONSE CACHE ----------------
+    app.config["RESPONSE_CACHE_SIZE"] = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+    app.config["IDENTITY_CACHE_SIZE"] = int(os.getenv("IDENTITY_CACHE_SIZE", "10000"))
+    app.config["IDENTITY_CACHE_TTL"] = int(os.getenv("IDENTITY_CACHE_TTL", "60"))
+    # how stale another worker's cached identities may get after a user write
+    app.config["IDENTITY_SYNC_SECONDS"] = float(os.getenv("IDENTITY_SYNC_SECONDS", "2"))
+
+    # ---------------- TOKEN REVOCATION ----------------
+    # how stale a worker's revocation list may get before it re-checks
+    app.config["REVOCATION_SYNC_SECONDS"] = float(os.getenv("REVOCATION_SYNC_SECONDS", "2"))
+
+    # ---------------- PASSWORD HASHING ----------------
+    app.config["PASSWORD_HASH_METHOD"] = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    app.config["PASSWORD_HASH_WORKERS"] = int(
+        os.getenv("PASSWORD_HASH_WORKERS", str(max((os.cpu_count() or 2) // 2, 1)))
+    )
+    # at least one slot, or inline hashing (0 workers) would always be busy
+    app.config["PASSWORD_HASH_MAX_PENDING"] = int(
+        os.getenv("PASSWORD_HASH_MAX_PENDING", str(max(app.config["PASSWORD_HASH_WORKERS"] * 4, 1)))
+    )
+    app.config["PASSWORD_HASH_QUEUE_TIMEOUT"] = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", "2"))
+
+    # ---------------- RATE LIMITING ----------------
+    app.config["RATELIMIT_ENABLED"] = os.getenv("RATELIMIT_ENABLED", "true").lower() == "true"
+    app.config["RATELIMIT_STORAGE_URL"] = os.getenv("RATELIMIT_STORAGE_URL")
+    # reverse proxies in front of the app that append to X-Forwarded-For;
+    # limits key on the address the outermost of them saw, never on a value
+    # the client wrote. RATELIMIT_TRUST_PROXY=true is the older way to say 1
+    trust_proxy = os.getenv("RATELIMIT_TRUST_PROXY", "false").lower() == "true"
+    app.config["PROXY_HOPS"] = int(os.getenv("PROXY_HOPS", "1" if trust_proxy else "0"))
+    if app.config["PROXY_HOPS"]:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["PROXY_HOPS"])
+    # per-process bucket cap for the in-memory backend; least recent go first
+    app.config["RATELIMIT_MEMORY_MAX_KEYS"] = int(os.getenv("RATELIMIT_MEMORY_MAX_KEYS", "100000"))
+
+    # ---------------- ADMIN BULK OPERATIONS ----------------
+    app.config["BULK_BATCH_SIZE"] = int(os.getenv("BULK_BATCH_SIZE", "500"))
+    app.config["SIGNAL_IMPORT_MAX"] = int(os.getenv("SIGNAL_IMPORT_MAX", "5000"))
+
+    # ---------------- SCHEDULED JOBS ----------------
+    app.config["SCHEDULER_ENABLED"] = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+    app.config["SCHEDULER_TICK_SECONDS"] = int(os.getenv("SCHEDULER_TICK_SECONDS", "30"))
+    app.config["SCHEDULER_LEASE_SECONDS"] = int(os.getenv("SCHEDULER_LEASE_SECONDS", "300"))
+    app.config["SUBSCRIPTION_SWEEP_SECONDS"] = int(os.getenv("SUBSCRIPTION_SWEEP_SECONDS", "300"))
+    app.config["SUBSCRIPTION_SWEEP_CHUNK"] = int(os.getenv("SUBSCRIPTION_SWEEP_CHUNK", "500"))
+    app.config["SUBSCRIPTION_REMINDER_DAYS"] = int(os.getenv("SUBSCRIPTION_REMINDER_DAYS", "3"))
+    app.config["PAYMENT_RECONCILE_SECONDS"] = int(os.getenv("PAYMENT_RECONCILE_SECONDS", "3600"))
+    app.config["PAYMENT_RECONCILE_CHUNK"] = int(os.getenv("PAYMENT_RECONCILE_CHUNK", "500"))
+    app.config["PAYMENT_PENDING_HOURS"] = int(os.getenv("PAYMENT_PENDING_HOURS", "24"))
+    app.config["PASSWORD_RESET_SWEEP_SECONDS"] = int(os.getenv("PASSWORD_RESET_SWEEP_SECONDS", "3600"))
+    app.config["REVOCATION_PRUNE_SECONDS"] = int(os.getenv("REVOCATION_PRUNE_SECONDS", "3600"))
+    # digest-mode users get one email per window instead of one per signal
+    app.config["SIGNAL_DIGEST_SECONDS"] = int(os.getenv("SIGNAL_DIGEST_SECONDS", "300"))
+    app.config["SIGNAL_DIGEST_MAX_LISTED"] = int(os.getenv("SIGNAL_DIGEST_MAX_LISTED", "25"))
+
+    # ---------------- PASSWORD RESET ----------------
+    app.config["PASSWORD_RESET_URL"] = os.getenv("PASSWORD_RESET_URL", "https://nari4.netlify.app/newpass.html")
+    app.config["PASSWORD_RESET_TTL_MINUTES"] = int(os.getenv("PASSWORD_RESET_TTL_MINUTES", "30"))
+    app.config["MAIL_EXECUTOR_WORKERS"] = int(os.getenv("MAIL_EXECUTOR_WORKERS", "2"))
+    app.config["MAIL_EXECUTOR_MAX_PENDING"] = int(os.getenv("MAIL_EXECUTOR_MAX_PENDING", "20"))
+
+    # ---------------- METRICS ----------------
+    app.config["METRICS_ENABLED"] = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+    # ---------------- QUERY BUDGETS ----------------
+    # over-budget routes raise instead of logging; unset follows app.testing
+    enforce = os.getenv("QUERY_BUDGET_ENFORCE")
+    app.config["QUERY_BUDGET_ENFORCE"] = None if enforce is None else enforce.lower() == "true"
  
-   
-    serializer = URLSafeTimedSerializer(app.config["SECRET_KEY"])
 
     # ---------------- INIT ----------------
-    
+
+    # first, so their request hooks also see the replica check's queries
+    metrics.init_app(app)
+    budget_guard.init_app(app)
+
+    db_router.init_app(app)
     db.init_app(app)
 
-    with app.app_context():
-        db.create_all()
+    # schema and admin seeding live in `flask --app wsgi bootstrap`, so
+    # building the app opens no connections and is safe to preload
+    migrations.init_app(app, db)
+    bootstrap.init_app(app)
 
     mail.init_app(app)
+    broadcaster.init_app(app)
+    outbox.init_app(app)
+    mail_executor.init_app(app)
+    scheduler.init_app(app)
+    scheduler.job(
+        "subscription_sweep", every=app.config["SUBSCRIPTION_SWEEP_SECONDS"]
+    )(sweep_subscriptions)
+    scheduler.job(
+        "payment_reconcile", every=app.config["PAYMENT_RECONCILE_SECONDS"]
+    )(reconcile_payments)
+    scheduler.job(
+        "password_reset_sweep", every=app.config["PASSWORD_RESET_SWEEP_SECONDS"]
+    )(sweep_reset_tokens)
+    scheduler.job(
+        "revocation_prune", every=app.config["REVOCATION_PRUNE_SECONDS"]
+    )(prune_revocations)
+    scheduler.job(
+        "signal_digest", every=app.config["SIGNAL_DIGEST_SECONDS"]
+    )(send_signal_digest)
+
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(payments)
+    response_cache.init_app(app)
+    identity_cache.init_app(app)
+    token_revocations.init_app(app)
+    hasher.init_app(app)
+    limiter.init_app(app)
     logging.basicConfig(level=logging.INFO)
   
 
@@ -85,18 +259,37 @@ def create_app():
                 "https://*.netlify.app",
                 "https://*.github.io",
                 "https://24002296.github.io"
-            ]
+            ],
+            "expose_headers": ["X-Next-Cursor", "X-Total-Count"]
         }
     })
     
 
+    # ---------------- LOAD SHEDDING ----------------
+    @app.errorhandler(HashingBusy)
+    @app.errorhandler(MailQueueFull)
+    def hashing_busy(e):
+        response = jsonify({"message": "Server busy, please try again shortly"})
+        response.headers["Retry-After"] = "1"
+        return response, 503
+
     # ---------------- HEALTH ----------------
     @app.get("/api/ping")
+    @query_budget(0)
     def ping():
         return jsonify({"ok": True})
 
+    @app.get("/api/admin/metrics")
+    @admin_required
+    def admin_metrics():
+        return Response(
+            metrics.render(),
+            mimetype="text/plain; version=0.0.4"
+        )
+
     # ---------------- REGISTER ----------------
     @app.post("/api/register")
+    @rate_limit("10/hour", key="ip")
     def register():
         data = request.get_json() or {}
 
@@ -111,7 +304,7 @@ def create_app():
             name=data["name"],
             surname=data["surname"],
             email=data["email"],
-            password_hash=generate_password_hash(data["password"]),
+            password_hash=hash_password(data["password"]),
             approved=False,
             role="client"
         )
@@ -123,6 +316,8 @@ def create_app():
 
 
     @app.post("/api/login")
+    @rate_limit("20/minute", key="ip")
+    @rate_limit("5/minute", key="email")
     def login():
         data = request.get_json() or {}
 
@@ -135,9 +330,17 @@ def create_app():
 
         user = User.query.filter_by(email=email).first()
 
-        if not user or not check_password_hash(user.password_hash, password):
+        if not user or not verify_password(user.password_hash, password):
             return jsonify({"message": "Invalid credentials"}), 401
 
+        # upgrade hashes made with an older method or cost
+        if needs_rehash(user.password_hash):
+            try:
+                user.password_hash = hash_password(password)
+                db.session.commit()
+            except HashingBusy:
+                pass
+
         # 🔒 BLOCK DEACTIVATED USERS
         if not user.is_active:
             return jsonify({
@@ -198,10 +401,12 @@ def create_app():
 
 
     @app.get("/api/me")
+    @query_budget(4)
+    @read_only
     @jwt_required()
     def me():
         user_id = get_jwt_identity()
-        user = User.query.get_or_404(user_id)
+        user = get_identity_or_404(user_id)
     
         return jsonify({
             "id": user.id,
@@ -210,76 +415,98 @@ def create_app():
             "subscription_end": (
                 user.subscription_end.isoformat()
                 if user.subscription_end else None
-            )
+            ),
+            "notify_mode": user.notify_mode
         }), 200
 
-
-    @app.post("/api/forgot-password")
-    def forgot_password():
+    @app.put("/api/me/notifications")
+    @query_budget(6)
+    @jwt_required()
+    def set_notify_mode():
         data = request.get_json() or {}
-        email = data.get("email")
-    
-        user = User.query.filter_by(email=email).first()
-        if not user:
-            return jsonify({"message": "Email not registered"}), 404
-    
-        token = serializer.dumps(email, salt="password-reset")
-    
-        reset_link = f"https://nari4.netlify.app/newpass.html?token={token}"
-    
-        msg = Message(
-            subject="Password Reset",
-            recipients=[email],
-            body=f"Click the link to reset your password:\n{reset_link}"
+        mode = data.get("notify_mode")
+        if mode not in NOTIFY_MODES:
+            return jsonify({"message": "notify_mode must be instant or digest"}), 400
+
+        user_id = get_jwt_identity()
+        updated = User.query.filter_by(id=user_id).update(
+            {"notify_mode": mode},
+            synchronize_session=False
         )
-    
-        mail.send(msg)
-    
-        return jsonify({"message": "Reset link sent"}), 200
+        if not updated:
+            return jsonify({"message": "User not found"}), 404
+        invalidate_identity(user_id)
+        db.session.commit()
+
+        return jsonify({"message": "Notification preference saved", "notify_mode": mode}), 200
+
 
     # ---------------- SUBSCRIBE ----------------
 
     @app.post("/api/subscribe")
+    @query_budget(6)
     @jwt_required()
     def subscribe():
         user_id = get_jwt_identity()
-        user = User.query.get_or_404(user_id)
+        user = get_identity_or_404(user_id)
     
         # example: 30-day subscription
-        user.subscription_end = datetime.utcnow() + timedelta(days=30)
-        user.plan = "premium"
+        subscription_end = datetime.utcnow() + timedelta(days=30)
+        User.query.filter_by(id=user.id).update(
+            activate_values(subscription_end),
+            synchronize_session=False
+        )
+        invalidate_identity(user.id)
     
         db.session.commit()
     
         return jsonify({
             "message": "Subscription activated",
-            "subscription_end": user.subscription_end.isoformat()
+            "subscription_end": subscription_end.isoformat()
         }), 200
 
     # ---------------- USER SIGNALS ----------------
 
     @app.get("/api/admin/signals")
+    @query_budget(3)
+    @read_only
     @admin_required
     def get_admin_signals():
-        signals = Signal.query.order_by(Signal.created_at.desc()).all()
-
-        return jsonify([
-            {
-                "id": s.id,
-                "pair": s.pair,
-                "entry": s.entry,
-                "tp": s.tp,
-                "sl": s.sl,
-                
-            }
-            for s in signals
-        ]), 200
+        def build():
+            try:
+                limit, cursor = page_args()
+                signals, next_cursor = keyset_page(
+                    Signal.query.filter(*signal_filters(request.args)),
+                    [Signal.created_at, Signal.id],
+                    limit,
+                    cursor
+                )
+            except (PaginationError, SignalFilterError) as e:
+                return make_response(jsonify({"message": str(e)}), 400)
+
+            return paged_response(jsonify([
+                {
+                    "id": s.id,
+                    "pair": s.pair,
+                    "entry": s.entry,
+                    "tp": s.tp,
+                    "sl": s.sl,
+                    "risk_reward": format_decimal(s.risk_reward)
+                }
+                for s in signals
+            ]), next_cursor)
+
+        return response_cache.respond("signals", build)
 
 
     @app.get("/api/admin/signals/<int:id>")
+    @query_budget(4)
+    @read_only
     @admin_required
     def get_admin_signal(id):
-            signal = Signal.query.get_or_404(id)
+            signal = Signal.query.options(
+                selectinload(Signal.lots)
+            ).get_or_404(id)
 
             return jsonify({
                 "id": signal.id,
@@ -287,7 +514,7 @@ def create_app():
                 "entry": signal.entry,
                 "tp": signal.tp,
                 "sl": signal.sl,
-                "plan": signal.plan,
+                "risk_reward": format_decimal(signal.risk_reward),
                 "lots": [
                     {
                         "id": lot.id,
@@ -299,105 +526,231 @@ def create_app():
                 ]
             }), 200
     # ================= ADMIN USERS =================
+    def user_page(preset, serialize):
+        # paginated, filtered user list; the total comes from one COUNT
+        params = dict(request.args.items())
+        params.update(preset)
+
+        try:
+            limit, cursor = page_args()
+            rows, total, next_cursor = list_users(
+                user_filters(params), limit, cursor
+            )
+        except (PaginationError, FilterError) as e:
+            return jsonify({"message": str(e)}), 400
+
+        response = paged_response(
+            jsonify([serialize(u) for u in rows]), next_cursor
+        )
+        response.headers["X-Total-Count"] = str(total)
+        return response, 200
+
+    @app.get("/api/admin/users")
+    @query_budget(4)
+    @read_only
+    @admin_required
+    def admin_users():
+        return user_page({}, serialize_user_row)
+
     @app.get("/api/admin/users/pending")
+    @query_budget(4)
+    @read_only
     @admin_required
     def pending_users():
-        users = User.query.filter_by(approved=False, role="client").all()
-        return jsonify([{
+        return user_page({"approved": "false"}, lambda u: {
             "id": u.id,
             "name": u.name,
             "surname": u.surname,
             "email": u.email
-        } for u in users]), 200
+        })
 
     @app.get("/api/admin/users/active")
+    @query_budget(4)
+    @read_only
     @admin_required
     def active_users():
-        users = User.query.filter_by(approved=True, role="client").all()
-        return jsonify([{
+        return user_page({"approved": "true"}, lambda u: {
             "id": u.id,
             "name": u.name,
             "email": u.email,
             "is_active": u.is_active,
-            "subscription_active": bool(
-                u.subscription_end and u.subscription_end > datetime.utcnow()
-            ),
+            "subscription_active": bool(u.subscription_active),
             "expiry": u.subscription_end.isoformat() if u.subscription_end else None
-        } for u in users]), 200
+        })
 
 
     @app.put("/api/admin/users/<int:user_id>/approve")
+    @query_budget(6)
     @admin_required
     def approve_user(user_id):
         user = User.query.get_or_404(user_id)
 
         user.approved = True
-        db.session.add(user)
+        invalidate_identity(user.id)
         db.session.commit()
-        db.session.refresh(user)
 
         return jsonify({
             "message": "Approved",
-            "approved": user.approved
+            "approved": True
         }), 200
 
     @app.delete("/api/admin/users/<int:user_id>/reject")
+    @query_budget(12)
     @admin_required
     def reject_user(user_id):
-        user = User.query.get_or_404(user_id)
-        db.session.delete(user)
+        User.query.get_or_404(user_id)
+        if not delete_users([user_id]):
+            return jsonify({
+                "message": "User has payments; deactivate the account instead"
+            }), 409
+        invalidate_identity(user_id)
+        revoke_tokens(user_id)
         db.session.commit()
         return jsonify({"message": "Rejected"}), 200
 
-    # ================= ADMIN SIGNALS =================
-    @app.put("/api/admin/signals/<int:id>")
+    @app.post("/api/admin/users/bulk")
     @admin_required
-    def update_signal(id):
-        signal = Signal.query.get_or_404(id)
+    def bulk_users():
         data = request.get_json() or {}
+        action = data.get("action")
+        ids = data.get("ids")
+        filters = data.get("filter")
 
-        # ---------------- UPDATE SIGNAL FIELDS ----------------
-        allowed_fields = ["pair", "entry", "tp", "sl"]
+        if action not in BULK_ACTIONS:
+            return jsonify({
+                "message": "action must be one of: " + ", ".join(BULK_ACTIONS)
+            }), 400
+
+        if (ids is None) == (filters is None):
+            return jsonify({"message": "Provide either ids or filter"}), 400
+
+        if ids is not None and (
+            not isinstance(ids, list)
+            or not all(isinstance(i, int) for i in ids)
+        ):
+            return jsonify({"message": "ids must be a list of integers"}), 400
 
-        for field in allowed_fields:
-            if field in data:
-                setattr(signal, field, data[field])
+        if filters is not None and not isinstance(filters, dict):
+            return jsonify({"message": "filter must be an object"}), 400
+
+        try:
+            # bulk actions only ever touch client accounts
+            criteria = (
+                user_filters(dict(filters, role="client"))
+                if filters is not None else None
+            )
+        except FilterError as e:
+            return jsonify({"message": str(e)}), 400
+
+        try:
+            results = bulk_user_action(
+                action, ids=ids, criteria=criteria,
+                batch_size=app.config["BULK_BATCH_SIZE"]
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            logging.exception("bulk %s failed", action)
+            return jsonify({"message": "Bulk operation failed"}), 500
+
+        return jsonify({
+            "action": action,
+            "results": {str(k): v for k, v in results.items()},
+            "affected": sum(1 for v in results.values() if v not in ("not_found", "skipped"))
+        }), 200
+
+    # ================= EXPORTS =================
+    # streamed in constant memory; ?format=ndjson|csv, gzip if accepted
+    @app.get("/api/admin/export/users")
+    @read_only
+    @admin_required
+    def export_users():
+        try:
+            return export_response(
+                "users", request.args, request.headers.get("Accept-Encoding")
+            )
+        except ExportError as e:
+            return jsonify({"message": str(e)}), 400
+
+    @app.get("/api/admin/export/signals")
+    @read_only
+    @admin_required
+    def export_signals():
+        try:
+            return export_response(
+                "signals", request.args, request.headers.get("Accept-Encoding")
+            )
+        except ExportError as e:
+            return jsonify({"message": str(e)}), 400
 
-        # ---------------- UPDATE LOT OPTIONS ----------------
-        lots = data.get("lots")
+    # ================= ADMIN SIGNALS =================
+    def save_signal(id, with_lots):
+        signal = Signal.query.options(selectinload(Signal.lots)).get_or_404(id)
+        data = request.get_json() or {}
 
+        lots = data.get("lots") if with_lots else None
         if lots is not None:
-            if not isinstance(lots, list):
-                return jsonify({"message": "Lots must be a list"}), 400
-
-            if len(lots) < 1 or len(lots) > 3:
-                return jsonify({"message": "You must provide 1–3 lot options"}), 400
-
-            # Clear existing lots
-            SignalLot.query.filter_by(signal_id=signal.id).delete()
-
-            # Add new lots
-            for lot in lots:
-                required = ["lot_size", "win_amount", "loss_amount"]
-                if not all(k in lot for k in required):
-                    return jsonify({"message": "Invalid lot structure"}), 400
-
-                new_lot = SignalLot(
-                    signal_id=signal.id,
-                    lot_size=float(lot["lot_size"]),
-                    win_amount=float(lot["win_amount"]),
-                    loss_amount=float(lot["loss_amount"]),
-                )
-                db.session.add(new_lot)
+            try:
+                lots = validate_lots(lots)
+            except LotError as e:
+                return jsonify({"message": str(e)}), 400
 
-        db.session.commit()
+        # ---------------- UPDATE SIGNAL FIELDS ----------------
+        updates = {
+            field: data[field] for field in ("pair", "entry", "tp", "sl")
+            if field in data and getattr(signal, field) != data[field]
+        }
+
+        # numeric columns and risk/reward follow the text prices
+        if any(field in updates for field in PRICE_FIELDS):
+            try:
+                updates.update(price_columns(*(
+                    updates.get(field, getattr(signal, field))
+                    for field in PRICE_FIELDS
+                )))
+            except PriceError as e:
+                return jsonify({"message": str(e)}), 400
+
+        for field, value in updates.items():
+            setattr(signal, field, value)
+        changed = bool(updates)
+
+        # ---------------- RECONCILE LOT OPTIONS ----------------
+        deleted_lot_ids = []
+        if lots is not None:
+            lots_changed, deleted_lot_ids = reconcile_lots(signal, lots)
+            changed = changed or lots_changed
+
+        if changed:
+            db.session.flush()
+            db.session.expire(signal, ["lots"])
+            payload = serialize_signal(signal)
+            payload["deleted_lot_ids"] = deleted_lot_ids
+            record_signal_event("updated", signal.id, payload)
+            bump_version("signals")
+            db.session.commit()
+            broadcaster.notify()
 
         return jsonify({
-            "message": "Signal updated successfully",
+            "message": "Signal updated successfully" if changed else "No changes",
             "signal_id": signal.id
         }), 200
+
+    @app.put("/api/admin/signals/<int:id>")
+    @query_budget(12)
+    @admin_required
+    def update_signal(id):
+        return save_signal(id, with_lots=True)
+
+    # fields only; any lots in the body are ignored
+    @app.patch("/api/admin/signals/<int:id>")
+    @query_budget(10)
+    @admin_required
+    def patch_signal(id):
+        return save_signal(id, with_lots=False)
     
     @app.post("/api/admin/signals")
+    @query_budget(12)
     @admin_required
     def create_signal():
         data = request.get_json() or {}
@@ -406,87 +759,211 @@ def create_app():
         if not all(k in data and data[k] for k in required):
             return jsonify({"message": "Missing fields"}), 400
     
+        try:
+            prices = price_columns(data["entry"], data["tp"], data["sl"])
+            # lots are optional here, as in imports
+            lots = validate_lots(data.get("lots") or [], min_lots=0)
+        except (PriceError, LotError) as e:
+            return jsonify({"message": str(e)}), 400
+
         signal = Signal(
             pair=data["pair"],
             entry=data["entry"],
             tp=data["tp"],
             sl=data["sl"],
+            **prices
         )
     
         db.session.add(signal)
         db.session.flush()
     
-        lots = data.get("lots", [])
-    
-        if lots:
-            if not isinstance(lots, list):
-                return jsonify({"message": "Lots must be a list"}), 400
-    
-            if len(lots) > 3:
-                return jsonify({"message": "Maximum 3 lot sizes allowed"}), 400
-    
-            for lot in lots:
-                required_lot = ["lot_size", "win_amount", "loss_amount"]
-                if not all(k in lot and lot[k] for k in required_lot):
-                    return jsonify({"message": "Invalid lot structure"}), 400
-    
-                db.session.add(SignalLot(
-                    signal_id=signal.id,
-                    lot_size=float(lot["lot_size"]),
-                    win_amount=float(lot["win_amount"]),
-                    loss_amount=float(lot["loss_amount"])
-                ))
+        for lot in lots:
+            db.session.add(SignalLot(
+                signal_id=signal.id, **{k: lot[k] for k in LOT_FIELDS}
+            ))
     
+        db.session.flush()
+        db.session.expire(signal, ["lots"])
+        record_signal_event("created", signal.id, serialize_signal(signal))
+        bump_version("signals")
+
+        # queued in the same transaction; the outbox workers send it.
+        # digest-mode users get it with the next digest instead
+        queue_new_signal_email(instant_recipients())
+
         db.session.commit()
+        broadcaster.notify()
+        outbox.wake()
     
+        return jsonify({"message": "Signal created", "id": signal.id}), 201
 
-        users = User.query.filter_by(is_active=True).all()
-        emails = [u.email for u in users]
+    # JSON array, {"signals": [...]} or NDJSON; all or nothing
+    @app.post("/api/admin/signals/import")
+    @admin_required
+    def import_signals_bulk():
+        try:
+            rows = validate_import(
+                parse_import(request.get_data(), request.content_type),
+                app.config["SIGNAL_IMPORT_MAX"]
+            )
+        except ImportValidationError as e:
+            return jsonify({"message": str(e), "errors": e.errors}), 400
 
-        send_new_signal_email(emails)
+        notify = request.args.get("notify", "true").lower() != "false"
 
-    
-        return jsonify({"message": "Signal created", "id": signal.id}), 201
+        try:
+            # a silent import stays out of digests too
+            signal_ids = import_signals(
+                rows, digested_at=None if notify else datetime.utcnow()
+            )
+            bump_version("signals")
+
+            # one email for the whole batch, not one per signal
+            if notify:
+                queue_signal_batch_email(instant_recipients(), len(signal_ids))
+
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            logging.exception("signal import failed")
+            return jsonify({"message": "Import failed"}), 500
+
+        broadcaster.notify()
+        if notify:
+            outbox.wake()
+
+        return jsonify({
+            "message": "Signals imported",
+            "count": len(signal_ids),
+            "ids": signal_ids
+        }), 201
 
     @app.get("/api/signals")
+    @query_budget(4)
+    @read_only
     @jwt_required()
     def get_signals():
         user_id = get_jwt_identity()
-        user = User.query.get_or_404(user_id)
+        user = get_identity_or_404(user_id)
     
-        signals = Signal.query.all()  # ✅ MISSING LINE
-    
-        return jsonify([
-            {
-                "id": s.id,
-                "pair": s.pair,
-                "entry": s.entry,
-                "tp": s.tp,
-                "sl": s.sl,
-                "lots": [
-                    {
-                        "lot_size": lot.lot_size,
-                        "win_amount": lot.win_amount,
-                        "loss_amount": lot.loss_amount
-                    }
-                    for lot in s.lots
-                ]
+        # newest first, lots batch-loaded with one IN query per page;
+        # ?pair=, ?from=/?to= and ?price_min=/?price_max= filter in SQL
+        def build():
+            try:
+                limit, cursor = page_args()
+                signals, next_cursor = keyset_page(
+                    Signal.query
+                    .filter(*signal_filters(request.args))
+                    .options(selectinload(Signal.lots)),
+                    [Signal.created_at, Signal.id],
+                    limit,
+                    cursor
+                )
+            except (PaginationError, SignalFilterError) as e:
+                return make_response(jsonify({"message": str(e)}), 400)
+
+            return paged_response(
+                jsonify([serialize_signal(s) for s in signals]),
+                next_cursor
+            )
+
+        return response_cache.respond("signals", build)
+
+    @app.get("/api/signals/changes")
+    @query_budget(7)
+    @read_only
+    @jwt_required()
+    def get_signal_changes():
+        since = request.args.get("since")
+        try:
+            since = int(since) if since else None
+        except ValueError:
+            return jsonify({"message": "since must be an integer cursor"}), 400
+
+        changes = collect_changes(
+            since,
+            app.config["DELTA_MAX_EVENTS"],
+            app.config["SIGNAL_EVENT_SETTLE_SECONDS"]
+        )
+
+        # nothing new since the client's cursor
+        if changes is None:
+            return "", 204
+
+        return jsonify(changes), 200
+
+    @app.post("/api/signals/stream/ticket")
+    @jwt_required()
+    def stream_ticket():
+        return jsonify({
+            "ticket": issue_stream_ticket(get_jwt()),
+            "expires_in": app.config["SSE_TICKET_SECONDS"]
+        }), 200
+
+    @app.get("/api/signals/stream")
+    def stream_signals():
+        # EventSource cannot set headers: browsers pass ?ticket= from
+        # POST /api/signals/stream/ticket, never the token itself
+        ticket = request.args.get("ticket")
+        if ticket:
+            claims = read_stream_ticket(ticket)
+            if claims is None or not token_still_valid(claims):
+                return jsonify({"message": "Invalid or expired ticket"}), 401
+        else:
+            try:
+                verify_jwt_in_request(locations=["headers"])
+            except Exception:
+                return jsonify({"message": "Invalid or missing token"}), 401
+            claims = get_jwt()
+
+        last_event_id = (
+            request.headers.get("Last-Event-ID")
+            or request.args.get("last_event_id")
+        )
+        try:
+            last_event_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            return jsonify({"message": "Invalid Last-Event-ID"}), 400
+
+        # leave this worker's remaining slots to ordinary requests
+        if broadcaster.full():
+            response = jsonify({"message": "Too many open streams, try again shortly"})
+            response.headers["Retry-After"] = "5"
+            return response, 503
+
+        return Response(
+            stream_with_context(broadcaster.stream(
+                last_event_id,
+                # a deactivation, password reset or expiry ends an open stream
+                authorized=lambda: token_still_valid(claims)
+            )),
+            mimetype="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no"
             }
-            for s in signals
-        ])
+        )
+
     @app.delete("/api/admin/signals/<int:id>")
+    @query_budget(6)
     @admin_required
     def delete_signal(id):
         try:
-            signal = Signal.query.get_or_404(id)
-
-            # delete all lots first
-            for lot in signal.lots:
-                db.session.delete(lot)
+            # lots first, then the signal: two statements however many lots
+            SignalLot.query.filter_by(signal_id=id).delete(
+                synchronize_session=False
+            )
+            deleted = Signal.query.filter_by(id=id).delete(
+                synchronize_session=False
+            )
+            if not deleted:
+                db.session.rollback()
+                return jsonify({"message": "Signal not found"}), 404
 
-            # then delete the signal
-            db.session.delete(signal)
+            record_signal_event("deleted", id, {"id": id})
+            bump_version("signals")
             db.session.commit()
+            broadcaster.notify()
 
             return jsonify({
                 "message": "Signal deleted successfully",
@@ -502,58 +979,32 @@ def create_app():
 
     
     @app.put("/api/admin/users/<int:user_id>/deactivate")
+    @query_budget(10)
     @admin_required
     def deactivate_user(user_id):
         user = User.query.get_or_404(user_id)
         user.is_active = False
+        invalidate_identity(user_id)
+        revoke_tokens(user_id)
         db.session.commit()
         return jsonify({"message": "User deactivated"})
 
     @app.put("/api/admin/users/<int:user_id>/reactivate")
+    @query_budget(8)
     @admin_required
     def reactivate_user(user_id):
         user = User.query.get_or_404(user_id)
         user.is_active = True
+        invalidate_identity(user_id)
         db.session.commit()
         return jsonify({"message": "User reactivated"})
 
     return app
 
-# ---------------- ADMIN BOOTSTRAP ----------------
-def ensure_admin_user(app):
-    with app.app_context():
-        admin_email = os.getenv("ADMIN_EMAIL")
-        admin_password = os.getenv("ADMIN_PASSWORD")
-
-        if not admin_email or not admin_password:
-            print("⚠️ ADMIN credentials not set")
-            return
-
-        admin = User.query.filter_by(email=admin_email).first()
-        password_hash = generate_password_hash(admin_password)
-
-        if admin:
-            admin.password_hash = password_hash
-            admin.role = "admin"
-            admin.approved = True
-            print("✅ Admin password RESET")
-        else:
-            admin = User(
-                name="System",
-                surname="Administrator",
-                email=admin_email,
-                password_hash=password_hash,
-                role="admin",
-                approved=True
-            )
-            db.session.add(admin)
-            print("✅ Admin CREATED")
-
-        db.session.commit()
-
 # ---------------- RUN ----------------
+# production: gunicorn -c gunicorn.conf.py wsgi:app
 
-app = create_app()
-ensure_admin_user(app)
 if __name__ == "__main__":
+    app = create_app()
+    bootstrap.bootstrap(app)
     app.run(host="0.0.0.0", port=5000, debug=True)
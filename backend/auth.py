@@ -1,6 +1,8 @@
 # auth.py
 import jwt
+import logging
 import os
+import time
 from datetime import datetime, timedelta
 from functools import wraps
 from flask import request, jsonify
@@ -8,13 +10,20 @@ from models import User
 from functools import wraps
 from flask import jsonify
 from flask_jwt_extended import verify_jwt_in_request, get_jwt
-from flask import Blueprint, request, jsonify
-from mailer import send_reset_email_async
-
-import secrets
-from werkzeug.security import generate_password_hash
+from flask import Blueprint, current_app, request, jsonify
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+from mailer import send_reset_email_async, MailQueueFull
+
+from passwords import hash_password
+from ratelimit import rate_limit
+from reset_tokens import issue_reset_token, consume_reset_token, revoke_reset_tokens
+from revocation import revoke_tokens, token_revocations
 from mailer import send_email
 from models import User, db
+from identity import get_identity
+
+log = logging.getLogger(__name__)
+
 SECRET = os.getenv("SECRET_KEY", "dev_secret")
 JWT_EXP = int(os.getenv("JWT_EXP_SECONDS", "86400"))
 
@@ -44,36 +53,52 @@ auth_bp = Blueprint("auth", __name__)
 
 
 @auth_bp.post("/api/forgot-password")
+@rate_limit("5/hour", key="ip")
+@rate_limit("3/hour", key="email")
 def forgot_password():
-    email = request.json.get("email")
+    data = request.get_json(silent=True) or {}
+    email = data.get("email")
+
+    # same answer either way, so the form cannot be used to probe accounts
+    sent = jsonify({"message": "If email exists, reset link sent"}), 200
 
     user = User.query.filter_by(email=email).first()
     if not user:
-        return jsonify({"message": "If email exists, reset link sent"}), 200
+        return sent
 
-    token = secrets.token_urlsafe(32)
-    user.reset_token = token
-    user.reset_token_expiry = datetime.utcnow() + timedelta(minutes=30)
+    ttl = current_app.config["PASSWORD_RESET_TTL_MINUTES"]
+    token = issue_reset_token(user.id, datetime.utcnow(), ttl)
     db.session.commit()
 
-    reset_link = f"https://nari3.netlify.app/newpass.html?token={token}"
-    send_reset_email(email, reset_link)
+    reset_link = f"{current_app.config['PASSWORD_RESET_URL']}?token={token}"
+    try:
+        send_reset_email_async(email, reset_link, ttl)
+    except MailQueueFull:
+        # a 503 here, and only here, would tell the caller the account
+        # exists; the user can ask again once the queue drains
+        log.warning("mail queue full, reset email for user %s dropped", user.id)
 
-    return jsonify({"message": "Reset link sent"}), 200
+    return sent
 
 
 @auth_bp.post("/api/reset-password")
+@rate_limit("10/hour", key="ip")
 def reset_password():
-    token = request.json.get("token")
-    password = request.json.get("password")
+    data = request.get_json(silent=True) or {}
+    password = data.get("password")
+    if not password:
+        return jsonify({"message": "Password required"}), 400
 
-    user = User.query.filter_by(reset_token=token).first()
-    if not user or user.reset_token_expiry < datetime.utcnow():
+    user_id = consume_reset_token(data.get("token"), datetime.utcnow())
+    if not user_id:
         return jsonify({"message": "Invalid or expired token"}), 400
 
-    user.password_hash = generate_password_hash(password)
-    user.reset_token = None
-    user.reset_token_expiry = None
+    User.query.filter_by(id=user_id).update(
+        {"password_hash": hash_password(password)},
+        synchronize_session=False
+    )
+    revoke_reset_tokens(user_id)
+    revoke_tokens(user_id)
     db.session.commit()
 
     return jsonify({"message": "Password reset successful"}), 200
@@ -87,7 +112,7 @@ def login_required(fn):
 
         try:
             data = jwt.decode(token, SECRET, algorithms=["HS256"])
-            user = User.query.get(data["id"])
+            user = get_identity(data["id"])
             if not user:
                 return jsonify({"message": "User not found"}), 404
 
@@ -121,3 +146,36 @@ def admin_required(fn):
 
     return wrapper
 
+
+# ---------------- STREAM TICKETS ----------------
+# EventSource cannot send headers, and a token in a URL lands in access
+# logs: the stream takes a short-lived ticket that is good for nothing else
+def _ticket_serializer():
+    return URLSafeTimedSerializer(
+        current_app.config["JWT_SECRET_KEY"], salt="signal-stream"
+    )
+
+
+def issue_stream_ticket(claims):
+    """Ticket carrying the identity, iat and exp of an access token."""
+    keys = (current_app.config["JWT_IDENTITY_CLAIM"], "iat", "exp")
+    return _ticket_serializer().dumps({k: claims[k] for k in keys if k in claims})
+
+
+def read_stream_ticket(ticket):
+    """The claims in ``ticket``, or ``None`` if it is forged or too old."""
+    try:
+        return _ticket_serializer().loads(
+            ticket, max_age=current_app.config["SSE_TICKET_SECONDS"]
+        )
+    except BadSignature:
+        return None
+
+
+def token_still_valid(claims):
+    """Expiry and revocation of an access token, for checks after the request
+    that presented it (an open stream)."""
+    exp = claims.get("exp")
+    if exp is not None and exp <= time.time():
+        return False
+    return not token_revocations.is_revoked(claims)
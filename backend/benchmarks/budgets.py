@@ -0,0 +1,173 @@
+# benchmarks/budgets.py
+"""Check every @query_budget route against its budget at two data scales.
+
+    cd backend
+    python -m benchmarks.budgets --scales 200,5000
+
+Each scale runs in its own process against a freshly seeded database with
+QUERY_BUDGET_ENFORCE on. A route fails if it goes over its budget, or if
+it issues a different number of statements at the larger scale (a per-row
+query creeping back in). Exits 1 on any failure.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+from benchmarks.run import BACKEND, configure_env, build_app, QueryCounter
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default="200,5000")
+    parser.add_argument("--database-url", help=argparse.SUPPRESS)
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def scenarios(ids):
+    """(name, method, path, token, body) for every budgeted route.
+
+    The name is the endpoint, with ``:variant`` appended when a route is
+    measured along more than one path.
+    """
+    signal = {
+        "pair": "EURUSD", "entry": "1.1000", "tp": "1.1100", "sl": "1.0950",
+        "lots": [
+            {"lot_size": 0.1, "win_amount": 100, "loss_amount": 50},
+            {"lot_size": 0.5, "win_amount": 500, "loss_amount": 250}
+        ]
+    }
+    return [
+        ("ping", "GET", "/api/ping", None, None),
+        ("me", "GET", "/api/me", "client", None),
+        ("get_signals", "GET", "/api/signals", "client", None),
+        ("get_signal_changes", "GET", "/api/signals/changes", "client", None),
+        ("subscribe", "POST", "/api/subscribe", "client", None),
+        ("set_notify_mode", "PUT", "/api/me/notifications", "client", {"notify_mode": "digest"}),
+        ("get_admin_signals", "GET", "/api/admin/signals", "admin", None),
+        ("get_admin_signal", "GET", f"/api/admin/signals/{ids['signal']}", "admin", None),
+        ("admin_users", "GET", "/api/admin/users?q=user1", "admin", None),
+        ("pending_users", "GET", "/api/admin/users/pending", "admin", None),
+        ("active_users", "GET", "/api/admin/users/active", "admin", None),
+        ("approve_user", "PUT", f"/api/admin/users/{ids['user']}/approve", "admin", None),
+        ("deactivate_user", "PUT", f"/api/admin/users/{ids['user']}/deactivate", "admin", None),
+        ("reactivate_user", "PUT", f"/api/admin/users/{ids['user']}/reactivate", "admin", None),
+        ("create_signal", "POST", "/api/admin/signals", "admin", signal),
+        ("update_signal", "PUT", f"/api/admin/signals/{ids['signal']}", "admin", signal),
+        ("patch_signal", "PATCH", f"/api/admin/signals/{ids['signal']}", "admin", {"tp": "1.1200"}),
+        ("delete_signal", "DELETE", f"/api/admin/signals/{ids['signal']}", "admin", None),
+        ("reject_user", "DELETE", f"/api/admin/users/{ids['user']}/reject", "admin", None),
+        # a delta over the writes above: an upsert, lot and signal tombstones
+        ("get_signal_changes:since", "GET", f"/api/signals/changes?since={ids['cursor']}", "client", None),
+    ]
+
+
+def measure(scale, database_url=None):
+    """Statements per budgeted route at ``scale``; runs in a child process."""
+    from benchmarks.seed import seed, ADMIN_EMAIL, CLIENT_EMAIL, PASSWORD
+
+    args = argparse.Namespace(database_url=database_url)
+    db_path = configure_env(args)
+    os.environ["QUERY_BUDGET_ENFORCE"] = "true"
+    # check revocations and identity changes on every request, so counts
+    # do not depend on timing
+    os.environ["REVOCATION_SYNC_SECONDS"] = "0"
+    os.environ["IDENTITY_SYNC_SECONDS"] = "0"
+
+    try:
+        application = build_app()
+        application.testing = True
+
+        from models import db, User, Signal, SignalLot, SignalEvent
+        from querybudget import QueryBudgetExceeded
+
+        with application.app_context():
+            seed(scale)
+            ids = {
+                "signal": db.session.query(Signal.id).order_by(Signal.id.desc()).first()[0],
+                "user": db.session.query(User.id).filter(
+                    User.email == "user1@nari.test"
+                ).scalar(),
+                "cursor": db.session.query(db.func.max(SignalEvent.id)).scalar() or 0,
+            }
+            # seeded lot counts vary; give the edited signal a known one
+            SignalLot.query.filter_by(signal_id=ids["signal"]).delete()
+            db.session.add(SignalLot(
+                signal_id=ids["signal"], lot_size=0.1, win_amount=10, loss_amount=5
+            ))
+            db.session.commit()
+
+        tokens = {}
+        with application.test_client() as c:
+            for name, email, role in (
+                ("admin", ADMIN_EMAIL, "admin"), ("client", CLIENT_EMAIL, None)
+            ):
+                tokens[name] = c.post("/api/login", json={
+                    "email": email, "password": PASSWORD, "role": role
+                }).get_json()["token"]
+
+        counter = QueryCounter()
+        counter.install()
+        client = application.test_client()
+        results = {}
+
+        for name, method, path, token, body in scenarios(ids):
+            endpoint = name.split(":")[0]
+            budget = getattr(application.view_functions[endpoint], "_query_budget")
+            headers = {"Authorization": f"Bearer {tokens[token]}"} if token else {}
+            counter.start()
+            try:
+                response = client.open(path, method=method, headers=headers, json=body)
+                error = None if response.status_code < 400 else f"HTTP {response.status_code}"
+            except QueryBudgetExceeded as e:
+                error = str(e)
+            results[name] = {
+                "budget": budget, "statements": counter.stop(), "error": error
+            }
+
+        return results
+    finally:
+        if db_path and os.path.exists(db_path):
+            os.remove(db_path)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.child:
+        json.dump(measure(args.child, args.database_url), sys.stdout)
+        return 0
+
+    scales = [int(s) for s in args.scales.split(",")]
+    runs = {}
+    for scale in scales:
+        output = subprocess.check_output(
+            [sys.executable, "-m", "benchmarks.budgets", "--child", str(scale)],
+            cwd=BACKEND, text=True
+        )
+        # the app prints during startup; the report is the last line
+        runs[scale] = json.loads(output.strip().splitlines()[-1])
+
+    failed = False
+    print(f"{'route':26} {'budget':>6} " + " ".join(f"{s:>8}" for s in scales))
+    for name, first in runs[scales[0]].items():
+        counts = [runs[s][name]["statements"] for s in scales]
+        errors = [runs[s][name]["error"] for s in scales if runs[s][name]["error"]]
+        status = "ok"
+        if errors:
+            status = errors[0]
+        elif len(set(counts)) > 1:
+            status = "grows with data"
+        failed = failed or status != "ok"
+        print(
+            f"{name:26} {first['budget']:>6} "
+            + " ".join(f"{n:>8}" for n in counts) + f"  {status}"
+        )
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+# benchmarks/run.py
+"""Load and latency benchmark for the API.
+
+    cd backend
+    python -m benchmarks.run --scale 10000 --concurrency 8 --requests 400
+    python -m benchmarks.run --scale 10000 --baseline benchmarks/results/<sha>.json
+
+Builds the app with create_app() against a freshly seeded database
+(SQLite file by default, or --database-url), drives the real routes
+in-process through the WSGI test client from --concurrency threads, and
+writes p50/p95/p99 latency, throughput and SQL statements per request to
+benchmarks/results/<git sha>.json. Outgoing mail is suppressed and the
+outbox workers are disabled.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import threading
+import subprocess
+from datetime import datetime
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND, "benchmarks", "results")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1000,
+                        help="synthetic users and signals to seed (1k - 1M)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200,
+                        help="requests per scenario")
+    parser.add_argument("--database-url",
+                        help="defaults to a throwaway SQLite file")
+    parser.add_argument("--scenarios",
+                        help="comma-separated subset of scenarios to run")
+    parser.add_argument("--out", help="result file (default: results/<sha>.json)")
+    parser.add_argument("--baseline", help="earlier result file to compare with")
+    return parser.parse_args(argv)
+
+
+def git_sha():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+# ---------------- ENVIRONMENT ----------------
+def configure_env(args):
+    db_path = None
+    if not args.database_url:
+        db_path = os.path.join("/tmp", f"nari-bench-{os.getpid()}.db")
+        args.database_url = f"sqlite:///{db_path}"
+
+    os.environ.update({
+        "DATABASE_URL": args.database_url,
+        "RATELIMIT_ENABLED": "false",
+        "OUTBOX_WORKERS": "0",
+        "SCHEDULER_ENABLED": "false",
+        "METRICS_ENABLED": "false",
+    })
+    return db_path
+
+
+def build_app():
+    sys.path.insert(0, BACKEND)
+    from app import create_app
+    from bootstrap import bootstrap
+
+    application = create_app()
+    bootstrap(application)
+    application.extensions["mail"].suppress = True
+    return application
+
+
+# ---------------- SQL COUNTING ----------------
+class QueryCounter:
+    """Counts statements issued by benchmark threads only."""
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def install(self):
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        event.listen(Engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        if getattr(self.local, "active", False):
+            self.local.count += 1
+
+    def start(self):
+        self.local.active = True
+        self.local.count = 0
+
+    def stop(self):
+        self.local.active = False
+        return self.local.count
+
+
+# ---------------- SCENARIOS ----------------
+def scenarios(application, client_token, admin_token, scale):
+    from benchmarks.seed import CLIENT_EMAIL, PASSWORD
+
+    client = {"Authorization": f"Bearer {client_token}"}
+    admin = {"Authorization": f"Bearer {admin_token}"}
+    counter = iter(range(10 ** 9))
+
+    return {
+        "login": lambda c: c.post("/api/login", json={
+            "email": CLIENT_EMAIL, "password": PASSWORD
+        }),
+        "signals_feed": lambda c: c.get("/api/signals", headers=client),
+        "signals_feed_gzip": lambda c: c.get(
+            "/api/signals", headers={**client, "Accept-Encoding": "gzip"}
+        ),
+        "me": lambda c: c.get("/api/me", headers=client),
+        "admin_signals": lambda c: c.get("/api/admin/signals", headers=admin),
+        "admin_users_active": lambda c: c.get(
+            "/api/admin/users/active", headers=admin
+        ),
+        "admin_users_search": lambda c: c.get(
+            f"/api/admin/users?q=user{next(counter) % scale}", headers=admin
+        ),
+        "create_signal": lambda c: c.post("/api/admin/signals", headers=admin, json={
+            "pair": "EURUSD", "entry": "1.1000", "tp": "1.1100", "sl": "1.0950",
+            "lots": [{"lot_size": 0.1, "win_amount": 100, "loss_amount": 50}]
+        }),
+    }
+
+
+def run_scenario(application, fn, total, concurrency, counter):
+    latencies, queries, errors = [], [], [0]
+    lock = threading.Lock()
+    remaining = iter(range(total))
+
+    def worker():
+        client = application.test_client()
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            counter.start()
+            start = time.perf_counter()
+            response = fn(client)
+            elapsed = time.perf_counter() - start
+            issued = counter.stop()
+            with lock:
+                latencies.append(elapsed)
+                queries.append(issued)
+                if response.status_code >= 400:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    wall = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - wall
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / max(len(latencies), 1) * 1000, 3),
+        "throughput_rps": round(len(latencies) / wall, 1),
+        "queries_per_request": round(sum(queries) / max(len(queries), 1), 2),
+        "max_queries": max(queries, default=0),
+    }
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)["scenarios"]
+
+    print(f"\nvs {baseline_path}")
+    for name, now in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        parts = []
+        for metric in ("p95_ms", "throughput_rps", "queries_per_request"):
+            if before[metric]:
+                change = (now[metric] - before[metric]) / before[metric] * 100
+                parts.append(f"{metric} {change:+.1f}%")
+        print(f"  {name:22} " + "  ".join(parts))
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    db_path = configure_env(args)
+
+    try:
+        application = build_app()
+
+        from benchmarks.seed import seed, ADMIN_EMAIL, CLIENT_EMAIL, PASSWORD
+
+        with application.app_context():
+            seed_start = time.perf_counter()
+            seed(args.scale)
+            seed_seconds = time.perf_counter() - seed_start
+
+        tokens = {}
+        with application.test_client() as c:
+            for email, role in ((ADMIN_EMAIL, "admin"), (CLIENT_EMAIL, None)):
+                response = c.post("/api/login", json={
+                    "email": email, "password": PASSWORD, "role": role
+                })
+                tokens[email] = response.get_json()["token"]
+
+        counter = QueryCounter()
+        counter.install()
+
+        available = scenarios(
+            application, tokens[CLIENT_EMAIL], tokens[ADMIN_EMAIL], args.scale
+        )
+        wanted = args.scenarios.split(",") if args.scenarios else list(available)
+
+        results = {}
+        for name in wanted:
+            results[name] = run_scenario(
+                application, available[name], args.requests,
+                args.concurrency, counter
+            )
+            r = results[name]
+            print(
+                f"{name:22} p50 {r['p50_ms']:8.2f}ms  p95 {r['p95_ms']:8.2f}ms  "
+                f"p99 {r['p99_ms']:8.2f}ms  {r['throughput_rps']:8.1f} rps  "
+                f"{r['queries_per_request']:5.2f} q/req  errors {r['errors']}"
+            )
+
+        sha = git_sha()
+        report = {
+            "meta": {
+                "git_sha": sha,
+                "timestamp": datetime.utcnow().isoformat(),
+                "scale": args.scale,
+                "concurrency": args.concurrency,
+                "requests_per_scenario": args.requests,
+                "database": args.database_url.split(":", 1)[0],
+                "seed_seconds": round(seed_seconds, 2),
+                "python": platform.python_version(),
+            },
+            "scenarios": results,
+        }
+
+        out = args.out or os.path.join(RESULTS_DIR, f"{sha}.json")
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+        with open(out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nwrote {out}")
+
+        if args.baseline:
+            compare(results, args.baseline)
+    finally:
+        if db_path and os.path.exists(db_path):
+            os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/seed.py
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from models import db, User, Signal, SignalLot
+from passwords import hash_password
+from prices import price_columns
+
+ADMIN_EMAIL = "bench-admin@nari.test"
+CLIENT_EMAIL = "bench-client@nari.test"
+PASSWORD = "bench-password"
+CHUNK = 10000
+
+PAIRS = ["EURUSD", "GBPUSD", "USDJPY", "XAUUSD", "US30", "NAS100", "GBPJPY", "AUDUSD"]
+
+
+def _chunked_insert(model, rows):
+    for i in range(0, len(rows), CHUNK):
+        db.session.execute(insert(model), rows[i:i + CHUNK])
+
+
+def seed(scale, rng=None):
+    """Fill an empty database with ``scale`` users and ``scale`` signals.
+
+    Every synthetic account shares one password hash, so seeding a million
+    users costs one hash rather than a million.
+    """
+    rng = rng or random.Random(42)
+    now = datetime.utcnow()
+    password_hash = hash_password(PASSWORD)
+
+    users = [
+        {
+            "name": "Admin", "surname": "Bench", "email": ADMIN_EMAIL,
+            "password_hash": password_hash, "approved": True,
+            "role": "admin", "is_active": True, "created_at": now
+        },
+        {
+            "name": "Client", "surname": "Bench", "email": CLIENT_EMAIL,
+            "password_hash": password_hash, "approved": True,
+            "role": "client", "is_active": True, "created_at": now,
+            "subscription_end": now + timedelta(days=30)
+        },
+    ]
+    for i in range(scale):
+        ends = rng.choice([None, -5, 3, 20, 60])
+        users.append({
+            "name": f"user{i}", "surname": f"bench{i % 997}",
+            "email": f"user{i}@nari.test", "password_hash": password_hash,
+            "approved": rng.random() > 0.1, "role": "client",
+            "is_active": rng.random() > 0.05,
+            "created_at": now - timedelta(minutes=i),
+            "subscription_end": (
+                now + timedelta(days=ends) if ends is not None else None
+            )
+        })
+    _chunked_insert(User, users)
+
+    for start in range(0, scale, CHUNK):
+        count = min(CHUNK, scale - start)
+        signals = []
+        for i in range(count):
+            entry, tp, sl = (f"{rng.uniform(1, 2):.5f}" for _ in range(3))
+            signals.append(dict(
+                pair=rng.choice(PAIRS), entry=entry, tp=tp, sl=sl,
+                created_at=now - timedelta(minutes=start + i),
+                **price_columns(entry, tp, sl)
+            ))
+        ids = db.session.execute(
+            insert(Signal).returning(Signal.id), signals
+        ).scalars().all()
+
+        lots = [
+            {
+                "signal_id": signal_id,
+                "lot_size": rng.choice([0.01, 0.1, 0.5, 1.0]),
+                "win_amount": round(rng.uniform(10, 500), 2),
+                "loss_amount": round(rng.uniform(10, 500), 2)
+            }
+            for signal_id in ids
+            for _ in range(rng.randint(1, 3))
+        ]
+        _chunked_insert(SignalLot, lots)
+
+    db.session.commit()
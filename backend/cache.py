@@ -0,0 +1,147 @@
+# cache.py
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import g, request, current_app
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, CacheVersion
+
+
+# ---------------- VERSION COUNTERS ----------------
+def ensure_versions(*names):
+    existing = {
+        v.name for v in CacheVersion.query.filter(CacheVersion.name.in_(names))
+    }
+    for name in names:
+        if name not in existing:
+            db.session.add(CacheVersion(name=name, version=0))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # another worker seeded them first
+        db.session.rollback()
+
+
+def bump_version(name):
+    """Invalidate ``name`` as part of the caller's transaction; returns the
+    new version. The row lock orders versions the way their writes commit."""
+    version = db.session.execute(
+        update(CacheVersion)
+        .where(CacheVersion.name == name)
+        .values(version=CacheVersion.version + 1)
+        .returning(CacheVersion.version)
+    ).scalar()
+    if version is None:
+        version = 1
+        db.session.add(CacheVersion(name=name, version=version))
+
+    g.pop("_cache_versions", None)
+    return version
+
+
+def all_versions():
+    # the table holds a handful of rows: read them all once per request
+    if "_cache_versions" not in g:
+        g._cache_versions = dict(
+            db.session.query(CacheVersion.name, CacheVersion.version)
+        )
+    return g._cache_versions
+
+
+def current_version(name):
+    return all_versions().get(name, 0)
+
+
+# ---------------- RESPONSE CACHE ----------------
+class _Entry:
+    __slots__ = ("body", "gzipped", "headers")
+
+    def __init__(self, body, headers):
+        self.body = body
+        self.gzipped = gzip.compress(body, compresslevel=6)
+        self.headers = headers
+
+
+class ResponseCache:
+    """Per-process LRU of serialized JSON bodies keyed by version.
+
+    Entries are never invalidated in place: a write bumps the version in
+    the database, every worker sees the new number on its next read and
+    simply stops asking for the old keys.
+    """
+
+    KEEP_HEADERS = ("Content-Type", "X-Next-Cursor")
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_entries = 256
+
+    def init_app(self, app):
+        app.config.setdefault("RESPONSE_CACHE_SIZE", 256)
+        self.max_entries = app.config["RESPONSE_CACHE_SIZE"]
+        app.extensions["response_cache"] = self
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def respond(self, namespace, build):
+        """Serve ``build()`` through the cache for the current request.
+
+        ``build`` must return a Flask response; only 200s are cached.
+        """
+        version = current_version(namespace)
+        args = sorted(request.args.items(multi=True))
+        key = (namespace, version, request.path, tuple(args))
+        etag = 'W/"%s-%d-%s"' % (
+            namespace,
+            version,
+            hashlib.sha1(repr(key[2:]).encode()).hexdigest()[:12]
+        )
+
+        if etag in request.headers.get("If-None-Match", ""):
+            response = current_app.response_class(status=304)
+            response.headers["ETag"] = etag
+            return response
+
+        entry = self._get(key)
+        if entry is None:
+            response = build()
+            if response.status_code != 200:
+                return response
+            entry = _Entry(response.get_data(), [
+                (h, response.headers[h])
+                for h in self.KEEP_HEADERS if h in response.headers
+            ])
+            self._put(key, entry)
+
+        use_gzip = "gzip" in request.headers.get("Accept-Encoding", "")
+        response = current_app.response_class(
+            entry.gzipped if use_gzip else entry.body
+        )
+        for name, value in entry.headers:
+            response.headers[name] = value
+        if use_gzip:
+            response.headers["Content-Encoding"] = "gzip"
+        response.headers["Vary"] = "Accept-Encoding"
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,87 @@
+# dbrouting.py
+import logging
+
+from flask import current_app, g, request
+from sqlalchemy import select
+
+from models import db, CacheVersion
+from cache import all_versions
+
+log = logging.getLogger(__name__)
+
+
+def read_only(fn):
+    """Allow a route's reads to be served by the replica, e.g. ``@read_only``
+    directly under ``@app.get(...)``. The route must not write."""
+    fn._read_only = True
+    return fn
+
+
+def engine_options(url, config):
+    """SQLAlchemy ``create_engine`` options for ``url`` from ``DB_POOL_*``."""
+    options = {"pool_pre_ping": config["DB_POOL_PRE_PING"]}
+    # SQLite files are local; sizing and recycling only matter over a network
+    if url and not url.startswith("sqlite"):
+        options.update(
+            pool_size=config["DB_POOL_SIZE"],
+            max_overflow=config["DB_MAX_OVERFLOW"],
+            pool_timeout=config["DB_POOL_TIMEOUT"],
+            pool_recycle=config["DB_POOL_RECYCLE"],
+        )
+    return options
+
+
+class DatabaseRouter:
+    """Pool settings for every engine, and replica routing for GETs.
+
+    A ``@read_only`` request reads from ``DATABASE_REPLICA_URL`` only if the
+    replica has caught up with the primary's cache version counters. Every
+    write that users can see bumps one of them, so right after a write all
+    readers stay on the primary until replication has applied it, whichever
+    worker serves them.
+    """
+
+    def init_app(self, app):
+        app.config.setdefault("DATABASE_REPLICA_URL", None)
+        app.config.setdefault("DB_POOL_SIZE", 5)
+        app.config.setdefault("DB_MAX_OVERFLOW", 10)
+        app.config.setdefault("DB_POOL_TIMEOUT", 30)
+        app.config.setdefault("DB_POOL_RECYCLE", 1800)
+        app.config.setdefault("DB_POOL_PRE_PING", True)
+
+        # must run before db.init_app(app), which builds the engines
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(
+            app.config.get("SQLALCHEMY_DATABASE_URI"), app.config
+        )
+
+        replica_url = app.config["DATABASE_REPLICA_URL"]
+        if replica_url:
+            app.config.setdefault("SQLALCHEMY_BINDS", {})
+            app.config["SQLALCHEMY_BINDS"]["replica"] = {
+                "url": replica_url,
+                **engine_options(replica_url, app.config)
+            }
+            app.before_request(self._route)
+
+        app.extensions["db_router"] = self
+
+    def _route(self):
+        view = current_app.view_functions.get(request.endpoint)
+        if getattr(view, "_read_only", False) and self.replica_caught_up():
+            g._db_replica = True
+
+    def replica_caught_up(self):
+        primary = all_versions()
+        try:
+            with db.engines["replica"].connect() as conn:
+                replica = dict(conn.execute(
+                    select(CacheVersion.name, CacheVersion.version)
+                ).all())
+        except Exception:
+            log.warning("replica unavailable, reading from primary", exc_info=True)
+            return False
+
+        return all(replica.get(name, 0) >= v for name, v in primary.items())
+
+
+db_router = DatabaseRouter()
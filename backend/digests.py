@@ -0,0 +1,55 @@
+# digests.py
+from flask import current_app
+from sqlalchemy import update
+
+from models import db, User, Signal
+from mailer import queue_signal_digest_email
+from outbox import outbox
+
+INSTANT, DIGEST = "instant", "digest"
+NOTIFY_MODES = (INSTANT, DIGEST)
+
+
+def instant_recipients():
+    """``(email, name)`` of active users who get one email per signal."""
+    return list(
+        db.session.query(User.email, User.name)
+        .filter_by(is_active=True, notify_mode=INSTANT)
+    )
+
+
+# ---------------- DIGEST JOB ----------------
+def send_signal_digest(now):
+    """Queue one digest of every signal posted since the last run.
+
+    Runs every ``SIGNAL_DIGEST_SECONDS``, which is the coalescing window.
+    Signals are claimed with one conditional UPDATE ... RETURNING, so each
+    lands in exactly one digest; ones deleted before the window closes are
+    never announced, and edits made inside it are. All digest-mode users
+    share one outbox message, personalised per recipient at send time.
+    """
+    signals = db.session.execute(
+        update(Signal)
+        .where(Signal.digested_at.is_(None), Signal.created_at <= now)
+        .values(digested_at=now)
+        .returning(Signal.id, Signal.pair, Signal.entry, Signal.tp, Signal.sl)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not signals:
+        return 0
+
+    recipients = list(
+        db.session.query(User.email, User.name)
+        .filter_by(is_active=True, notify_mode=DIGEST)
+    )
+    if recipients:
+        queue_signal_digest_email(
+            recipients,
+            sorted(signals, key=lambda s: s.id),
+            current_app.config["SIGNAL_DIGEST_MAX_LISTED"]
+        )
+    db.session.commit()
+
+    if recipients:
+        outbox.wake()
+    return len(signals)
@@ -0,0 +1,351 @@
+# events.py
+import json
+import os
+import queue
+import threading
+import time
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import selectinload
+
+from models import db, Signal, SignalEvent
+from prices import format_decimal
+
+log = logging.getLogger(__name__)
+
+
+def serialize_signal(signal):
+    return {
+        "id": signal.id,
+        "pair": signal.pair,
+        "entry": signal.entry,
+        "tp": signal.tp,
+        "sl": signal.sl,
+        "risk_reward": format_decimal(signal.risk_reward),
+        "lots": [
+            {
+                "id": lot.id,
+                "lot_size": lot.lot_size,
+                "win_amount": lot.win_amount,
+                "loss_amount": lot.loss_amount
+            }
+            for lot in signal.lots
+        ]
+    }
+
+
+# ---------------- EVENT LOG ----------------
+def record_signal_event(kind, signal_id, payload):
+    """Append an event to the session; it commits with the signal change."""
+    db.session.add(SignalEvent(
+        kind=kind,
+        signal_id=signal_id,
+        payload=json.dumps(payload)
+    ))
+
+
+# ---------------- CURSORS ----------------
+# how many of the newest events a fresh cursor is checked against for gaps
+TAIL_SCAN = 200
+
+
+def settle_horizon(settle_seconds):
+    return datetime.utcnow() - timedelta(seconds=settle_seconds)
+
+
+def settled_cursor(rows, floor, horizon):
+    """Highest id a cursor at ``floor`` may move to over ``rows``.
+
+    ``rows`` are ``(id, created_at)`` pairs in id order. Ids are taken when
+    a transaction inserts, not when it commits, so a lower id can become
+    visible after a higher one. A gap is only stepped over once the event
+    after it is older than ``horizon``; by then the missing id has either
+    committed or rolled back.
+    """
+    cursor = floor
+    for event_id, created_at in rows:
+        if event_id != cursor + 1 and created_at > horizon:
+            break
+        cursor = event_id
+    return cursor
+
+
+def tail_cursor(horizon):
+    """``(latest id, cursor)`` for a client or poller starting from now."""
+    tail = (
+        db.session.query(SignalEvent.id, SignalEvent.created_at)
+        .order_by(SignalEvent.id.desc())
+        .limit(TAIL_SCAN)
+        .all()
+    )
+    if not tail:
+        return 0, 0
+
+    tail.reverse()
+    return tail[-1][0], settled_cursor(tail, tail[0][0] - 1, horizon)
+
+
+# ---------------- DELTA SYNC ----------------
+def collect_changes(since, max_events, settle_seconds):
+    """Collapse the event log after ``since`` into one delta.
+
+    The event id is the sync cursor; ``deleted`` events and the
+    ``deleted_lot_ids`` of ``updated`` events are the tombstones. Returns
+    ``None`` when nothing changed, and a ``reset`` delta when the client
+    has no cursor or is too far behind to catch up from the log. The
+    cursor stops short of ids that may still commit, see settled_cursor().
+    """
+    horizon = settle_horizon(settle_seconds)
+    latest, cursor = tail_cursor(horizon)
+
+    if since is None or since > latest:
+        return {"cursor": cursor, "reset": True}
+
+    if since == latest:
+        return None
+
+    events = (
+        SignalEvent.query
+        .filter(SignalEvent.id > since)
+        .order_by(SignalEvent.id)
+        .limit(max_events + 1)
+        .all()
+    )
+    if len(events) > max_events:
+        return {"cursor": cursor, "reset": True}
+
+    cursor = settled_cursor(
+        [(e.id, e.created_at) for e in events], since, horizon
+    )
+    events = [e for e in events if e.id <= cursor]
+    if not events:
+        return None
+
+    deleted = set()
+    touched = set()
+    deleted_lots = set()
+
+    for e in events:
+        if e.kind == "deleted":
+            deleted.add(e.signal_id)
+            touched.discard(e.signal_id)
+        else:
+            touched.add(e.signal_id)
+            deleted_lots.update(json.loads(e.payload).get("deleted_lot_ids", []))
+
+    upserted = (
+        Signal.query
+        .options(selectinload(Signal.lots))
+        .filter(Signal.id.in_(touched))
+        .order_by(Signal.created_at.desc(), Signal.id.desc())
+        .all()
+        if touched else []
+    )
+
+    return {
+        "cursor": cursor,
+        "reset": False,
+        "upserted": [serialize_signal(s) for s in upserted],
+        "deleted": sorted(deleted),
+        "deleted_lots": sorted(deleted_lots)
+    }
+
+
+def format_sse(event_id, kind, payload):
+    return f"id: {event_id}\nevent: {kind}\ndata: {payload}\n\n"
+
+
+# ---------------- BROADCASTER ----------------
+class _Subscriber:
+    def __init__(self, size):
+        self.queue = queue.Queue(maxsize=size)
+        self.dropped = False
+
+
+class Broadcaster:
+    """Fans signal events out to every open stream in this process.
+
+    One poller thread per process tails ``signal_events``, so events
+    written by any gunicorn worker reach every worker's clients. Streams
+    only wait on their own queue and hold no database connection while
+    they do. Each one occupies a greenlet under the default gevent worker,
+    or a whole thread under gthread; ``SSE_MAX_STREAMS`` caps them per
+    process so they never take every request slot.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        self.app = app
+        app.config.setdefault("SSE_POLL_SECONDS", 1.0)
+        app.config.setdefault("SSE_HEARTBEAT_SECONDS", 15.0)
+        app.config.setdefault("SSE_QUEUE_SIZE", 100)
+        app.config.setdefault("SSE_REPLAY_LIMIT", 500)
+        app.config.setdefault("SSE_MAX_STREAMS", 800)
+        app.config.setdefault("SIGNAL_EVENT_SETTLE_SECONDS", 5.0)
+        app.extensions["broadcaster"] = self
+
+    def _ensure_started(self):
+        # a thread started before a fork does not survive it
+        if self._thread and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name="signal-broadcaster", daemon=True
+            )
+            self._thread.start()
+
+    def notify(self):
+        self._wake.set()
+
+    def full(self):
+        return len(self._subscribers) >= self.app.config["SSE_MAX_STREAMS"]
+
+    def subscribe(self):
+        sub = _Subscriber(self.app.config["SSE_QUEUE_SIZE"])
+        with self._lock:
+            self._subscribers.add(sub)
+        self._ensure_started()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def _publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        for sub in subscribers:
+            try:
+                sub.queue.put_nowait(event)
+            except queue.Full:
+                # slow client: cut it loose, it will resume by Last-Event-ID
+                sub.dropped = True
+                self.unsubscribe(sub)
+
+    def _run(self):
+        last_id = None
+
+        while True:
+            self._wake.wait(self.app.config["SSE_POLL_SECONDS"])
+            self._wake.clear()
+
+            if not self._subscribers:
+                last_id = None
+                continue
+
+            try:
+                with self.app.app_context():
+                    horizon = settle_horizon(
+                        self.app.config["SIGNAL_EVENT_SETTLE_SECONDS"]
+                    )
+                    if last_id is None:
+                        _, last_id = tail_cursor(horizon)
+                        continue
+
+                    rows = (
+                        SignalEvent.query
+                        .filter(SignalEvent.id > last_id)
+                        .order_by(SignalEvent.id)
+                        .limit(self.app.config["SSE_REPLAY_LIMIT"])
+                        .all()
+                    )
+                    cursor = settled_cursor(
+                        [(e.id, e.created_at) for e in rows], last_id, horizon
+                    )
+                    events = [(e.id, e.kind, e.payload) for e in rows if e.id <= cursor]
+            except Exception:
+                log.exception("signal event poll failed")
+                continue
+
+            # ids are published in order, so streams can dedupe on the last one
+            for event in events:
+                self._publish(event)
+            last_id = cursor
+
+    # ---------------- STREAM ----------------
+    def stream(self, last_event_id=None, authorized=None):
+        """Generator yielding SSE frames, replaying anything after ``last_event_id``.
+
+        ``authorized()`` is re-checked once per heartbeat interval; when it
+        turns false the stream sends an ``unauthorized`` event and ends.
+        """
+        config = self.app.config
+        sub = self.subscribe()
+        sent = last_event_id
+
+        try:
+            yield "retry: 3000\n\n"
+
+            if last_event_id is not None:
+                limit = config["SSE_REPLAY_LIMIT"]
+                backlog = (
+                    SignalEvent.query
+                    .filter(SignalEvent.id > last_event_id)
+                    .order_by(SignalEvent.id)
+                    .limit(limit + 1)
+                    .all()
+                )
+                cursor = settled_cursor(
+                    [(e.id, e.created_at) for e in backlog],
+                    last_event_id,
+                    settle_horizon(config["SIGNAL_EVENT_SETTLE_SECONDS"])
+                )
+
+                if len(backlog) > limit:
+                    # too far behind to replay, client must refetch the feed
+                    yield format_sse(cursor, "reset", "{}")
+                    sent = cursor
+                else:
+                    # the rest arrives from the poller once it has settled
+                    for e in backlog:
+                        if e.id > cursor:
+                            break
+                        yield format_sse(e.id, e.kind, e.payload)
+                        sent = e.id
+
+            # the stream may stay open for hours: hand back the connection
+            # the auth check or the replay took before waiting on the queue
+            db.session.remove()
+            checked_at = time.monotonic()
+
+            while not sub.dropped:
+                if authorized is not None and (
+                    time.monotonic() - checked_at >= config["SSE_HEARTBEAT_SECONDS"]
+                ):
+                    allowed = authorized()
+                    db.session.remove()
+                    if not allowed:
+                        yield "event: unauthorized\ndata: {}\n\n"
+                        return
+                    checked_at = time.monotonic()
+
+                try:
+                    event_id, kind, payload = sub.queue.get(
+                        timeout=config["SSE_HEARTBEAT_SECONDS"]
+                    )
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                if sent is not None and event_id <= sent:
+                    continue
+
+                yield format_sse(event_id, kind, payload)
+                sent = event_id
+        finally:
+            self.unsubscribe(sub)
+
+
+broadcaster = Broadcaster()
@@ -0,0 +1,215 @@
+# exports.py
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, date
+from decimal import Decimal
+
+from flask import Response, stream_with_context
+from sqlalchemy import select
+
+from models import db, User, Signal, SignalLot
+from admin_users import FilterError, user_filters
+from signal_filters import SignalFilterError, signal_filters
+from prices import format_decimal
+
+YIELD_PER = 1000
+FLUSH_BYTES = 64 * 1024
+
+USER_COLUMNS = (
+    "id", "name", "surname", "email", "role", "approved", "is_active",
+    "subscription_end", "subscription_status", "created_at"
+)
+SIGNAL_COLUMNS = ("id", "pair", "entry", "tp", "sl", "risk_reward", "created_at")
+LOT_COLUMNS = ("lot_id", "lot_size", "win_amount", "loss_amount")
+
+# a spreadsheet runs a cell starting with one of these as a formula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+class ExportError(ValueError):
+    pass
+
+
+# ---------------- FILTERS ----------------
+def _date_arg(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+    except ValueError:
+        raise ExportError(f"{name} must be an ISO 8601 date or timestamp")
+
+
+def _created_between(column, params):
+    criteria = []
+    start, end = _date_arg(params, "from"), _date_arg(params, "to")
+    if start:
+        criteria.append(column >= start)
+    if end:
+        criteria.append(column < end)
+    return criteria
+
+
+def user_export_query(params):
+    """Users matching the admin list filters plus ``from``/``to`` on signup."""
+    try:
+        criteria = user_filters(params)
+    except FilterError as e:
+        raise ExportError(str(e))
+    criteria += _created_between(User.created_at, params)
+
+    return (
+        select(*(getattr(User, c) for c in USER_COLUMNS))
+        .where(*criteria)
+        .order_by(User.id)
+    )
+
+
+def signal_export_query(params):
+    """One row per lot (or per lot-less signal), with the /api/signals
+    filters, in signal order so rows can be grouped while streaming."""
+    try:
+        criteria = signal_filters(params)
+    except SignalFilterError as e:
+        raise ExportError(str(e))
+
+    return (
+        select(
+            *(getattr(Signal, c) for c in SIGNAL_COLUMNS),
+            SignalLot.id.label("lot_id"),
+            SignalLot.lot_size, SignalLot.win_amount, SignalLot.loss_amount
+        )
+        .outerjoin(SignalLot, SignalLot.signal_id == Signal.id)
+        .where(*criteria)
+        .order_by(Signal.id, SignalLot.id)
+    )
+
+
+# ---------------- ENCODING ----------------
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return format_decimal(value)
+    return value
+
+
+def _stream_rows(statement):
+    # server-side cursor where the driver has one; YIELD_PER rows in memory
+    result = db.session.execute(
+        statement.execution_options(yield_per=YIELD_PER)
+    )
+    for partition in result.partitions():
+        yield from partition
+
+
+def _group_signals(rows):
+    current = None
+    for row in rows:
+        if current is None or current["id"] != row.id:
+            if current is not None:
+                yield current
+            current = {c: _plain(getattr(row, c)) for c in SIGNAL_COLUMNS}
+            current["lots"] = []
+        if row.lot_id is not None:
+            current["lots"].append({
+                "id": row.lot_id,
+                "lot_size": row.lot_size,
+                "win_amount": row.win_amount,
+                "loss_amount": row.loss_amount
+            })
+    if current is not None:
+        yield current
+
+
+def ndjson_lines(records):
+    for record in records:
+        yield json.dumps(record, default=_plain) + "\n"
+
+
+def csv_lines(header, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow([_csv_cell(v) for v in row])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _csv_cell(value):
+    # only text is user-controlled; numbers and dates are written as-is
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return _plain(value)
+
+
+def _chunked(lines, compress):
+    """Join lines into ~64 KB chunks, gzip-compressing on the fly."""
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    pending, size = [], 0
+
+    for line in lines:
+        pending.append(line.encode("utf-8"))
+        size += len(pending[-1])
+        if size >= FLUSH_BYTES:
+            chunk = b"".join(pending)
+            pending, size = [], 0
+            chunk = gz.compress(chunk) if gz else chunk
+            if chunk:
+                yield chunk
+
+    chunk = b"".join(pending)
+    if gz:
+        chunk = gz.compress(chunk) + gz.flush()
+    if chunk:
+        yield chunk
+
+
+# ---------------- RESPONSES ----------------
+def export_response(kind, params, accept_encoding):
+    """Stream a ``users`` or ``signals`` export in constant memory.
+
+    ``params`` carries the filters and ``format`` (``ndjson``, default, or
+    ``csv``). Raises ``ExportError`` for bad filters before any row is read.
+    """
+    fmt = params.get("format", "ndjson")
+    if fmt not in FORMATS:
+        raise ExportError("format must be ndjson or csv")
+
+    # generators: nothing is queried until the response starts streaming
+    if kind == "users":
+        rows = _stream_rows(user_export_query(params))
+        if fmt == "csv":
+            lines = csv_lines(USER_COLUMNS, rows)
+        else:
+            lines = ndjson_lines(row._asdict() for row in rows)
+    else:
+        rows = _stream_rows(signal_export_query(params))
+        if fmt == "csv":
+            lines = csv_lines(SIGNAL_COLUMNS + LOT_COLUMNS, rows)
+        else:
+            lines = ndjson_lines(_group_signals(rows))
+
+    compress = "gzip" in (accept_encoding or "")
+    filename = f"{kind}-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+
+    response = Response(
+        stream_with_context(_chunked(lines, compress)),
+        mimetype=FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+    if compress:
+        response.headers["Content-Encoding"] = "gzip"
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
@@ -0,0 +1,62 @@
+# gunicorn.conf.py
+import os
+import multiprocessing
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+# gevent: an idle SSE stream is a parked greenlet, not a thread, so one
+# worker holds thousands of them next to its ordinary requests
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gevent")
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "1000"))
+# gthread only: a request thread holds at most one pooled connection (an
+# open SSE stream holds none), so a worker never waits on its own pool
+threads = int(os.getenv(
+    "GUNICORN_THREADS",
+    int(os.getenv("DB_POOL_SIZE", "5")) + int(os.getenv("DB_MAX_OVERFLOW", "10"))
+))
+
+# streams past this get a 503, so they cannot take every slot in a worker;
+# read by the app, which is loaded after this file
+os.environ.setdefault("SSE_MAX_STREAMS", str(
+    worker_connections * 4 // 5 if worker_class == "gevent" else max(threads // 2, 1)
+))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "0"))
+
+# import the app once in the master; workers inherit it through fork
+preload_app = True
+
+# run `flask --app wsgi bootstrap` here instead of as a release step
+bootstrap_on_start = os.getenv("BOOTSTRAP_ON_START", "true").lower() == "true"
+
+if worker_class == "gevent":
+    # patch before the preloaded app imports socket, ssl and threading
+    from gevent import monkey
+    monkey.patch_all()
+
+    # psycopg2 waits on the socket in C, which would block every greenlet
+    # in the worker, unless it is made to yield to the gevent hub
+    if os.getenv("DATABASE_URL", "").startswith("postgres"):
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+
+
+def when_ready(server):
+    if bootstrap_on_start:
+        from bootstrap import bootstrap
+        from wsgi import app
+
+        bootstrap(app)
+
+
+def post_fork(server, worker):
+    # pooled connections must never be shared with the parent process
+    from models import db
+    from wsgi import app
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
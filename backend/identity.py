@@ -0,0 +1,158 @@
+# identity.py
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from flask import g, abort
+from sqlalchemy import delete, insert
+
+from models import db, User, IdentityVersion
+from cache import bump_version, current_version
+
+Identity = namedtuple(
+    "Identity",
+    "id email role approved is_active subscription_end notify_mode"
+)
+
+
+class IdentityCache:
+    """Bounded LRU + TTL cache of the user columns auth checks need.
+
+    A write that changes users records them in ``identity_versions`` under
+    the ``users`` version it bumps. Each process reads that counter at most
+    every ``IDENTITY_SYNC_SECONDS`` and, when it has moved, drops only the
+    users changed since it last looked: one user's write leaves every
+    other cached identity alone. The writing process drops its own entries
+    at once. Deactivation does not depend on this window, because revoked
+    tokens are refused by ``revocation``.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._version = None
+        self._checked_at = None
+        self.max_entries = 10000
+        self.ttl = 60
+        self.sync_seconds = 2.0
+
+    def init_app(self, app):
+        app.config.setdefault("IDENTITY_CACHE_SIZE", 10000)
+        app.config.setdefault("IDENTITY_CACHE_TTL", 60)
+        app.config.setdefault("IDENTITY_SYNC_SECONDS", 2.0)
+        self.max_entries = app.config["IDENTITY_CACHE_SIZE"]
+        self.ttl = app.config["IDENTITY_CACHE_TTL"]
+        self.sync_seconds = app.config["IDENTITY_SYNC_SECONDS"]
+        # nothing cached for another app's database carries over
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+            self._checked_at = None
+        app.extensions["identity_cache"] = self
+
+    def get(self, user_id):
+        user_id = int(user_id)
+        request_memo = g.setdefault("_identities", {})
+        if user_id in request_memo:
+            return request_memo[user_id]
+
+        self._sync()
+        seen = self._version
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                request_memo[user_id] = entry[1]
+                return entry[1]
+
+        row = (
+            db.session.query(
+                User.id, User.email, User.role, User.approved,
+                User.is_active, User.subscription_end, User.notify_mode
+            )
+            .filter(User.id == user_id)
+            .first()
+        )
+        identity = Identity(*row) if row else None
+
+        with self._lock:
+            # a sync in between may have dropped this user after our read
+            if identity is not None and self._version == seen:
+                self._entries[user_id] = (now + self.ttl, identity)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        request_memo[user_id] = identity
+        return identity
+
+    def _sync(self):
+        now = time.monotonic()
+        checked_at = self._checked_at
+        if checked_at is not None and now - checked_at < self.sync_seconds:
+            return
+        # one request per process does the check; the rest use the old entries
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            version = current_version("users")
+            if self._version is None or version < self._version:
+                # first look, or the counters were reset: trust nothing cached
+                with self._lock:
+                    self._entries.clear()
+                    self._version = version
+            elif version != self._version:
+                changed = (
+                    db.session.query(IdentityVersion.user_id, IdentityVersion.version)
+                    .filter(IdentityVersion.version > self._version)
+                    .all()
+                )
+                with self._lock:
+                    for changed_id, _ in changed:
+                        self._entries.pop(changed_id, None)
+                    self._version = max([version] + [v for _, v in changed])
+            self._checked_at = now
+        finally:
+            self._sync_lock.release()
+
+    def invalidate(self, *user_ids):
+        """Call before committing a write that changes these users."""
+        user_ids = list(dict.fromkeys(int(i) for i in user_ids))
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+        g.pop("_identities", None)
+
+        version = bump_version("users")
+        if user_ids:
+            db.session.execute(
+                delete(IdentityVersion)
+                .where(IdentityVersion.user_id.in_(user_ids))
+                .execution_options(synchronize_session=False)
+            )
+            db.session.execute(insert(IdentityVersion), [
+                {"user_id": user_id, "version": version} for user_id in user_ids
+            ])
+        # the next lookup here re-reads the counter
+        self._checked_at = None
+
+
+identity_cache = IdentityCache()
+
+
+def get_identity(user_id):
+    return identity_cache.get(user_id)
+
+
+def get_identity_or_404(user_id):
+    identity = identity_cache.get(user_id)
+    if identity is None:
+        abort(404)
+    return identity
+
+
+def invalidate_identity(*user_ids):
+    identity_cache.invalidate(*user_ids)
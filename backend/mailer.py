@@ -1,23 +1,63 @@
 # mailer.py
 from flask_mail import Message
 from extensions import mail
+from outbox import enqueue_email
 import smtplib
 from email.message import EmailMessage
 import os
 
-def send_new_signal_email(recipients):
-    msg = Message(
+def queue_new_signal_email(recipients):
+    # recipients: (email, name) pairs; committed with the signal
+    return enqueue_email(
         subject="📢 New Signal Available",
-        recipients=recipients,
         body=(
-            "Hello,\n\n"
+            "Hello {name},\n\n"
             "A new trading signal has just been posted.\n"
             "Please log in to view it.\n\n"
             "Regards,\n"
             "NARI Team"
-        )
+        ),
+        recipients=recipients
+    )
+
+
+def queue_signal_batch_email(recipients, count):
+    # one message for a whole import instead of one per signal
+    return enqueue_email(
+        subject=f"📢 {count} New Signals Available",
+        body=(
+            "Hello {name},\n\n"
+            f"{count} new trading signals have just been posted.\n"
+            "Please log in to view them.\n\n"
+            "Regards,\n"
+            "NARI Team"
+        ),
+        recipients=recipients
+    )
+
+
+def queue_signal_digest_email(recipients, signals, max_listed):
+    # one message per digest window; signals are rows with pair/entry/tp/sl
+    lines = [
+        f"{s.pair}: entry {s.entry}, TP {s.tp}, SL {s.sl}"
+        for s in signals[:max_listed]
+    ]
+    if len(signals) > max_listed:
+        lines.append(f"...and {len(signals) - max_listed} more")
+
+    listing = "\n".join(lines)
+    return enqueue_email(
+        subject=f"📢 Signal digest: {len(signals)} new",
+        body=(
+            "Hello {name},\n\n"
+            f"{len(signals)} new trading signal(s) were posted:\n\n"
+            f"{listing}\n\n"
+            "Please log in for the full details.\n\n"
+            "Regards,\n"
+            "NARI Team"
+        ),
+        recipients=recipients
     )
-    mail.send(msg)
 
 EMAIL = os.getenv("MAIL_USER")
 PASSWORD = os.getenv("MAIL_PASS")
@@ -34,18 +74,85 @@ def send_email(to, subject, body):
         server.send_message(msg)
 
 
-from flask_mail import Message
-from extensions import mail
+import logging
 import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from metrics import metrics
+
+log = logging.getLogger(__name__)
+
 
-def send_reset_email_async(app, to, reset_link):
-    def send():
-        with app.app_context():
+class MailQueueFull(Exception):
+    """Raised when the mail executor has no free slot; callers answer 503,
+    except where that would reveal an account (forgot-password)."""
+
+
+class MailExecutor:
+    """Sends one-off mail from a small thread pool.
+
+    For messages that must not sit in the outbox table (reset links carry
+    a live token). At most ``MAIL_EXECUTOR_MAX_PENDING`` sends may be
+    queued or running per process; beyond that ``submit`` raises
+    ``MailQueueFull`` instead of piling up threads.
+    """
+
+    def __init__(self):
+        self.workers = 2
+        self._slots = threading.BoundedSemaphore(20)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault("MAIL_EXECUTOR_WORKERS", 2)
+        app.config.setdefault("MAIL_EXECUTOR_MAX_PENDING", 20)
+
+        self.workers = app.config["MAIL_EXECUTOR_WORKERS"]
+        self._slots = threading.BoundedSemaphore(app.config["MAIL_EXECUTOR_MAX_PENDING"])
+        app.extensions["mail_executor"] = self
+
+    def _pool(self):
+        # threads do not survive a fork: build the pool per process
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="mail"
+                    )
+                    self._pid = os.getpid()
+        return self._executor
+
+    def submit(self, msg, source):
+        if not self._slots.acquire(blocking=False):
+            raise MailQueueFull()
+
+        app = current_app._get_current_object()
+
+        def send():
             try:
-                msg = Message(
-                    subject="🔐 Password Reset",
-                    recipients=[to],
-                    body=f"""
+                with app.app_context(), metrics.smtp_timer(source):
+                    mail.send(msg)
+            except Exception:
+                log.exception("%s email to %s failed", source, msg.recipients)
+            finally:
+                self._slots.release()
+
+        try:
+            self._pool().submit(send)
+        except Exception:
+            self._slots.release()
+            raise
+
+
+mail_executor = MailExecutor()
+
+
+def send_reset_email_async(to, reset_link, expires_minutes):
+    mail_executor.submit(Message(
+        subject="🔐 Password Reset",
+        recipients=[to],
+        body=f"""
 HU DIVHA VHALIMI
 
 You requested a password reset.
@@ -53,14 +160,8 @@ You requested a password reset.
 Reset your password using this link:
 {reset_link}
 
-This link expires in 30 minutes.
+This link expires in {expires_minutes} minutes.
 
 If you didn’t request this, ignore this email.
 """
-                )
-                mail.send(msg)
-                print("✅ Reset email sent")
-            except Exception as e:
-                print("❌ Email failed:", e)
-
-    threading.Thread(target=send).start()
+    ), "reset_password")
@@ -0,0 +1,242 @@
+# metrics.py
+import os
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class RouteStats:
+    __slots__ = ("latency", "sql_count", "sql_seconds", "smtp_seconds", "bytes", "status")
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.sql_count = Histogram(SQL_COUNT_BUCKETS)
+        self.sql_seconds = 0.0
+        self.smtp_seconds = 0.0
+        self.bytes = 0
+        self.status = {}
+
+
+class Metrics:
+    """Per-route latency, SQL, payload and SMTP numbers for this process.
+
+    Request hooks keep a small list on ``g``; the SQLAlchemy listeners add
+    to it, and one locked update per request folds it into the route's
+    stats. Work outside a request (the outbox workers) is counted under
+    ``background``.
+
+    Every series carries a ``pid`` label: under gunicorn each worker keeps
+    its own numbers and answers the scrape for itself only, so series from
+    different workers must stay apart (sum them by route in the query).
+    """
+
+    def __init__(self):
+        self._routes = {}
+        self._lock = threading.Lock()
+        self._background = [0, 0.0]
+        self._smtp = {}
+        self._listening = False
+
+    def init_app(self, app):
+        app.config.setdefault("METRICS_ENABLED", True)
+        if not app.config["METRICS_ENABLED"]:
+            return
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.extensions["metrics"] = self
+
+        # listeners are global to every engine (and bind); attach them once
+        if not self._listening:
+            event.listen(Engine, "before_cursor_execute", self._before_sql)
+            event.listen(Engine, "after_cursor_execute", self._after_sql)
+            self._listening = True
+
+    # ---------------- REQUEST HOOKS ----------------
+    def _start(self):
+        # start, sql statements, sql seconds, smtp seconds
+        g._metrics = [time.perf_counter(), 0, 0.0, 0.0]
+
+    def _finish(self, response):
+        state = g.pop("_metrics", None)
+        if state is None:
+            return response
+
+        elapsed = time.perf_counter() - state[0]
+        rule = request.url_rule.rule if request.url_rule else "unmatched"
+        key = (request.method, rule)
+        status = f"{response.status_code // 100}xx"
+
+        # measuring a streamed body would drain (and buffer) the generator:
+        # count its bytes as they are sent instead
+        if response.is_streamed:
+            response.response = self._counted(key, response.response)
+            size = 0
+        else:
+            size = response.calculate_content_length() or 0
+
+        with self._lock:
+            stats = self._routes.get(key)
+            if stats is None:
+                stats = self._routes[key] = RouteStats()
+            stats.latency.observe(elapsed)
+            stats.sql_count.observe(state[1])
+            stats.sql_seconds += state[2]
+            stats.smtp_seconds += state[3]
+            stats.bytes += size
+            stats.status[status] = stats.status.get(status, 0) + 1
+
+        return response
+
+    def _counted(self, key, body):
+        sent = 0
+        try:
+            for chunk in body:
+                sent += len(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+                yield chunk
+        finally:
+            close = getattr(body, "close", None)
+            if close is not None:
+                close()
+            with self._lock:
+                self._routes[key].bytes += sent
+
+    # ---------------- SQL ----------------
+    # the start time lives on the execution context, which is dropped with
+    # the statement: one that fails never reaches _after_sql, and a stack
+    # on the connection would keep its entry for the pool's lifetime
+    def _before_sql(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_start = time.perf_counter()
+
+    def _after_sql(self, conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_metrics_start", None)
+        if start is None:
+            # dialect bookkeeping run without a context
+            return
+        elapsed = time.perf_counter() - start
+        state = g.get("_metrics") if has_request_context() else None
+
+        if state is not None:
+            state[1] += 1
+            state[2] += elapsed
+        else:
+            with self._lock:
+                self._background[0] += 1
+                self._background[1] += elapsed
+
+    # ---------------- SMTP ----------------
+    @contextmanager
+    def smtp_timer(self, source):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            state = g.get("_metrics") if has_request_context() else None
+            if state is not None:
+                state[3] += elapsed
+            with self._lock:
+                if source not in self._smtp:
+                    self._smtp[source] = Histogram(LATENCY_BUCKETS)
+                self._smtp[source].observe(elapsed)
+
+    # ---------------- EXPOSITION ----------------
+    def render(self):
+        pid = f'pid="{os.getpid()}"'
+        with self._lock:
+            routes = sorted(self._routes.items())
+            lines = [
+                "# HELP nari_http_request_duration_seconds Request latency by route.",
+                "# TYPE nari_http_request_duration_seconds histogram",
+            ]
+            for (method, rule), stats in routes:
+                lines += stats.latency.render(
+                    "nari_http_request_duration_seconds", _labels(pid, method, rule)
+                )
+
+            lines += [
+                "# HELP nari_http_sql_statements SQL statements issued per request.",
+                "# TYPE nari_http_sql_statements histogram",
+            ]
+            for (method, rule), stats in routes:
+                lines += stats.sql_count.render(
+                    "nari_http_sql_statements", _labels(pid, method, rule)
+                )
+
+            for name, help_text, attr in (
+                ("nari_http_sql_seconds_total", "Time spent in SQL by route.", "sql_seconds"),
+                ("nari_http_smtp_seconds_total", "Time spent in SMTP by route.", "smtp_seconds"),
+                ("nari_http_response_bytes_total", "Response body bytes by route.", "bytes"),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                lines += [
+                    f"{name}{{{_labels(pid, method, rule)}}} {getattr(stats, attr)}"
+                    for (method, rule), stats in routes
+                ]
+
+            lines += [
+                "# HELP nari_http_requests_total Requests by route and status class.",
+                "# TYPE nari_http_requests_total counter",
+            ]
+            for (method, rule), stats in routes:
+                for status, n in sorted(stats.status.items()):
+                    lines.append(
+                        f'nari_http_requests_total{{{_labels(pid, method, rule)},status="{status}"}} {n}'
+                    )
+
+            lines += [
+                "# HELP nari_background_sql_statements_total SQL issued outside requests.",
+                "# TYPE nari_background_sql_statements_total counter",
+                f"nari_background_sql_statements_total{{{pid}}} {self._background[0]}",
+                "# HELP nari_background_sql_seconds_total SQL time outside requests.",
+                "# TYPE nari_background_sql_seconds_total counter",
+                f"nari_background_sql_seconds_total{{{pid}}} {self._background[1]:.6f}",
+                "# HELP nari_smtp_send_seconds SMTP send time by source.",
+                "# TYPE nari_smtp_send_seconds histogram",
+            ]
+            for source, histogram in sorted(self._smtp.items()):
+                lines += histogram.render("nari_smtp_send_seconds", f'{pid},source="{source}"')
+
+        return "\n".join(lines) + "\n"
+
+
+def _labels(pid, method, rule):
+    return f'{pid},method="{method}",route="{rule}"'
+
+
+metrics = Metrics()
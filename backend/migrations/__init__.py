@@ -0,0 +1,249 @@
+# migrations/__init__.py
+import os
+import re
+import sys
+import logging
+import warnings
+import importlib
+from contextlib import contextmanager
+
+from sqlalchemy import inspect, text
+
+from migrations.hot_queries import HOT_QUERIES
+
+log = logging.getLogger(__name__)
+
+VERSIONS_DIR = os.path.join(os.path.dirname(__file__), "versions")
+ADVISORY_LOCK_ID = 72_600_001
+
+
+# ---------------- DISCOVERY ----------------
+def discover():
+    """``[(version, module)]`` for ``versions/NNNN_name.py``, in order."""
+    found = []
+    for filename in sorted(os.listdir(VERSIONS_DIR)):
+        match = re.match(r"^(\d{4})_\w+\.py$", filename)
+        if match:
+            module = importlib.import_module(
+                f"migrations.versions.{filename[:-3]}"
+            )
+            found.append((match.group(1), module))
+    return found
+
+
+# ---------------- MIGRATOR ----------------
+class Migrator:
+    """What a migration's ``upgrade(m)`` gets to work with.
+
+    Every helper is idempotent, so a migration can be re-run after a
+    partial failure and is a no-op on a database created from the
+    current models.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.dialect = engine.dialect.name
+
+    @contextmanager
+    def transaction(self):
+        with self.engine.begin() as conn:
+            yield conn
+
+    def execute(self, sql, **params):
+        with self.engine.begin() as conn:
+            return conn.execute(text(sql), params)
+
+    def has_column(self, table, column):
+        return column in self.columns(table)
+
+    def columns(self, table):
+        return {c["name"]: c for c in inspect(self.engine).get_columns(table)}
+
+    def add_column(self, table, column, ddl):
+        if not self.has_column(table, column):
+            self.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+    def create_index(self, name, table, keys, unique=False, where=None, pg_keys=None):
+        """Create an index without blocking writes where the backend allows.
+
+        On Postgres this is ``CREATE INDEX CONCURRENTLY`` outside any
+        transaction; ``pg_keys`` overrides ``keys`` there (operator
+        classes, casts).
+        """
+        keys = pg_keys if (pg_keys and self.dialect == "postgresql") else keys
+        sql = "CREATE {unique}INDEX {concurrently}IF NOT EXISTS {name} ON {table} ({keys}){where}".format(
+            unique="UNIQUE " if unique else "",
+            concurrently="CONCURRENTLY " if self.dialect == "postgresql" else "",
+            name=name,
+            table=table,
+            keys=", ".join(keys),
+            where=f" WHERE {where}" if where else ""
+        )
+
+        if self.dialect != "postgresql":
+            self.execute(sql)
+            return
+
+        with self.engine.connect().execution_options(
+            isolation_level="AUTOCOMMIT"
+        ) as conn:
+            try:
+                conn.execute(text(sql))
+            except Exception:
+                # a failed concurrent build leaves an INVALID index behind
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                raise
+
+    def drop_index(self, name):
+        if self.dialect == "postgresql":
+            with self.engine.connect().execution_options(
+                isolation_level="AUTOCOMMIT"
+            ) as conn:
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        else:
+            self.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+# ---------------- RUNNER ----------------
+@contextmanager
+def _migration_lock(engine):
+    # only one process migrates; the others wait, then find nothing to do
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+
+    with engine.connect().execution_options(
+        isolation_level="AUTOCOMMIT"
+    ) as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": ADVISORY_LOCK_ID})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": ADVISORY_LOCK_ID})
+
+
+def applied_versions(engine):
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version VARCHAR(16) PRIMARY KEY, "
+            "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+        ))
+        return {
+            row[0] for row in
+            conn.execute(text("SELECT version FROM schema_migrations"))
+        }
+
+
+def upgrade(engine):
+    """Apply every pending migration; returns the versions applied."""
+    done = []
+
+    with _migration_lock(engine):
+        applied = applied_versions(engine)
+        for version, module in discover():
+            if version in applied:
+                continue
+
+            log.info("applying migration %s", module.__name__)
+            module.upgrade(Migrator(engine))
+
+            with engine.begin() as conn:
+                conn.execute(
+                    text("INSERT INTO schema_migrations (version) VALUES (:v)"),
+                    {"v": version}
+                )
+            done.append(version)
+
+    return done
+
+
+# ---------------- INDEX CHECK ----------------
+def _normalize_key(key):
+    key = key.lower().replace('"', "").replace("::text", "")
+    key = re.sub(r"\b\w+_pattern_ops\b", "", key)
+    key = re.sub(r"\s+", "", key)
+    key = re.sub(r"\(\((\w+)\)\)", r"(\1)", key)
+    return key
+
+
+def _split_keys(definition):
+    # keys between the parentheses that follow "ON <table>"
+    start = definition.index("(", definition.lower().index(" on "))
+    depth, keys, current = 0, [], ""
+    for ch in definition[start + 1:]:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            if depth == 0:
+                break
+            depth -= 1
+        if ch == "," and depth == 0:
+            keys.append(current)
+            current = ""
+        else:
+            current += ch
+    keys.append(current)
+    return [_normalize_key(k) for k in keys]
+
+
+def index_keys(engine, table):
+    """Key lists of every index on ``table``, primary key included."""
+    inspector = inspect(engine)
+    with warnings.catch_warnings():
+        # expression indexes are read from their DDL below instead
+        warnings.simplefilter("ignore")
+        keys = [inspector.get_pk_constraint(table)["constrained_columns"]]
+        keys += [u["column_names"] for u in inspector.get_unique_constraints(table)]
+
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            rows = conn.execute(
+                text("SELECT indexdef FROM pg_indexes WHERE tablename = :t"),
+                {"t": table}
+            )
+        else:
+            rows = conn.execute(
+                text(
+                    "SELECT sql FROM sqlite_master "
+                    "WHERE type = 'index' AND tbl_name = :t AND sql IS NOT NULL"
+                ),
+                {"t": table}
+            )
+        keys += [_split_keys(row[0]) for row in rows]
+
+    return [[_normalize_key(k) for k in ks] for ks in keys]
+
+
+def check_hot_query_indexes(engine):
+    """Hot queries with no index whose leading keys cover them."""
+    cache = {}
+    missing = []
+
+    for name, table, wanted in HOT_QUERIES:
+        if table not in cache:
+            cache[table] = index_keys(engine, table)
+        wanted = [_normalize_key(k) for k in wanted]
+        if not any(ks[:len(wanted)] == wanted for ks in cache[table]):
+            missing.append((name, table, wanted))
+
+    return missing
+
+
+# ---------------- CLI ----------------
+def init_app(app, db):
+    @app.cli.command("db-upgrade")
+    def db_upgrade_command():
+        """Apply pending schema migrations."""
+        done = upgrade(db.engine)
+        print(f"applied: {', '.join(done)}" if done else "schema up to date")
+
+    @app.cli.command("db-check-indexes")
+    def db_check_indexes_command():
+        """Fail if a declared hot query has no supporting index."""
+        missing = check_hot_query_indexes(db.engine)
+        for name, table, keys in missing:
+            print(f"MISSING  {name}: {table}({', '.join(keys)})")
+        if missing:
+            sys.exit(1)
+        print(f"ok: {len(HOT_QUERIES)} hot queries covered")
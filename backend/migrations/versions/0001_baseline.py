@@ -0,0 +1,10 @@
+# 0001: every table as declared in models.py.
+#
+# Creates only missing tables, so it adopts databases that were built by
+# the old db.create_all() call without touching them.
+from models import db
+
+
+def upgrade(m):
+    with m.transaction() as conn:
+        db.metadata.create_all(bind=conn)
@@ -0,0 +1,34 @@
+# 0002: indexes for the hot queries in migrations/hot_queries.py.
+
+
+def upgrade(m):
+    # filter_by(approved=..., role=...) then keyset on id
+    m.create_index("ix_users_role_approved_id", "users", ["role", "approved", "id"])
+
+    # case-insensitive prefix search; text_pattern_ops lets LIKE 'x%' use it
+    for column in ("email", "name", "surname"):
+        m.create_index(
+            f"ix_users_{column}_lower", "users",
+            [f"lower({column})"],
+            pg_keys=[f"lower({column}) text_pattern_ops"]
+        )
+
+    # expiry scans only ever look at clients that have a subscription
+    m.create_index(
+        "ix_users_subscription_end", "users", ["subscription_end"],
+        where="subscription_end IS NOT NULL AND role = 'client'"
+    )
+
+    m.create_index("ix_signals_created_at_id", "signals", ["created_at", "id"])
+    m.create_index("ix_signal_lots_signal_id", "signal_lots", ["signal_id"])
+
+    # only undelivered rows are ever claimed
+    m.create_index(
+        "ix_outbox_recipients_claim", "email_outbox_recipients",
+        ["status", "next_attempt_at"],
+        where="status IN ('pending', 'sending')"
+    )
+    m.create_index(
+        "ix_outbox_recipients_message_id", "email_outbox_recipients",
+        ["message_id"]
+    )
@@ -0,0 +1,56 @@
+# 0003: exact numeric prices and risk/reward next to the text fields.
+#
+# Existing rows are parsed in Python with the same rules the API uses, in
+# id-ordered chunks; text that is not a number leaves the column NULL.
+from sqlalchemy import text
+
+from prices import price_columns
+
+CHUNK = 5000
+
+
+def upgrade(m):
+    m.add_column("signals", "entry_price", "NUMERIC(18, 8)")
+    m.add_column("signals", "tp_price", "NUMERIC(18, 8)")
+    m.add_column("signals", "sl_price", "NUMERIC(18, 8)")
+    m.add_column("signals", "risk_reward", "NUMERIC(12, 4)")
+
+    last_id = 0
+    while True:
+        with m.transaction() as conn:
+            rows = conn.execute(text(
+                "SELECT id, entry, tp, sl FROM signals "
+                "WHERE id > :last_id AND entry_price IS NULL "
+                "ORDER BY id LIMIT :chunk"
+            ), {"last_id": last_id, "chunk": CHUNK}).all()
+            if not rows:
+                break
+
+            updates = []
+            for row in rows:
+                values = price_columns(row.entry, row.tp, row.sl, strict=False)
+                if values["entry_price"] is not None:
+                    updates.append(dict(
+                        {k: _bindable(v, m.dialect) for k, v in values.items()},
+                        id=row.id
+                    ))
+            if updates:
+                conn.execute(text(
+                    "UPDATE signals SET entry_price = :entry_price, "
+                    "tp_price = :tp_price, sl_price = :sl_price, "
+                    "risk_reward = :risk_reward WHERE id = :id"
+                ), updates)
+            last_id = rows[-1].id
+
+    # /api/signals?pair=...: equality, then the feed's keyset order
+    m.create_index(
+        "ix_signals_pair_created_at_id", "signals", ["pair", "created_at", "id"]
+    )
+    m.create_index("ix_signals_entry_price", "signals", ["entry_price"])
+
+
+def _bindable(value, dialect):
+    # the sqlite3 driver cannot bind Decimal
+    if value is not None and dialect == "sqlite":
+        return str(value)
+    return value
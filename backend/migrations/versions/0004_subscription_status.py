@@ -0,0 +1,29 @@
+# 0004: stored subscription status, reminder bookkeeping and job leases.
+from datetime import datetime
+
+from sqlalchemy import text
+
+from models import JobLease
+
+
+def upgrade(m):
+    m.add_column("users", "subscription_status", "VARCHAR(20) NOT NULL DEFAULT 'none'")
+    m.add_column("users", "expiry_reminder_sent_at", "TIMESTAMP")
+
+    with m.transaction() as conn:
+        JobLease.__table__.create(conn, checkfirst=True)
+
+        # one set-based pass; the sweeper moves 'active' rows on from here
+        conn.execute(text(
+            "UPDATE users SET subscription_status = CASE "
+            "WHEN subscription_end IS NULL THEN 'none' "
+            "WHEN subscription_end <= :now THEN 'expired' "
+            "ELSE 'active' END "
+            "WHERE subscription_status = 'none'"
+        ), {"now": datetime.utcnow()})
+
+    # the sweeper only ever scans subscriptions that can still change state
+    m.create_index(
+        "ix_users_subscription_due", "users", ["subscription_end", "id"],
+        where="role = 'client' AND subscription_status IN ('active', 'expiring')"
+    )
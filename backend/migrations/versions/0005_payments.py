@@ -0,0 +1,11 @@
+# 0005: payments ledger for Ozow checkouts and callbacks.
+from models import Payment
+
+
+def upgrade(m):
+    with m.transaction() as conn:
+        # reference carries its own unique index with the table
+        Payment.__table__.create(conn, checkfirst=True)
+
+    m.create_index("ix_payments_status_id", "payments", ["status", "id"])
+    m.create_index("ix_payments_user_id", "payments", ["user_id"])
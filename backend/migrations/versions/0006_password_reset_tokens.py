@@ -0,0 +1,15 @@
+# 0006: hashed, single-use password reset tokens.
+from models import PasswordResetToken
+
+
+def upgrade(m):
+    with m.transaction() as conn:
+        # token_hash carries its own unique index with the table
+        PasswordResetToken.__table__.create(conn, checkfirst=True)
+
+    m.create_index(
+        "ix_password_reset_tokens_expires_at", "password_reset_tokens", ["expires_at"]
+    )
+    m.create_index(
+        "ix_password_reset_tokens_user_id", "password_reset_tokens", ["user_id"]
+    )
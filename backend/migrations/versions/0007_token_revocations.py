@@ -0,0 +1,7 @@
+# 0007: per-user "tokens issued before" cutoffs for JWT revocation.
+from models import TokenRevocation
+
+
+def upgrade(m):
+    with m.transaction() as conn:
+        TokenRevocation.__table__.create(conn, checkfirst=True)
@@ -0,0 +1,38 @@
+# 0008: per-user notification mode and digest bookkeeping on signals.
+#
+# Signals that already exist were announced one by one, so they are marked
+# digested in id-ordered chunks; only new signals wait for a digest.
+from datetime import datetime
+
+from sqlalchemy import text
+
+CHUNK = 5000
+
+
+def upgrade(m):
+    m.add_column("users", "notify_mode", "VARCHAR(10) NOT NULL DEFAULT 'instant'")
+    m.add_column("signals", "digested_at", "TIMESTAMP")
+
+    now = datetime.utcnow()
+    last_id = 0
+    while True:
+        with m.transaction() as conn:
+            ids = conn.execute(text(
+                "SELECT id FROM signals "
+                "WHERE id > :last_id AND digested_at IS NULL "
+                "ORDER BY id LIMIT :chunk"
+            ), {"last_id": last_id, "chunk": CHUNK}).scalars().all()
+            if not ids:
+                break
+
+            conn.execute(text(
+                "UPDATE signals SET digested_at = :now "
+                "WHERE id BETWEEN :first AND :last AND digested_at IS NULL"
+            ), {"now": now, "first": ids[0], "last": ids[-1]})
+            last_id = ids[-1]
+
+    # the digest job only ever looks at signals still waiting for one
+    m.create_index(
+        "ix_signals_undigested", "signals", ["created_at"],
+        where="digested_at IS NULL"
+    )
@@ -0,0 +1,12 @@
+# 0009: which users each "users" cache version changed, so workers can
+# drop just those cached identities.
+from models import IdentityVersion
+
+
+def upgrade(m):
+    with m.transaction() as conn:
+        IdentityVersion.__table__.create(conn, checkfirst=True)
+
+    m.create_index(
+        "ix_identity_versions_version", "identity_versions", ["version"]
+    )
@@ -1,7 +1,31 @@
 from datetime import datetime
+from flask import g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
 
-db = SQLAlchemy()
+
+class RoutingSession(Session):
+    """Sends reads to the ``replica`` bind when the request allows it.
+
+    ``dbrouting`` sets ``g._db_replica`` for read-only routes once the
+    replica has caught up; flushes and INSERT/UPDATE/DELETE statements
+    always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and not isinstance(clause, UpdateBase)
+            and has_request_context()
+            and g.get("_db_replica")
+        ):
+            return self._db.engines["replica"]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 
 class User(db.Model):
@@ -18,6 +42,11 @@ class User(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     subscription_start = db.Column(db.DateTime)
     subscription_end = db.Column(db.DateTime)
+    # none / active / expiring / expired; moved along by subscriptions.py
+    subscription_status = db.Column(db.String(20), default="none", nullable=False)
+    expiry_reminder_sent_at = db.Column(db.DateTime)
+    # instant: one email per signal / digest: batched by digests.py
+    notify_mode = db.Column(db.String(10), default="instant", nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class Signal(db.Model):
@@ -30,6 +59,14 @@ class Signal(db.Model):
     sl = db.Column(db.String(120), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # parsed from the text fields above on every write (prices.price_columns)
+    entry_price = db.Column(db.Numeric(18, 8))
+    tp_price = db.Column(db.Numeric(18, 8))
+    sl_price = db.Column(db.Numeric(18, 8))
+    risk_reward = db.Column(db.Numeric(12, 4))
+    # set once the signal has gone out in a digest (or never needs to)
+    digested_at = db.Column(db.DateTime)
+
     lots = db.relationship(
         "SignalLot",
         backref="signal",
@@ -51,3 +88,115 @@ class SignalLot(db.Model):
     win_amount = db.Column(db.Float, nullable=False)
     loss_amount = db.Column(db.Float, nullable=False)
 
+
+
+class SignalEvent(db.Model):
+    __tablename__ = "signal_events"
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)
+    signal_id = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class OutboxMessage(db.Model):
+    __tablename__ = "email_outbox"
+
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(200), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    recipients = db.relationship(
+        "OutboxRecipient",
+        backref="message",
+        cascade="all, delete-orphan"
+    )
+
+
+class OutboxRecipient(db.Model):
+    __tablename__ = "email_outbox_recipients"
+
+    id = db.Column(db.Integer, primary_key=True)
+    message_id = db.Column(
+        db.Integer,
+        db.ForeignKey("email_outbox.id"),
+        nullable=False
+    )
+    email = db.Column(db.String(200), nullable=False)
+    name = db.Column(db.String(120))
+
+    # pending -> sending -> sent | failed
+    status = db.Column(db.String(20), default="pending", nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    claimed_by = db.Column(db.String(64))
+    claimed_at = db.Column(db.DateTime)
+    sent_at = db.Column(db.DateTime)
+    last_error = db.Column(db.String(500))
+
+
+class CacheVersion(db.Model):
+    __tablename__ = "cache_versions"
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class JobLease(db.Model):
+    __tablename__ = "job_leases"
+
+    name = db.Column(db.String(50), primary_key=True)
+    next_run_at = db.Column(db.DateTime, nullable=False)
+    owner = db.Column(db.String(64))
+    lease_until = db.Column(db.DateTime)
+    last_run_at = db.Column(db.DateTime)
+    last_error = db.Column(db.String(500))
+
+
+class Payment(db.Model):
+    __tablename__ = "payments"
+
+    id = db.Column(db.Integer, primary_key=True)
+    # the TransactionReference sent to Ozow; callbacks look rows up by it
+    reference = db.Column(db.String(64), unique=True, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    plan = db.Column(db.String(20), nullable=False)
+    amount = db.Column(db.Numeric(12, 2), nullable=False)
+
+    # pending -> complete | failed | expired
+    status = db.Column(db.String(20), default="pending", nullable=False)
+    provider_status = db.Column(db.String(30))
+    subscription_end = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
+
+
+class PasswordResetToken(db.Model):
+    __tablename__ = "password_reset_tokens"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    # sha256 of the token in the emailed link; the token itself is never stored
+    token_hash = db.Column(db.String(64), unique=True, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class TokenRevocation(db.Model):
+    __tablename__ = "token_revocations"
+
+    # no foreign key: rejected users are deleted but their tokens still exist
+    user_id = db.Column(db.Integer, primary_key=True)
+    # access tokens issued before this moment are refused
+    revoked_before = db.Column(db.DateTime, nullable=False)
+
+
+class IdentityVersion(db.Model):
+    __tablename__ = "identity_versions"
+
+    # no foreign key: a deleted user's cached identity must be dropped too
+    user_id = db.Column(db.Integer, primary_key=True)
+    # the "users" cache version of the write that last changed this user
+    version = db.Column(db.Integer, nullable=False)
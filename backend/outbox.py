@@ -0,0 +1,217 @@
+# outbox.py
+import os
+import uuid
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from flask_mail import Message
+from sqlalchemy import insert, update, or_, and_
+
+from extensions import mail
+from models import db, OutboxMessage, OutboxRecipient
+from metrics import metrics
+
+log = logging.getLogger(__name__)
+
+
+# ---------------- ENQUEUE ----------------
+def enqueue_email(subject, body, recipients):
+    """Stage one message for ``recipients`` (``(email, name)`` pairs).
+
+    Nothing is committed here: the rows land in the caller's transaction,
+    so the email exists if and only if the change that triggered it does.
+    ``{name}`` in ``body`` is filled in per recipient at send time.
+    """
+    message = OutboxMessage(subject=subject, body=body)
+    db.session.add(message)
+    db.session.flush()
+
+    rows = [
+        {"message_id": message.id, "email": email, "name": name}
+        for email, name in recipients
+    ]
+    if rows:
+        db.session.execute(insert(OutboxRecipient), rows)
+
+    return message
+
+
+def render_body(body, name):
+    return body.replace("{name}", name or "there")
+
+
+# ---------------- WORKER POOL ----------------
+class OutboxWorkerPool:
+    """Background threads that drain ``email_outbox_recipients``.
+
+    Recipients are claimed in batches with a guarded UPDATE, so several
+    workers (and several gunicorn processes) never send the same row twice.
+    Each batch is sent over one SMTP connection; failures are retried with
+    exponential backoff until ``OUTBOX_MAX_ATTEMPTS``.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+
+    def init_app(self, app):
+        self.app = app
+        app.config.setdefault("OUTBOX_WORKERS", 2)
+        app.config.setdefault("OUTBOX_BATCH_SIZE", 50)
+        app.config.setdefault("OUTBOX_MAX_ATTEMPTS", 5)
+        app.config.setdefault("OUTBOX_BACKOFF_SECONDS", 30)
+        app.config.setdefault("OUTBOX_POLL_SECONDS", 10)
+        app.config.setdefault("OUTBOX_CLAIM_TIMEOUT", 300)
+        app.extensions["outbox"] = self
+        app.before_request(self.ensure_started)
+
+    def ensure_started(self):
+        # threads started before a fork do not survive it
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._threads = [
+                threading.Thread(
+                    target=self._run, name=f"outbox-{i}", daemon=True
+                )
+                for i in range(self.app.config["OUTBOX_WORKERS"])
+            ]
+            for t in self._threads:
+                t.start()
+
+    def wake(self):
+        self.ensure_started()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.app.config["OUTBOX_POLL_SECONDS"])
+            self._wake.clear()
+
+            try:
+                while self.drain_once() >= self.app.config["OUTBOX_BATCH_SIZE"]:
+                    pass
+            except Exception:
+                log.exception("outbox worker failed")
+
+    # ---------------- CLAIM / SEND ----------------
+    def drain_once(self):
+        """Claim and send one batch; returns how many recipients were claimed."""
+        with self.app.app_context():
+            try:
+                batch = self._claim()
+                if batch:
+                    self._deliver(batch)
+                return len(batch)
+            finally:
+                db.session.remove()
+
+    def _claim(self):
+        config = self.app.config
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        claimable = or_(
+            and_(
+                OutboxRecipient.status == "pending",
+                OutboxRecipient.next_attempt_at <= now
+            ),
+            # a worker died mid-batch
+            and_(
+                OutboxRecipient.status == "sending",
+                OutboxRecipient.claimed_at
+                < now - timedelta(seconds=config["OUTBOX_CLAIM_TIMEOUT"])
+            )
+        )
+
+        ids = [
+            row.id for row in
+            db.session.query(OutboxRecipient.id)
+            .filter(claimable)
+            .order_by(OutboxRecipient.id)
+            .limit(config["OUTBOX_BATCH_SIZE"])
+            .with_for_update(skip_locked=True)
+        ]
+        if not ids:
+            db.session.rollback()
+            return []
+
+        db.session.execute(
+            update(OutboxRecipient)
+            .where(OutboxRecipient.id.in_(ids), claimable)
+            .values(status="sending", claimed_by=token, claimed_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+        return (
+            OutboxRecipient.query
+            .filter_by(claimed_by=token, status="sending")
+            .order_by(OutboxRecipient.id)
+            .all()
+        )
+
+    def _deliver(self, batch):
+        config = self.app.config
+        sent, failed = [], []
+
+        try:
+            with metrics.smtp_timer("outbox"), mail.connect() as conn:
+                for r in batch:
+                    try:
+                        conn.send(Message(
+                            subject=r.message.subject,
+                            recipients=[r.email],
+                            body=render_body(r.message.body, r.name)
+                        ))
+                        sent.append(r.id)
+                    except Exception as e:
+                        failed.append((r, e))
+        except Exception as e:
+            # could not open (or cleanly close) the SMTP connection
+            done = set(sent)
+            failed += [(r, e) for r in batch if r.id not in done]
+
+        now = datetime.utcnow()
+
+        if sent:
+            db.session.execute(
+                update(OutboxRecipient)
+                .where(OutboxRecipient.id.in_(sent))
+                .values(status="sent", sent_at=now, claimed_by=None)
+                .execution_options(synchronize_session=False)
+            )
+
+        if failed:
+            db.session.execute(update(OutboxRecipient), [
+                self._failure(r, e, now, config) for r, e in failed
+            ])
+            log.warning("outbox: %d of %d sends failed", len(failed), len(batch))
+
+        db.session.commit()
+
+    def _failure(self, recipient, error, now, config):
+        attempts = recipient.attempts + 1
+        exhausted = attempts >= config["OUTBOX_MAX_ATTEMPTS"]
+        delay = min(
+            config["OUTBOX_BACKOFF_SECONDS"] * 2 ** (attempts - 1),
+            3600
+        )
+
+        return {
+            "id": recipient.id,
+            "status": "failed" if exhausted else "pending",
+            "attempts": attempts,
+            "next_attempt_at": now + timedelta(seconds=delay),
+            "claimed_by": None,
+            "last_error": str(error)[:500]
+        }
+
+
+outbox = OutboxWorkerPool()
@@ -0,0 +1,108 @@
+# pagination.py
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+from flask import request
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+class PaginationError(ValueError):
+    pass
+
+
+# ---------------- CURSORS ----------------
+def encode_cursor(values):
+    raw = json.dumps([
+        v.isoformat() if isinstance(v, datetime) else v
+        for v in values
+    ])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, columns):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise PaginationError("Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise PaginationError("Invalid cursor")
+
+    return [_cursor_value(col, v) for col, v in zip(columns, values)]
+
+
+def _cursor_value(column, value):
+    """``value`` as ``column``'s Python type; a forged cursor would otherwise
+    reach the database as a comparison the column cannot make (Postgres
+    answers those with a 500)."""
+    try:
+        expected = column.type.python_type
+    except NotImplementedError:
+        expected = None
+
+    if expected is datetime:
+        if isinstance(value, str):
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                pass
+        raise PaginationError("Invalid cursor")
+
+    # JSON has no separate bool: True would pass for an int
+    if value is None or isinstance(value, (bool, list, dict)):
+        raise PaginationError("Invalid cursor")
+    if expected is float and isinstance(value, int):
+        return value
+    if expected is not None and not isinstance(value, expected):
+        raise PaginationError("Invalid cursor")
+    return value
+
+
+# ---------------- REQUEST ARGS ----------------
+def page_args(default_limit=DEFAULT_LIMIT):
+    try:
+        limit = int(request.args.get("limit", default_limit))
+    except ValueError:
+        raise PaginationError("limit must be an integer")
+
+    if limit < 1:
+        raise PaginationError("limit must be positive")
+
+    return min(limit, MAX_LIMIT), request.args.get("cursor") or None
+
+
+# ---------------- KEYSET ----------------
+def keyset_page(query, columns, limit, cursor=None):
+    """Newest-first page of ``query`` ordered by ``columns``.
+
+    ``columns`` must end in a unique column (normally the primary key) so
+    the ordering is total. Returns ``(rows, next_cursor)``; ``next_cursor``
+    is ``None`` on the last page.
+    """
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        query = query.filter(tuple_(*columns) < tuple_(*values))
+
+    rows = (
+        query.order_by(*[c.desc() for c in columns])
+        .limit(limit + 1)
+        .all()
+    )
+
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, c.key) for c in columns])
+
+
+def paged_response(response, next_cursor):
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
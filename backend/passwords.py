@@ -0,0 +1,112 @@
+# passwords.py
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.security import (
+    DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+)
+
+
+class HashingBusy(Exception):
+    """Raised when too many hashes are already queued; callers answer 503."""
+
+
+class PasswordHasher:
+    """Runs password hashing in a small process pool.
+
+    Hashing is deliberately CPU-bound, so doing it on request threads lets
+    a burst of logins starve every other endpoint. At most
+    ``PASSWORD_HASH_MAX_PENDING`` hashes may be queued or running per
+    process; further callers wait up to ``PASSWORD_HASH_QUEUE_TIMEOUT``
+    seconds and are then shed with ``HashingBusy``.
+    """
+
+    def __init__(self):
+        self.method = "scrypt:32768:8:1"
+        self.workers = 1
+        self.queue_timeout = 2.0
+        self._slots = threading.BoundedSemaphore(4)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+        app.config.setdefault("PASSWORD_HASH_WORKERS", max((os.cpu_count() or 2) // 2, 1))
+        app.config.setdefault(
+            "PASSWORD_HASH_MAX_PENDING", max(app.config["PASSWORD_HASH_WORKERS"] * 4, 1)
+        )
+        app.config.setdefault("PASSWORD_HASH_QUEUE_TIMEOUT", 2.0)
+
+        self.method = app.config["PASSWORD_HASH_METHOD"]
+        self.workers = app.config["PASSWORD_HASH_WORKERS"]
+        self.queue_timeout = app.config["PASSWORD_HASH_QUEUE_TIMEOUT"]
+        self._slots = threading.BoundedSemaphore(app.config["PASSWORD_HASH_MAX_PENDING"])
+        app.extensions["password_hasher"] = self
+
+    def _pool(self):
+        # a pool inherited across a fork is unusable: build one per process
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    self._pid = os.getpid()
+        return self._executor
+
+    def shutdown(self):
+        """Stop this process's pool, e.g. in a master before it forks."""
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown()
+            self._executor = None
+            self._pid = None
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise HashingBusy()
+        try:
+            # 0 workers: hash inline (tests, one-off CLI commands)
+            if self.workers == 0:
+                return fn(*args)
+            return self._pool().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        stored = password_hash.split("$", 1)[0]
+        return method_prefix(stored) != method_prefix(self.method)
+
+
+def method_prefix(method):
+    """``"pbkdf2:sha256"`` -> ``"pbkdf2:sha256:1000000"``: the full prefix
+    werkzeug stores, so short and explicit specs compare equal."""
+    name, *args = method.split(":")
+    if name == "scrypt":
+        defaults = ["32768", "8", "1"]
+    elif name == "pbkdf2":
+        defaults = ["sha256", str(DEFAULT_PBKDF2_ITERATIONS)]
+    else:
+        return method
+    return ":".join([name] + args + defaults[len(args):])
+
+
+hasher = PasswordHasher()
+
+
+def hash_password(password):
+    return hasher.hash(password)
+
+
+def verify_password(password_hash, password):
+    return hasher.verify(password_hash, password)
+
+
+def needs_rehash(password_hash):
+    return hasher.needs_rehash(password_hash)
@@ -1,9 +1,18 @@
 import hashlib
-from datetime import datetime, timedelta
-from flask import Blueprint, request, jsonify
-from models import db, User
-from auth import login_required
+import hmac
+import logging
 import os
+import secrets
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import select, update, or_
+from models import db, User, Payment
+from identity import get_identity_or_404, invalidate_identity
+from subscriptions import activate_values
+
+log = logging.getLogger(__name__)
 
 payments = Blueprint("payments", __name__)
 
@@ -12,10 +21,31 @@ PLAN_PRICES = {
     "Standard": 3500,
     "Premium": 5000
 }
+PLAN_DAYS = 30
+
+# Ozow signs a notification over these fields, in this order
+NOTIFY_HASH_FIELDS = (
+    "SiteCode", "TransactionId", "TransactionReference", "Amount", "Status",
+    "Optional1", "Optional2", "Optional3", "Optional4", "Optional5",
+    "CurrencyCode", "IsTest", "StatusMessage"
+)
+
+
+def verify_notification(data):
+    """True if ``data`` carries Ozow's hash of its fields under our private key."""
+    private_key = os.getenv("OZOW_PRIVATE_KEY")
+    received = data.get("Hash") or data.get("HashCheck")
+    if not private_key or not received:
+        return False
+
+    values = "".join(data.get(field, "") for field in NOTIFY_HASH_FIELDS)
+    expected = hashlib.sha512((values + private_key).lower().encode()).hexdigest()
+    return hmac.compare_digest(expected, received.lower())
 
 @payments.route("/api/pay/ozow", methods=["POST"])
-@login_required
-def create_ozow_payment(current_user):
+@jwt_required()
+def create_ozow_payment():
+    current_user = get_identity_or_404(get_jwt_identity())
 
     data = request.json
     plan = data.get("plan")
@@ -25,7 +55,8 @@ def create_ozow_payment(current_user):
 
     amount = PLAN_PRICES[plan]
 
-    transaction_ref = f"NARI-{current_user.id}-{int(datetime.utcnow().timestamp())}"
+    # random, not a timestamp: two checkouts in the same second must not share a reference
+    transaction_ref = f"NARI-{current_user.id}-{secrets.token_hex(8)}"
 
     hash_string = (
         os.getenv("OZOW_SITE_CODE") +
@@ -37,6 +68,15 @@ def create_ozow_payment(current_user):
 
     hash_check = hashlib.sha512(hash_string.encode()).hexdigest().lower()
 
+    # the ledger row is what the callback resolves the plan from
+    db.session.add(Payment(
+        reference=transaction_ref,
+        user_id=current_user.id,
+        plan=plan,
+        amount=amount
+    ))
+    db.session.commit()
+
     return jsonify({
         "redirectUrl": os.getenv("OZOW_BASE_URL"),
         "SiteCode": os.getenv("OZOW_SITE_CODE"),
@@ -49,30 +89,146 @@ def create_ozow_payment(current_user):
 def ozow_callback():
     data = request.form
 
+    # anyone can POST here; only Ozow knows the private key
+    if not verify_notification(data):
+        log.warning("ozow callback with a bad hash for %s", data.get("TransactionReference"))
+        return "INVALID HASH", 403
+
     status = data.get("Status")
     transaction_ref = data.get("TransactionReference")
-    amount = float(data.get("Amount"))
+    try:
+        amount = Decimal(data.get("Amount"))
+    except (InvalidOperation, TypeError):
+        return "INVALID AMOUNT", 400
 
     if status != "Complete":
+        # only a checkout still pending can fail; late retries change nothing
+        db.session.execute(
+            update(Payment)
+            .where(Payment.reference == transaction_ref, Payment.status == "pending")
+            .values(provider_status=status, status="failed")
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
         return "FAILED", 400
 
-    user_id = int(transaction_ref.split("-")[1])
-    user = User.query.get(user_id)
+    now = datetime.utcnow()
+
+    # one conditional UPDATE claims the payment, so a provider retry (or a
+    # concurrent duplicate) finds it complete and applies nothing twice
+    claimed = db.session.execute(
+        update(Payment)
+        .where(
+            Payment.reference == transaction_ref,
+            Payment.status != "complete",
+            Payment.amount == amount
+        )
+        .values(status="complete", provider_status=status, completed_at=now)
+        .returning(Payment.id, Payment.user_id)
+        .execution_options(synchronize_session=False)
+    ).first()
+
+    if claimed is None:
+        payment = Payment.query.filter_by(reference=transaction_ref).first()
+        if not payment:
+            return "PAYMENT NOT FOUND", 404
+        if payment.status == "complete":
+            return "OK", 200
+        return "AMOUNT MISMATCH", 400
+
+    user = db.session.get(User, claimed.user_id)
+
+    # renewing early adds to the time left instead of replacing it
+    if user.subscription_end and user.subscription_end > now:
+        starts = user.subscription_end
+    else:
+        starts = user.subscription_start = now
+    subscription_end = starts + timedelta(days=PLAN_DAYS)
+
+    for column, value in activate_values(subscription_end).items():
+        setattr(user, column, value)
+    db.session.execute(
+        update(Payment)
+        .where(Payment.id == claimed.id)
+        .values(subscription_end=subscription_end)
+        .execution_options(synchronize_session=False)
+    )
+    invalidate_identity(user.id)
 
-    if not user:
-        return "USER NOT FOUND", 404
+    db.session.commit()
 
-    plan = (
-        "Basic" if amount == 2000 else
-        "Standard" if amount == 3500 else
-        "Premium"
-    )
+    return "OK", 200
 
-    user.subscription_plan = plan
-    user.subscription_active = True
-    user.subscription_start = datetime.utcnow()
-    user.subscription_end = datetime.utcnow() + timedelta(days=30)
 
+# ---------------- RECONCILIATION ----------------
+def reconcile_payments(now):
+    """Check the ledger against subscription state; scheduled job.
+
+    Pending checkouts older than ``PAYMENT_PENDING_HOURS`` are marked
+    expired. Completed payments whose paid period is still running are
+    streamed in keyset chunks of ``PAYMENT_RECONCILE_CHUNK``, and any the
+    user row no longer reflects are re-applied and logged.
+    """
+    config = current_app.config
+    chunk = config["PAYMENT_RECONCILE_CHUNK"]
+    cutoff = now - timedelta(hours=config["PAYMENT_PENDING_HOURS"])
+
+    expired = db.session.execute(
+        update(Payment)
+        .where(Payment.status == "pending", Payment.created_at < cutoff)
+        .values(status="expired")
+        .execution_options(synchronize_session=False)
+    ).rowcount
     db.session.commit()
 
-    return "OK", 200
+    checked = repaired = 0
+    after = 0
+
+    while True:
+        rows = db.session.execute(
+            select(
+                Payment.id, Payment.reference, Payment.user_id,
+                Payment.subscription_end,
+                User.subscription_end.label("user_subscription_end")
+            )
+            .join(User, User.id == Payment.user_id)
+            .where(
+                Payment.status == "complete",
+                Payment.id > after,
+                Payment.subscription_end > now
+            )
+            .order_by(Payment.id)
+            .limit(chunk)
+        ).all()
+        if not rows:
+            break
+
+        # latest paid-for end per user whose row falls short of it
+        missing = {}
+        for row in rows:
+            if (row.user_subscription_end is None
+                    or row.user_subscription_end < row.subscription_end):
+                log.warning(
+                    "payment %s not reflected on user %s", row.reference, row.user_id
+                )
+                missing[row.user_id] = max(
+                    missing.get(row.user_id, row.subscription_end), row.subscription_end
+                )
+
+        for user_id, subscription_end in missing.items():
+            User.query.filter(
+                User.id == user_id,
+                or_(User.subscription_end.is_(None),
+                    User.subscription_end < subscription_end)
+            ).update(activate_values(subscription_end), synchronize_session=False)
+        if missing:
+            invalidate_identity(*missing)
+        db.session.commit()
+
+        checked += len(rows)
+        repaired += len(missing)
+        after = rows[-1].id
+        if len(rows) < chunk:
+            break
+
+    return {"expired": expired, "checked": checked, "repaired": repaired}
@@ -0,0 +1,83 @@
+# prices.py
+from decimal import Decimal, InvalidOperation
+
+PRICE_FIELDS = ("entry", "tp", "sl")
+RISK_REWARD_PLACES = Decimal("0.0001")
+
+# what the columns hold: prices are Numeric(18, 8), risk/reward is
+# Numeric(12, 4); Postgres rejects a value with more integer digits
+PRICE_PLACES = 8
+PRICE_LIMIT = Decimal(10) ** (18 - PRICE_PLACES)
+RISK_REWARD_LIMIT = Decimal(10) ** (12 - 4)
+
+
+class PriceError(ValueError):
+    pass
+
+
+def parse_price(value):
+    """``"1,085.50"`` -> ``Decimal("1085.50")``; None if it is not a number."""
+    if value is None:
+        return None
+    try:
+        price = Decimal(str(value).strip().replace(",", "").replace(" ", ""))
+    except InvalidOperation:
+        return None
+    return price if price.is_finite() else None
+
+
+def check_price(field, price):
+    """Raise ``PriceError`` unless ``price`` fits its Numeric(18, 8) column."""
+    if abs(price) >= PRICE_LIMIT:
+        raise PriceError(f"{field} must be less than {PRICE_LIMIT:,}")
+    if price.normalize().as_tuple().exponent < -PRICE_PLACES:
+        raise PriceError(f"{field} must have at most {PRICE_PLACES} decimal places")
+
+
+def risk_reward(entry, tp, sl):
+    if None in (entry, tp, sl) or entry == sl:
+        return None
+    ratio = abs(tp - entry) / abs(entry - sl)
+    # checked before quantize, which raises InvalidOperation past 28 digits
+    if ratio >= RISK_REWARD_LIMIT:
+        raise PriceError("tp is too far from entry for a stop that close")
+    return ratio.quantize(RISK_REWARD_PLACES)
+
+
+def price_columns(entry, tp, sl, strict=True):
+    """The numeric columns for a signal's text prices, derived once at write
+    time. ``strict`` raises ``PriceError`` instead of storing NULLs."""
+    values = {}
+    for field, text in zip(PRICE_FIELDS, (entry, tp, sl)):
+        price = parse_price(text)
+        if price is not None:
+            try:
+                check_price(field, price)
+            except PriceError:
+                if strict:
+                    raise
+                price = None
+        values[field] = price
+    if strict and None in values.values():
+        raise PriceError("entry, tp and sl must be numbers")
+
+    try:
+        ratio = risk_reward(values["entry"], values["tp"], values["sl"])
+    except PriceError:
+        if strict:
+            raise
+        ratio = None
+
+    return {
+        "entry_price": values["entry"],
+        "tp_price": values["tp"],
+        "sl_price": values["sl"],
+        "risk_reward": ratio,
+    }
+
+
+def format_decimal(value):
+    # "1.08500000" -> "1.085"; keeps JSON free of float rounding
+    if value is None:
+        return None
+    return format(Decimal(value).normalize(), "f")
@@ -0,0 +1,84 @@
+# querybudget.py
+import logging
+
+from flask import current_app, g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(n):
+    """Declare the most SQL statements a route may issue, e.g.
+    ``@query_budget(4)`` directly under ``@app.get(...)``.
+
+    The count covers the whole request, auth checks included, and must not
+    depend on how many rows the tables hold.
+    """
+    def decorator(fn):
+        # functools.wraps copies __dict__, so the attribute survives the
+        # auth decorators stacked underneath
+        fn._query_budget = n
+        return fn
+    return decorator
+
+
+class QueryBudget:
+    """Counts the statements each budgeted request issues.
+
+    Over budget is an error when ``QUERY_BUDGET_ENFORCE`` is on and a
+    warning in the log otherwise. Left as ``None`` it follows
+    ``app.testing`` at request time, since test suites usually switch
+    testing on after the app is built.
+    """
+
+    def __init__(self):
+        self._listening = False
+
+    def init_app(self, app):
+        app.config.setdefault("QUERY_BUDGET_ENFORCE", None)
+        app.before_request(self._start)
+        app.after_request(self._check)
+        app.extensions["query_budget"] = self
+
+        if not self._listening:
+            event.listen(Engine, "before_cursor_execute", self._count)
+            self._listening = True
+
+    def _start(self):
+        view = current_app.view_functions.get(request.endpoint)
+        budget = getattr(view, "_query_budget", None)
+        if budget is not None:
+            # budget, statements so far
+            g._query_budget = [budget, 0]
+
+    def _count(self, *args):
+        if has_request_context():
+            state = g.get("_query_budget")
+            if state is not None:
+                state[1] += 1
+
+    def _check(self, response):
+        state = g.pop("_query_budget", None)
+        if state is None or state[1] <= state[0]:
+            return response
+
+        message = (
+            f"{request.method} {request.path} issued {state[1]} SQL "
+            f"statements, budget is {state[0]}"
+        )
+        enforce = current_app.config["QUERY_BUDGET_ENFORCE"]
+        if enforce is None:
+            enforce = current_app.testing
+        if enforce:
+            raise QueryBudgetExceeded(message)
+
+        log.warning(message)
+        return response
+
+
+budget_guard = QueryBudget()
@@ -0,0 +1,172 @@
+# ratelimit.py
+import time
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, request, jsonify
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_limit(limit):
+    """``"5/minute"`` -> ``(capacity, tokens_per_second)``."""
+    count, period = limit.split("/")
+    count = int(count)
+    return count, count / PERIODS[period.strip()]
+
+
+# ---------------- BACKENDS ----------------
+class MemoryBackend:
+    """Token buckets for this process only.
+
+    Each key is a ``(tokens, updated_at, full_at)`` tuple, kept in least
+    recently hit order. A bucket that has refilled by ``full_at`` holds no
+    information, so every hit first drops such buckets from the stale end,
+    stopping at the first one still refilling: state expires on its own at
+    amortised O(1) per hit. ``max_keys`` is a hard cap on top of that, for
+    new keys arriving faster than old ones refill.
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, capacity, rate):
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+
+            tokens, updated, _ = self._buckets.pop(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+        return allowed, 0 if allowed else (1 - tokens) / rate
+
+    def _expire(self, now):
+        while self._buckets:
+            key, (_, _, full_at) = next(iter(self._buckets.items()))
+            if full_at > now:
+                return
+            del self._buckets[key]
+
+
+class RedisBackend:
+    """Token buckets shared by every gunicorn worker through Redis."""
+
+    SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 't', 'u')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - updated) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 't', tokens, 'u', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(tokens)}
+"""
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError(
+                "RATELIMIT_STORAGE_URL points at Redis but the 'redis' "
+                "package is not installed"
+            )
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    def hit(self, key, capacity, rate):
+        allowed, tokens = self._script(
+            keys=[f"ratelimit:{key}"],
+            args=[capacity, rate, time.time()]
+        )
+        return bool(allowed), 0 if allowed else (1 - float(tokens)) / rate
+
+
+# ---------------- LIMITER ----------------
+class RateLimiter:
+    def __init__(self):
+        self.backend = None
+
+    def init_app(self, app):
+        app.config.setdefault("RATELIMIT_ENABLED", True)
+        app.config.setdefault("RATELIMIT_STORAGE_URL", None)
+        app.config.setdefault("RATELIMIT_MEMORY_MAX_KEYS", 100000)
+
+        url = app.config["RATELIMIT_STORAGE_URL"]
+        if url and url.startswith("redis"):
+            self.backend = RedisBackend(url)
+        else:
+            self.backend = MemoryBackend(app.config["RATELIMIT_MEMORY_MAX_KEYS"])
+
+        app.extensions["rate_limiter"] = self
+
+    def hit(self, key, limit):
+        capacity, rate = parse_limit(limit)
+        return self.backend.hit(key, capacity, rate)
+
+
+limiter = RateLimiter()
+
+
+def _client_ip():
+    # behind PROXY_HOPS proxies, ProxyFix has already set this to the hop
+    # our own proxy appended; the client-written part is ignored
+    return request.remote_addr or "unknown"
+
+
+def _request_email():
+    data = request.get_json(silent=True) or {}
+    email = data.get("email")
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+KEY_FUNCS = {
+    "ip": _client_ip,
+    "email": _request_email,
+}
+
+
+def rate_limit(limit, key="ip"):
+    """Throttle a route, e.g. ``@rate_limit("5/minute", key="email")``.
+
+    Stack several to limit by more than one key.
+    """
+    key_func = KEY_FUNCS[key]
+    parse_limit(limit)
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if current_app.config["RATELIMIT_ENABLED"]:
+                value = key_func()
+                if value is not None:
+                    allowed, retry_after = limiter.hit(
+                        f"{request.endpoint}:{key}:{value}", limit
+                    )
+                    if not allowed:
+                        response = jsonify({
+                            "message": "Too many requests, please try again later"
+                        })
+                        response.headers["Retry-After"] = str(int(retry_after) + 1)
+                        return response, 429
+
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
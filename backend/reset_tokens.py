@@ -0,0 +1,83 @@
+# reset_tokens.py
+import hashlib
+import secrets
+from datetime import timedelta
+
+from sqlalchemy import delete, select
+
+from models import db, PasswordResetToken
+
+SWEEP_CHUNK = 1000
+
+
+def _digest(token):
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def issue_reset_token(user_id, now, ttl_minutes):
+    """Stage a new token for ``user_id`` and return it for the emailed link.
+
+    Only its SHA-256 digest is stored, so reading the table is not enough
+    to reset anyone's password. Nothing is committed here.
+    """
+    token = secrets.token_urlsafe(32)
+    db.session.add(PasswordResetToken(
+        user_id=user_id,
+        token_hash=_digest(token),
+        expires_at=now + timedelta(minutes=ttl_minutes)
+    ))
+    return token
+
+
+def consume_reset_token(token, now):
+    """Delete ``token`` if it is live and return its user id, else None.
+
+    One DELETE ... RETURNING on the unique digest, so a token works once
+    even when the same link is submitted twice at the same moment.
+    """
+    if not isinstance(token, str) or not token:
+        return None
+    return db.session.execute(
+        delete(PasswordResetToken)
+        .where(
+            PasswordResetToken.token_hash == _digest(token),
+            PasswordResetToken.expires_at > now
+        )
+        .returning(PasswordResetToken.user_id)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+
+
+def revoke_reset_tokens(user_id):
+    # any other links still in the user's inbox stop working
+    db.session.execute(
+        delete(PasswordResetToken)
+        .where(PasswordResetToken.user_id == user_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+# ---------------- SWEEPER ----------------
+def sweep_reset_tokens(now):
+    """Delete expired tokens, ``SWEEP_CHUNK`` at a time; scheduled job."""
+    removed = 0
+    while True:
+        ids = db.session.execute(
+            select(PasswordResetToken.id)
+            .where(PasswordResetToken.expires_at <= now)
+            .order_by(PasswordResetToken.expires_at)
+            .limit(SWEEP_CHUNK)
+        ).scalars().all()
+        if not ids:
+            return removed
+
+        db.session.execute(
+            delete(PasswordResetToken)
+            .where(PasswordResetToken.id.in_(ids))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+        removed += len(ids)
+        if len(ids) < SWEEP_CHUNK:
+            return removed
@@ -0,0 +1,122 @@
+# revocation.py
+import calendar
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, insert
+
+from models import db, TokenRevocation
+from cache import bump_version, current_version
+
+
+def _epoch(value):
+    return calendar.timegm(value.timetuple())
+
+
+def _token_lifetime():
+    # False means access tokens never expire: every cutoff stays relevant
+    expires = current_app.config.get("JWT_ACCESS_TOKEN_EXPIRES", timedelta(minutes=15))
+    return expires or None
+
+
+class TokenRevocations:
+    """Per-process map of ``user_id -> tokens issued before`` cutoffs.
+
+    Checked by flask_jwt_extended's blocklist callback on every token, so
+    a lookup is a dict access. The map is reloaded from
+    ``token_revocations`` only when the shared ``revocations`` version
+    has moved, and that version is read at most once every
+    ``REVOCATION_SYNC_SECONDS``: a revoke reaches every worker within that
+    window, and the worker that made it on its next request.
+    """
+
+    def __init__(self):
+        self.sync_seconds = 2.0
+        self._revoked = {}
+        self._version = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault("REVOCATION_SYNC_SECONDS", 2.0)
+        self.sync_seconds = app.config["REVOCATION_SYNC_SECONDS"]
+        app.extensions["token_revocations"] = self
+
+    def is_revoked(self, payload):
+        self._sync()
+        before = self._revoked.get(int(payload[current_app.config["JWT_IDENTITY_CLAIM"]]))
+        return before is not None and payload.get("iat", 0) < before
+
+    def _sync(self):
+        now = time.monotonic()
+        checked_at = self._checked_at
+        if checked_at is not None and now - checked_at < self.sync_seconds:
+            return
+        # one request per process does the check; the rest use the old map
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            version = current_version("revocations")
+            if version != self._version:
+                # 0: the counter was never bumped, so nothing is revoked
+                self._revoked = self._load() if version else {}
+                self._version = version
+            self._checked_at = now
+        finally:
+            self._lock.release()
+
+    def _load(self):
+        query = db.session.query(
+            TokenRevocation.user_id, TokenRevocation.revoked_before
+        )
+        lifetime = _token_lifetime()
+        if lifetime:
+            query = query.filter(
+                TokenRevocation.revoked_before > datetime.utcnow() - lifetime
+            )
+        return {user_id: _epoch(before) for user_id, before in query}
+
+    def expire_check(self):
+        # the next token check re-reads the version
+        self._checked_at = None
+
+
+token_revocations = TokenRevocations()
+
+
+def revoke_tokens(*user_ids):
+    """Refuse every access token these users hold, as part of the caller's
+    transaction. Tokens issued from the next second on are unaffected."""
+    if not user_ids:
+        return
+    # iat is whole seconds: round up so a token from this very second is
+    # refused too, at the cost of one from just after the commit
+    cutoff = datetime.utcnow().replace(microsecond=0) + timedelta(seconds=1)
+    user_ids = list(dict.fromkeys(int(i) for i in user_ids))
+
+    db.session.execute(
+        delete(TokenRevocation)
+        .where(TokenRevocation.user_id.in_(user_ids))
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(insert(TokenRevocation), [
+        {"user_id": user_id, "revoked_before": cutoff} for user_id in user_ids
+    ])
+    bump_version("revocations")
+    token_revocations.expire_check()
+
+
+def prune_revocations(now):
+    """Drop cutoffs older than any unexpired token; scheduled job."""
+    lifetime = _token_lifetime()
+    if not lifetime:
+        return 0
+    removed = db.session.execute(
+        delete(TokenRevocation)
+        .where(TokenRevocation.revoked_before <= now - lifetime)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return removed
@@ -0,0 +1,170 @@
+# scheduler.py
+import os
+import uuid
+import logging
+import threading
+from datetime import datetime, timedelta
+
+import click
+from sqlalchemy import update, or_
+from sqlalchemy.exc import IntegrityError
+
+from models import db, JobLease
+
+log = logging.getLogger(__name__)
+
+
+class Scheduler:
+    """Periodic jobs that run once per interval across every worker.
+
+    Each process runs a ticker thread, but a job only runs where a
+    conditional UPDATE on its ``job_leases`` row succeeds: the row must be
+    due and not leased. The lease lapses after ``SCHEDULER_LEASE_SECONDS``
+    if that worker dies. ``clock`` is injectable, and ``run_pending(now)``
+    runs due jobs once, so jobs can be driven with a frozen clock.
+    """
+
+    def __init__(self, clock=datetime.utcnow):
+        self.app = None
+        self.clock = clock
+        self.jobs = {}
+        self._owner = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        app.config.setdefault("SCHEDULER_ENABLED", True)
+        app.config.setdefault("SCHEDULER_TICK_SECONDS", 30)
+        app.config.setdefault("SCHEDULER_LEASE_SECONDS", 300)
+        app.extensions["scheduler"] = self
+
+        if app.config["SCHEDULER_ENABLED"]:
+            app.before_request(self.ensure_started)
+
+        @app.cli.command("run-job")
+        @click.argument("name", required=False)
+        def run_job_command(name):
+            """Run one job (or all of them) now, ignoring schedules and leases."""
+            for job in [name] if name else list(self.jobs):
+                self.run_job(job)
+                print(f"ran {job}")
+
+    def job(self, name, every):
+        """Register ``fn(now)`` to run every ``every`` seconds."""
+        def decorator(fn):
+            self.jobs[name] = (fn, every)
+            return fn
+        return decorator
+
+    def ensure_started(self):
+        # a thread started before a fork does not survive it
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name="scheduler", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        stop = threading.Event()
+        while not stop.wait(self.app.config["SCHEDULER_TICK_SECONDS"]):
+            try:
+                self.run_pending()
+            except Exception:
+                log.exception("scheduler tick failed")
+
+    # ---------------- LEASES ----------------
+    @property
+    def owner(self):
+        # unique per process, so a forked worker never reuses its parent's
+        if self._owner is None or self._owner[0] != os.getpid():
+            self._owner = (os.getpid(), f"{os.getpid()}-{uuid.uuid4().hex[:12]}")
+        return self._owner[1]
+
+    def run_pending(self, now=None):
+        """Run every due job this process can lease; returns their names."""
+        now = now or self.clock()
+        ran = []
+        with self.app.app_context():
+            try:
+                self._ensure_rows(now)
+                for name in self.jobs:
+                    if self._acquire(name, now):
+                        self._execute(name, now)
+                        ran.append(name)
+            finally:
+                db.session.remove()
+        return ran
+
+    def run_job(self, name, now=None):
+        with self.app.app_context():
+            try:
+                self.jobs[name][0](now or self.clock())
+            finally:
+                db.session.remove()
+
+    def _ensure_rows(self, now):
+        existing = {
+            row.name for row in
+            db.session.query(JobLease.name).filter(JobLease.name.in_(self.jobs))
+        }
+        missing = [name for name in self.jobs if name not in existing]
+        if not missing:
+            return
+        for name in missing:
+            db.session.add(JobLease(name=name, next_run_at=now))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # another worker registered them first
+            db.session.rollback()
+
+    def _acquire(self, name, now):
+        lease_seconds = self.app.config["SCHEDULER_LEASE_SECONDS"]
+        result = db.session.execute(
+            update(JobLease)
+            .where(
+                JobLease.name == name,
+                JobLease.next_run_at <= now,
+                or_(JobLease.lease_until.is_(None), JobLease.lease_until < now)
+            )
+            .values(
+                owner=self.owner,
+                lease_until=now + timedelta(seconds=lease_seconds)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return result.rowcount == 1
+
+    def _execute(self, name, now):
+        fn, every = self.jobs[name]
+        error = None
+        try:
+            fn(now)
+        except Exception as e:
+            db.session.rollback()
+            log.exception("job %s failed", name)
+            error = str(e)[:500]
+
+        db.session.execute(
+            update(JobLease)
+            .where(JobLease.name == name, JobLease.owner == self.owner)
+            .values(
+                lease_until=None,
+                last_run_at=now,
+                next_run_at=now + timedelta(seconds=every),
+                last_error=error
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+
+scheduler = Scheduler()
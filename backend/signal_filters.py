@@ -0,0 +1,55 @@
+# signal_filters.py
+from datetime import datetime
+
+from models import Signal
+from prices import parse_price
+
+
+class SignalFilterError(ValueError):
+    pass
+
+
+def _date_arg(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+    except ValueError:
+        raise SignalFilterError(f"{name} must be an ISO 8601 date or timestamp")
+
+
+def _price_arg(params, name):
+    value = params.get(name)
+    if value in (None, ""):
+        return None
+    price = parse_price(value)
+    if price is None:
+        raise SignalFilterError(f"{name} must be a number")
+    return price
+
+
+def signal_filters(params):
+    """SQL criteria for ``pair``, ``from``/``to`` (creation window) and
+    ``price_min``/``price_max`` (entry price) in ``params``.
+
+    Each one is served by an index (see migrations/hot_queries.py).
+    """
+    criteria = []
+
+    if params.get("pair"):
+        criteria.append(Signal.pair == params["pair"].strip())
+
+    start, end = _date_arg(params, "from"), _date_arg(params, "to")
+    if start:
+        criteria.append(Signal.created_at >= start)
+    if end:
+        criteria.append(Signal.created_at < end)
+
+    low, high = _price_arg(params, "price_min"), _price_arg(params, "price_max")
+    if low is not None:
+        criteria.append(Signal.entry_price >= low)
+    if high is not None:
+        criteria.append(Signal.entry_price <= high)
+
+    return criteria
@@ -0,0 +1,177 @@
+# signal_import.py
+import json
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from models import db, Signal, SignalLot, SignalEvent
+from signal_lots import LOT_FIELDS, LotError, validate_lots
+from prices import PriceError, price_columns, format_decimal
+
+SIGNAL_FIELDS = ("pair", "entry", "tp", "sl")
+MAX_REPORTED_ERRORS = 50
+
+
+class ImportValidationError(ValueError):
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid signal(s)")
+        self.errors = errors
+
+
+# ---------------- PARSING ----------------
+def parse_import(body, content_type):
+    """Signal dicts from a JSON array, ``{"signals": [...]}`` or NDJSON."""
+    try:
+        text = body.decode("utf-8")
+    except UnicodeDecodeError as e:
+        raise ImportValidationError([
+            {"message": f"Body is not valid UTF-8 (byte {e.start})"}
+        ])
+
+    if "ndjson" in (content_type or ""):
+        items = []
+        for line_no, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                raise ImportValidationError([
+                    {"line": line_no, "message": "Invalid JSON"}
+                ])
+        return items
+
+    try:
+        data = json.loads(text)
+    except ValueError:
+        raise ImportValidationError([{"message": "Invalid JSON"}])
+
+    if isinstance(data, dict):
+        data = data.get("signals")
+    if not isinstance(data, list):
+        raise ImportValidationError([
+            {"message": "Expected a list of signals or {\"signals\": [...]}"}
+        ])
+    return data
+
+
+def validate_import(items, max_signals):
+    """Check every item before anything is written; raise with all errors."""
+    if not items:
+        raise ImportValidationError([{"message": "No signals to import"}])
+    if len(items) > max_signals:
+        raise ImportValidationError([
+            {"message": f"At most {max_signals} signals per import"}
+        ])
+
+    rows, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            rows.append(_validate_signal(item))
+        except (ValueError, TypeError) as e:
+            errors.append({"index": index, "message": str(e)})
+            if len(errors) >= MAX_REPORTED_ERRORS:
+                break
+
+    if errors:
+        raise ImportValidationError(errors)
+    return rows
+
+
+def _validate_signal(item):
+    if not isinstance(item, dict):
+        raise ValueError("Signal must be an object")
+    if not all(item.get(k) for k in SIGNAL_FIELDS):
+        raise ValueError("Missing fields")
+
+    # stored as text; normalising here also lets RETURNING rows match back
+    row = {k: str(item[k]) for k in SIGNAL_FIELDS}
+    try:
+        row["prices"] = price_columns(row["entry"], row["tp"], row["sl"])
+    except PriceError as e:
+        raise ValueError(str(e))
+
+    # back-filled signals keep their original time
+    if item.get("created_at"):
+        try:
+            row["created_at"] = datetime.fromisoformat(
+                str(item["created_at"]).replace("Z", "+00:00")
+            ).replace(tzinfo=None)
+        except ValueError:
+            raise ValueError("created_at must be an ISO 8601 timestamp")
+    else:
+        row["created_at"] = datetime.utcnow()
+
+    try:
+        row["lots"] = validate_lots(item.get("lots") or [], min_lots=0)
+    except LotError as e:
+        raise ValueError(str(e))
+    return row
+
+
+# ---------------- INSERT ----------------
+def _insert_returning_ids(model, rows, fields):
+    """Batched INSERT ... RETURNING; ids come back in ``rows`` order.
+
+    Asking the database to keep parameter order makes SQLAlchemy fall back
+    to one statement per row on some backends, so rows are matched back by
+    their values instead. Rows with equal values are interchangeable.
+    """
+    columns = [getattr(model, f) for f in fields]
+    returned = db.session.execute(
+        insert(model).returning(model.id, *columns), rows
+    ).all()
+
+    ids_by_key = {}
+    for r in sorted(returned, reverse=True):
+        ids_by_key.setdefault(tuple(r[1:]), []).append(r[0])
+    return [ids_by_key[tuple(row[f] for f in fields)].pop() for row in rows]
+
+
+def import_signals(rows, digested_at=None):
+    """Insert validated ``rows`` with one batched statement per table.
+
+    Signals, lots and their ``created`` events all go in the caller's
+    transaction; nothing is committed here. ``digested_at`` keeps the
+    signals out of the next digest. Returns the new signal ids.
+    """
+    signal_fields = SIGNAL_FIELDS + ("created_at",)
+    signal_ids = _insert_returning_ids(
+        Signal,
+        [
+            dict({k: row[k] for k in signal_fields}, digested_at=digested_at, **row["prices"])
+            for row in rows
+        ],
+        signal_fields
+    )
+
+    lot_fields = ("signal_id",) + LOT_FIELDS
+    lot_rows = [
+        dict({k: lot[k] for k in LOT_FIELDS}, signal_id=signal_id)
+        for signal_id, row in zip(signal_ids, rows)
+        for lot in row["lots"]
+    ]
+    lot_ids = _insert_returning_ids(SignalLot, lot_rows, lot_fields) if lot_rows else []
+
+    lots_by_signal = {}
+    for lot_id, lot in zip(lot_ids, lot_rows):
+        lots_by_signal.setdefault(lot["signal_id"], []).append(
+            dict({k: lot[k] for k in LOT_FIELDS}, id=lot_id)
+        )
+
+    # same payload serialize_signal() gives the live feed
+    db.session.execute(insert(SignalEvent), [
+        {
+            "kind": "created",
+            "signal_id": signal_id,
+            "payload": json.dumps(dict(
+                {k: row[k] for k in SIGNAL_FIELDS},
+                id=signal_id,
+                risk_reward=format_decimal(row["prices"]["risk_reward"]),
+                lots=lots_by_signal.get(signal_id, [])
+            ))
+        }
+        for signal_id, row in zip(signal_ids, rows)
+    ])
+
+    return signal_ids
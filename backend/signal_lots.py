@@ -0,0 +1,85 @@
+# signal_lots.py
+from sqlalchemy import insert, update, delete
+
+from models import db, SignalLot
+
+LOT_FIELDS = ("lot_size", "win_amount", "loss_amount")
+MAX_LOTS = 3
+
+
+class LotError(ValueError):
+    pass
+
+
+def validate_lots(lots, min_lots=1):
+    """Normalise an incoming ``lots`` payload, or raise ``LotError``."""
+    if not isinstance(lots, list):
+        raise LotError("Lots must be a list")
+
+    if len(lots) < min_lots or len(lots) > MAX_LOTS:
+        raise LotError(f"You must provide {min_lots}–{MAX_LOTS} lot options")
+
+    cleaned = []
+    for lot in lots:
+        if not isinstance(lot, dict) or not all(k in lot for k in LOT_FIELDS):
+            raise LotError("Invalid lot structure")
+        try:
+            row = {k: float(lot[k]) for k in LOT_FIELDS}
+        except (TypeError, ValueError):
+            raise LotError("Invalid lot structure")
+        row["id"] = lot.get("id")
+        cleaned.append(row)
+
+    return cleaned
+
+
+def reconcile_lots(signal, lots):
+    """Make ``signal``'s lots match the validated ``lots`` with minimal writes.
+
+    Incoming lots are matched to existing rows by ``id``, then by position
+    among the rows left over. Changed rows get one bulk UPDATE, new ones
+    one INSERT and leftovers one DELETE; identical lots write nothing.
+    Returns ``(changed, deleted_ids)``.
+    """
+    existing = sorted(signal.lots, key=lambda lot: lot.id)
+    by_id = {lot.id: lot for lot in existing}
+
+    matched = {}
+    unmatched = []
+    for i, lot in enumerate(lots):
+        row = by_id.pop(lot["id"], None) if lot["id"] is not None else None
+        if row is not None:
+            matched[i] = row
+        else:
+            unmatched.append(i)
+
+    leftovers = [lot for lot in existing if lot.id in by_id]
+    for i in unmatched:
+        if leftovers:
+            matched[i] = leftovers.pop(0)
+
+    updates, inserts = [], []
+    for i, lot in enumerate(lots):
+        values = {k: lot[k] for k in LOT_FIELDS}
+        row = matched.get(i)
+        if row is None:
+            inserts.append(dict(values, signal_id=signal.id))
+        elif any(getattr(row, k) != v for k, v in values.items()):
+            updates.append(dict(values, id=row.id))
+            # bulk UPDATE bypasses the identity map
+            db.session.expire(row)
+
+    deleted_ids = [lot.id for lot in leftovers]
+
+    if updates:
+        db.session.execute(update(SignalLot), updates)
+    if inserts:
+        db.session.execute(insert(SignalLot), inserts)
+    if deleted_ids:
+        db.session.execute(
+            delete(SignalLot)
+            .where(SignalLot.id.in_(deleted_ids))
+            .execution_options(synchronize_session=False)
+        )
+
+    return bool(updates or inserts or deleted_ids), deleted_ids
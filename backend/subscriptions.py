@@ -0,0 +1,120 @@
+# subscriptions.py
+from datetime import timedelta
+
+from flask import current_app
+from sqlalchemy import update, tuple_
+
+from models import db, User
+from outbox import enqueue_email
+
+ACTIVE, EXPIRING, EXPIRED, NONE = "active", "expiring", "expired", "none"
+
+REMINDER_BODY = (
+    "Hello {{name}},\n\n"
+    "Your NARI Markets subscription expires within {days} days.\n"
+    "Renew now to keep receiving signals without interruption.\n\n"
+    "Regards,\n"
+    "NARI Team"
+)
+EXPIRED_BODY = (
+    "Hello {name},\n\n"
+    "Your NARI Markets subscription has expired.\n"
+    "Renew at any time to start receiving signals again.\n\n"
+    "Regards,\n"
+    "NARI Team"
+)
+
+
+def activate_values(subscription_end):
+    """Column values for a new or renewed subscription."""
+    return {
+        "subscription_end": subscription_end,
+        "subscription_status": ACTIVE,
+        "expiry_reminder_sent_at": None,
+    }
+
+
+# ---------------- SWEEPER ----------------
+def sweep_subscriptions(now):
+    """Move clients along active -> expiring -> expired and queue emails.
+
+    Both passes are keyset range scans over ``subscription_end`` restricted
+    to ``active``/``expiring`` rows (see ``ix_users_subscription_due``), so a
+    run touches only subscriptions that are about to change. Each chunk is
+    one set-based UPDATE plus one outbox message, committed on its own.
+    """
+    config = current_app.config
+    days = config["SUBSCRIPTION_REMINDER_DAYS"]
+    chunk = config["SUBSCRIPTION_SWEEP_CHUNK"]
+
+    reminded = _sweep(
+        (User.subscription_end > now,
+         User.subscription_end <= now + timedelta(days=days)),
+        from_status=ACTIVE,
+        to_status=EXPIRING,
+        extra={"expiry_reminder_sent_at": now},
+        subject="⏳ Your subscription is about to expire",
+        body=REMINDER_BODY.format(days=days),
+        chunk=chunk
+    )
+    expired = _sweep(
+        (User.subscription_end <= now,),
+        from_status=(ACTIVE, EXPIRING),
+        to_status=EXPIRED,
+        extra={},
+        subject="Your subscription has expired",
+        body=EXPIRED_BODY,
+        chunk=chunk
+    )
+    return {"reminded": reminded, "expired": expired}
+
+
+def _sweep(window, from_status, to_status, extra, subject, body, chunk):
+    statuses = from_status if isinstance(from_status, tuple) else (from_status,)
+    done = 0
+    after = None
+
+    while True:
+        query = (
+            db.session.query(User.id, User.subscription_end)
+            .filter(
+                User.role == "client",
+                User.subscription_status.in_(statuses),
+                *window
+            )
+        )
+        if after is not None:
+            query = query.filter(
+                tuple_(User.subscription_end, User.id) > after
+            )
+        rows = query.order_by(User.subscription_end, User.id).limit(chunk).all()
+        if not rows:
+            return done
+
+        # the guards are re-checked by the UPDATE itself, so a renewal that
+        # lands after the SELECT wins over the sweep; only the rows it
+        # actually moved get an email
+        changed = db.session.execute(
+            update(User)
+            .where(
+                User.id.in_([row.id for row in rows]),
+                User.subscription_status.in_(statuses),
+                *window
+            )
+            .values(subscription_status=to_status, **extra)
+            .returning(User.email, User.name)
+            .execution_options(synchronize_session=False)
+        ).all()
+
+        if changed:
+            enqueue_email(
+                subject=subject,
+                body=body,
+                recipients=[(email, name) for email, name in changed]
+            )
+        db.session.commit()
+
+        done += len(changed)
+        after = (rows[-1].subscription_end, rows[-1].id)
+        if len(rows) < chunk:
+            return done
@@ -0,0 +1,110 @@
+# tests/conftest.py
+#
+# Each test gets a fresh SQLite database with migrations applied and the
+# admin bootstrapped. Background threads (outbox, scheduler) are off;
+# tests drive them directly.
+import os
+import sys
+
+import pytest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+ADMIN_EMAIL = "admin@nari.test"
+ADMIN_PASSWORD = "Admin123"
+CLIENT_PASSWORD = "Client123"
+
+
+def base_env(tmp_path):
+    return {
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'nari.db'}",
+        "ADMIN_EMAIL": ADMIN_EMAIL,
+        "ADMIN_PASSWORD": ADMIN_PASSWORD,
+        "RATELIMIT_ENABLED": "false",
+        "OUTBOX_WORKERS": "0",
+        "SCHEDULER_ENABLED": "false",
+        "METRICS_ENABLED": "true",
+        # inline and cheap: hashing cost is not what these tests measure
+        "PASSWORD_HASH_WORKERS": "0",
+        "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
+        "REVOCATION_SYNC_SECONDS": "0",
+        "IDENTITY_SYNC_SECONDS": "0",
+    }
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """``make_app(**env)`` -> a bootstrapped app; env overrides the defaults."""
+    from models import db
+
+    created = []
+
+    def make(**overrides):
+        for key, value in dict(base_env(tmp_path), **overrides).items():
+            monkeypatch.setenv(key, str(value))
+
+        from app import create_app
+        from bootstrap import bootstrap
+
+        application = create_app()
+        application.testing = True
+        application.extensions["mail"].suppress = True
+        bootstrap(application)
+        created.append(application)
+        return application
+
+    yield make
+
+    for application in created:
+        with application.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, email, password, role):
+    response = client.post(
+        "/api/login", json={"email": email, "password": password, "role": role}
+    )
+    assert response.status_code == 200, response.get_json()
+    return {"Authorization": f"Bearer {response.get_json()['token']}"}
+
+
+@pytest.fixture
+def admin_headers(client):
+    return login(client, ADMIN_EMAIL, ADMIN_PASSWORD, "admin")
+
+
+@pytest.fixture
+def make_client_user(app):
+    """``make_client_user(email, **columns)`` -> id of a client, approved unless overridden."""
+    from models import db, User
+    from passwords import hash_password
+
+    def make(email, **columns):
+        with app.app_context():
+            columns = {"approved": True, "role": "client", **columns}
+            user = User(
+                name=email.split("@")[0],
+                surname="Test",
+                email=email,
+                password_hash=hash_password(CLIENT_PASSWORD),
+                **columns
+            )
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+
+    return make
@@ -0,0 +1,106 @@
+# tests/test_admin_users.py
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from conftest import ADMIN_EMAIL, ADMIN_PASSWORD, login
+
+
+@pytest.fixture
+def enforce_fks(app):
+    # SQLite only checks foreign keys when asked to, Postgres always does
+    from models import db
+
+    with app.app_context():
+        event.listen(
+            db.engine, "connect",
+            lambda conn, record: conn.execute("PRAGMA foreign_keys=ON")
+        )
+        db.engine.dispose()
+
+
+def _pending_with_reset_token(client, make_client_user, email):
+    user_id = make_client_user(email, approved=False)
+    assert client.post("/api/forgot-password", json={"email": email}).status_code == 200
+    return user_id
+
+
+def test_reject_deletes_reset_tokens(app, client, admin_headers, make_client_user, enforce_fks):
+    from models import db, User, PasswordResetToken
+
+    user_id = _pending_with_reset_token(client, make_client_user, "pending@nari.test")
+    response = client.delete(f"/api/admin/users/{user_id}/reject", headers=admin_headers)
+    assert response.status_code == 200, response.get_json()
+
+    with app.app_context():
+        assert db.session.get(User, user_id) is None
+        assert PasswordResetToken.query.count() == 0
+
+
+def test_bulk_reject_deletes_reset_tokens(app, client, admin_headers, make_client_user, enforce_fks):
+    ids = [
+        _pending_with_reset_token(client, make_client_user, f"pending{i}@nari.test")
+        for i in range(3)
+    ]
+    response = client.post("/api/admin/users/bulk", headers=admin_headers, json={
+        "action": "reject", "ids": ids
+    })
+    assert response.status_code == 200, response.get_json()
+    assert set(response.get_json()["results"].values()) == {"rejected"}
+
+
+def test_reject_keeps_users_with_payments(app, client, admin_headers, make_client_user, enforce_fks):
+    from models import db, User, Payment
+
+    paying = make_client_user("paying@nari.test")
+    other = make_client_user("other@nari.test")
+    with app.app_context():
+        db.session.add(Payment(
+            reference="NARI-test", user_id=paying, plan="Basic", amount=Decimal("2000")
+        ))
+        db.session.commit()
+
+    response = client.delete(f"/api/admin/users/{paying}/reject", headers=admin_headers)
+    assert response.status_code == 409
+
+    response = client.post("/api/admin/users/bulk", headers=admin_headers, json={
+        "action": "reject", "ids": [paying, other]
+    })
+    assert response.get_json()["results"] == {
+        str(paying): "has_payments", str(other): "rejected"
+    }
+    with app.app_context():
+        assert db.session.get(User, paying) is not None
+        assert Payment.query.count() == 1
+
+
+def test_bulk_invalidates_identities_per_batch(make_app, make_client_user):
+    from models import db, IdentityVersion
+
+    app = make_app(BULK_BATCH_SIZE="2")
+    client = app.test_client()
+    headers = login(client, ADMIN_EMAIL, ADMIN_PASSWORD, "admin")
+    ids = [make_client_user(f"c{i}@nari.test") for i in range(5)]
+
+    bound = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("DELETE FROM identity_versions"):
+            bound.append(len(parameters))
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", capture)
+    try:
+        response = client.post("/api/admin/users/bulk", headers=headers, json={
+            "action": "deactivate", "ids": ids
+        })
+    finally:
+        with app.app_context():
+            event.remove(db.engine, "before_cursor_execute", capture)
+
+    assert response.status_code == 200, response.get_json()
+    # no statement binds more than one batch of ids
+    assert bound and max(bound) <= 2
+    with app.app_context():
+        assert {v.user_id for v in IdentityVersion.query} >= set(ids)
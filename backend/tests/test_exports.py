@@ -0,0 +1,18 @@
+# tests/test_exports.py
+import csv
+import io
+from decimal import Decimal
+
+from exports import csv_lines
+
+
+def test_csv_cells_cannot_start_a_formula():
+    rows = [
+        ("=HYPERLINK(\"http://x\")", "+1", "-2", "@SUM(A1)", "\tx", "plain"),
+        (Decimal("-1.5"), -3, "", None, "a=b", "x"),
+    ]
+    parsed = list(csv.reader(io.StringIO("".join(csv_lines(list("abcdef"), rows)))))
+
+    assert parsed[1] == ["'=HYPERLINK(\"http://x\")", "'+1", "'-2", "'@SUM(A1)", "'\tx", "plain"]
+    # numbers are not user text and keep their sign
+    assert parsed[2] == ["-1.5", "-3", "", "", "a=b", "x"]
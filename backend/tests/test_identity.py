@@ -0,0 +1,49 @@
+# tests/test_identity.py
+from sqlalchemy import update
+
+from identity import IdentityCache, identity_cache
+
+
+def test_write_elsewhere_drops_only_the_changed_user(app, make_client_user):
+    from models import db, User
+
+    alice = make_client_user("alice@nari.test")
+    bob = make_client_user("bob@nari.test")
+
+    with app.test_request_context():
+        cached = identity_cache.get(alice)
+        identity_cache.get(bob)
+
+    # another worker changes bob; its cache is not this one
+    with app.test_request_context():
+        db.session.execute(
+            update(User).where(User.id == bob).values(email="robert@nari.test")
+        )
+        IdentityCache().invalidate(bob)
+        db.session.commit()
+
+    with app.test_request_context():
+        # alice is still served from the cache, bob is read again
+        assert identity_cache.get(alice) is cached
+        assert identity_cache.get(bob).email == "robert@nari.test"
+
+
+def test_sync_waits_for_its_interval(make_app, make_client_user):
+    from models import db, User
+
+    app = make_app(IDENTITY_SYNC_SECONDS="3600")
+    bob = make_client_user("bob@nari.test")
+
+    with app.test_request_context():
+        identity_cache.get(bob)
+
+    with app.test_request_context():
+        db.session.execute(
+            update(User).where(User.id == bob).values(email="robert@nari.test")
+        )
+        IdentityCache().invalidate(bob)
+        db.session.commit()
+
+    # within the window this worker still serves its cached copy
+    with app.test_request_context():
+        assert identity_cache.get(bob).email == "bob@nari.test"
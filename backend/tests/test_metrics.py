@@ -0,0 +1,31 @@
+# tests/test_metrics.py
+import os
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from metrics import metrics
+
+
+def test_failed_statement_leaves_no_timing_state(app):
+    from models import db
+
+    with app.app_context():
+        with db.engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM no_such_table"))
+            conn.rollback()
+
+            before = metrics._background[0]
+            conn.execute(text("SELECT 1"))
+            assert metrics._background[0] == before + 1
+            assert "_metrics_start" not in conn.info
+
+
+def test_series_are_labelled_with_the_worker_pid(client, admin_headers):
+    body = client.get("/api/admin/metrics", headers=admin_headers).get_data(as_text=True)
+    samples = [l for l in body.splitlines() if l.startswith("nari_") and "{" in l]
+
+    assert samples
+    assert all(f'pid="{os.getpid()}"' in l for l in samples)
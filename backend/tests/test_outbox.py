@@ -0,0 +1,193 @@
+# tests/test_outbox.py
+#
+# Outbox delivery against a minimal SMTP server on localhost.
+import socketserver
+import threading
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from outbox import outbox, enqueue_email
+
+
+class SMTPStub(socketserver.ThreadingTCPServer):
+    """Accepts everything except recipients whose address contains "bad"."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SMTPHandler)
+        self.delivered = []
+        self.connections = 0
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 stub")
+        recipients = []
+
+        for line in self.rfile:
+            verb = line.decode().split(" ", 1)[0].strip().upper()
+            if verb == "RCPT":
+                if b"bad" in line:
+                    self.reply("550 no such user")
+                    continue
+                recipients.append(line.decode().split(":", 1)[1].strip(" <>\r\n"))
+            elif verb == "DATA":
+                self.reply("354 go ahead")
+                for data in self.rfile:
+                    if data.rstrip(b"\r\n") == b".":
+                        break
+                self.server.delivered.extend(recipients)
+                recipients = []
+                self.reply("250 queued")
+                continue
+            elif verb == "QUIT":
+                self.reply("221 bye")
+                return
+            self.reply("250 ok")
+
+
+@pytest.fixture
+def smtp():
+    server = SMTPStub()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def outbox_app(make_app, smtp):
+    def make(**env):
+        app = make_app(
+            MAIL_SERVER="127.0.0.1",
+            MAIL_PORT=str(smtp.server_address[1]),
+            MAIL_USE_TLS="false",
+            MAIL_USERNAME="signals@nari.test",
+            # the stub has no AUTH; an empty password skips the login
+            MAIL_PASSWORD="",
+            **env
+        )
+        app.extensions["mail"].suppress = False
+        return app
+    return make
+
+
+def _enqueue(app, *emails):
+    from models import db
+
+    with app.app_context():
+        enqueue_email(
+            subject="New signal",
+            body="Hello {name}",
+            recipients=[(email, email.split("@")[0]) for email in emails]
+        )
+        db.session.commit()
+
+
+def _recipients(app):
+    from models import OutboxRecipient
+
+    with app.app_context():
+        return {
+            r.email: (r.status, r.attempts)
+            for r in OutboxRecipient.query.order_by(OutboxRecipient.id)
+        }
+
+
+def test_batch_is_sent_over_one_connection(outbox_app, smtp):
+    app = outbox_app()
+    _enqueue(app, "a@nari.test", "b@nari.test", "c@nari.test")
+
+    assert outbox.drain_once() == 3
+    assert sorted(smtp.delivered) == ["a@nari.test", "b@nari.test", "c@nari.test"]
+    assert smtp.connections == 1
+    assert set(_recipients(app).values()) == {("sent", 0)}
+
+    # sent rows are never claimed again
+    assert outbox.drain_once() == 0
+
+
+def test_failed_send_backs_off_then_gives_up(outbox_app, smtp):
+    from models import db, OutboxRecipient
+
+    app = outbox_app(OUTBOX_MAX_ATTEMPTS="2", OUTBOX_BACKOFF_SECONDS="30")
+    _enqueue(app, "good@nari.test", "bad@nari.test")
+
+    assert outbox.drain_once() == 2
+    assert _recipients(app) == {
+        "good@nari.test": ("sent", 0), "bad@nari.test": ("pending", 1)
+    }
+
+    # not due until the backoff has passed
+    assert outbox.drain_once() == 0
+    with app.app_context():
+        retry = OutboxRecipient.query.filter_by(email="bad@nari.test").one()
+        assert retry.next_attempt_at > datetime.utcnow()
+        assert "550" in retry.last_error
+        retry.next_attempt_at = datetime.utcnow()
+        db.session.commit()
+
+    assert outbox.drain_once() == 1
+    assert _recipients(app)["bad@nari.test"] == ("failed", 2)
+    assert smtp.delivered == ["good@nari.test"]
+
+
+def test_unreachable_server_keeps_the_batch_pending(outbox_app, smtp):
+    app = outbox_app()
+    _enqueue(app, "a@nari.test", "b@nari.test")
+    smtp.shutdown()
+    smtp.server_close()
+
+    assert outbox.drain_once() == 2
+    assert set(_recipients(app).values()) == {("pending", 1)}
+
+
+
+def test_abandoned_claim_is_picked_up_after_the_timeout(outbox_app, smtp):
+    from models import db, OutboxRecipient
+
+    app = outbox_app()
+    _enqueue(app, "a@nari.test", "b@nari.test")
+
+    # a worker claims the batch and dies before sending it
+    with app.app_context():
+        assert len(outbox._claim()) == 2
+        db.session.remove()
+
+    # still within OUTBOX_CLAIM_TIMEOUT: nobody else may take it
+    assert outbox.drain_once() == 0
+    assert set(_recipients(app).values()) == {("sending", 0)}
+
+    with app.app_context():
+        timeout = app.config["OUTBOX_CLAIM_TIMEOUT"]
+        OutboxRecipient.query.update({
+            "claimed_at": datetime.utcnow() - timedelta(seconds=timeout + 1)
+        })
+        db.session.commit()
+
+    assert outbox.drain_once() == 2
+    assert sorted(smtp.delivered) == ["a@nari.test", "b@nari.test"]
+    assert set(_recipients(app).values()) == {("sent", 0)}
+
+
+def test_backoff_doubles_up_to_an_hour_and_attempts_are_capped(outbox_app):
+    app = outbox_app(OUTBOX_MAX_ATTEMPTS="10", OUTBOX_BACKOFF_SECONDS="30")
+    now = datetime.utcnow()
+
+    outcomes = [
+        outbox._failure(SimpleNamespace(id=1, attempts=n), "550", now, app.config)
+        for n in range(10)
+    ]
+
+    delays = [(o["next_attempt_at"] - now).total_seconds() for o in outcomes]
+    assert delays == [30, 60, 120, 240, 480, 960, 1920, 3600, 3600, 3600]
+    assert [o["attempts"] for o in outcomes] == list(range(1, 11))
+    assert [o["status"] for o in outcomes] == ["pending"] * 9 + ["failed"]
@@ -0,0 +1,45 @@
+# tests/test_pagination.py
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from pagination import PaginationError, decode_cursor, encode_cursor
+
+
+def _cursor(values):
+    raw = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    from models import Signal
+
+    columns = (Signal.created_at, Signal.id)
+    values = [datetime(2026, 1, 2, 3, 4, 5), 42]
+    assert decode_cursor(encode_cursor(values), columns) == values
+
+
+@pytest.mark.parametrize("values", [
+    ["2026-01-02T03:04:05", "42"],
+    ["2026-01-02T03:04:05", True],
+    ["2026-01-02T03:04:05", None],
+    ["2026-01-02T03:04:05", [42]],
+    [1767323045, 42],
+    ["yesterday", 42],
+])
+def test_cursor_values_must_match_column_types(values):
+    from models import Signal
+
+    with pytest.raises(PaginationError):
+        decode_cursor(_cursor(values), (Signal.created_at, Signal.id))
+
+
+def test_forged_cursor_is_a_400(client, admin_headers):
+    response = client.get(
+        f"/api/admin/users?cursor={_cursor(['2026-01-02T03:04:05', 'x'])}",
+        headers=admin_headers
+    )
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Invalid cursor"
@@ -0,0 +1,53 @@
+# tests/test_passwords.py
+from passwords import PasswordHasher, method_prefix
+
+from conftest import ADMIN_EMAIL, ADMIN_PASSWORD, login
+
+
+def test_inline_hashing_is_not_busy(client):
+    # PASSWORD_HASH_WORKERS=0 must still leave a slot to hash in
+    assert client.application.config["PASSWORD_HASH_MAX_PENDING"] == 1
+    for _ in range(3):
+        login(client, ADMIN_EMAIL, ADMIN_PASSWORD, "admin")
+
+
+def test_short_method_spec_matches_stored_prefix():
+    hasher = PasswordHasher()
+    hasher.method = "pbkdf2:sha256"
+    hasher.workers = 0
+
+    assert method_prefix("pbkdf2:sha256") == method_prefix("pbkdf2:sha256:1000000")
+    assert method_prefix("scrypt") == "scrypt:32768:8:1"
+    assert not hasher.needs_rehash(hasher.hash("secret"))
+    assert hasher.needs_rehash("pbkdf2:sha256:1000$salt$hash")
+    assert hasher.needs_rehash("scrypt:32768:8:1$salt$hash")
+
+
+def test_login_does_not_rehash_current_hashes(app, client):
+    from models import User
+
+    with app.app_context():
+        before = User.query.filter_by(email=ADMIN_EMAIL).one().password_hash
+    login(client, ADMIN_EMAIL, ADMIN_PASSWORD, "admin")
+    with app.app_context():
+        assert User.query.filter_by(email=ADMIN_EMAIL).one().password_hash == before
+
+
+def test_forgot_password_answer_does_not_depend_on_mail_queue(
+    client, make_client_user, monkeypatch
+):
+    import auth
+    from mailer import MailQueueFull
+
+    def full(*args):
+        raise MailQueueFull()
+
+    monkeypatch.setattr(auth, "send_reset_email_async", full)
+    make_client_user("known@nari.test")
+
+    answers = [
+        client.post("/api/forgot-password", json={"email": email})
+        for email in ("known@nari.test", "unknown@nari.test")
+    ]
+    assert [a.status_code for a in answers] == [200, 200]
+    assert answers[0].get_json() == answers[1].get_json()
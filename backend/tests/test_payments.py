@@ -0,0 +1,75 @@
+# tests/test_payments.py
+import hashlib
+
+import pytest
+
+from conftest import CLIENT_PASSWORD, login
+from payments import NOTIFY_HASH_FIELDS
+
+PRIVATE_KEY = "test-private-key"
+
+
+@pytest.fixture
+def checkout(app, client, make_client_user, monkeypatch):
+    """``(user_id, reference)`` of a pending Basic checkout."""
+    monkeypatch.setenv("OZOW_SITE_CODE", "NAR-001")
+    monkeypatch.setenv("OZOW_API_KEY", "test-api-key")
+    monkeypatch.setenv("OZOW_PRIVATE_KEY", PRIVATE_KEY)
+
+    user_id = make_client_user("payer@nari.test")
+    headers = login(client, "payer@nari.test", CLIENT_PASSWORD, None)
+    response = client.post("/api/pay/ozow", headers=headers, json={"plan": "Basic"})
+    assert response.status_code == 200
+    return user_id, response.get_json()["TransactionReference"]
+
+
+def _notification(reference, status="Complete", amount="2000.00", key=PRIVATE_KEY):
+    data = {
+        "SiteCode": "NAR-001", "TransactionId": "ozow-1",
+        "TransactionReference": reference, "Amount": amount, "Status": status,
+        "CurrencyCode": "ZAR", "IsTest": "true", "StatusMessage": ""
+    }
+    values = "".join(data.get(field, "") for field in NOTIFY_HASH_FIELDS)
+    data["Hash"] = hashlib.sha512((values + key).lower().encode()).hexdigest()
+    return data
+
+
+def _state(app, user_id, reference):
+    from models import db, User, Payment
+
+    with app.app_context():
+        payment = Payment.query.filter_by(reference=reference).one()
+        return payment.status, db.session.get(User, user_id).subscription_status
+
+
+def test_signed_notification_activates_the_subscription(app, client, checkout):
+    user_id, reference = checkout
+
+    response = client.post("/api/pay/ozow/callback", data=_notification(reference))
+    assert response.status_code == 200
+    assert _state(app, user_id, reference) == ("complete", "active")
+
+    # a provider retry is acknowledged and changes nothing
+    assert client.post("/api/pay/ozow/callback", data=_notification(reference)).status_code == 200
+
+
+@pytest.mark.parametrize("tamper", [
+    lambda data: data.update(Hash="0" * 128),
+    lambda data: data.pop("Hash"),
+    lambda data: data.update(Amount="1.00"),
+])
+def test_unsigned_or_tampered_notification_is_rejected(app, client, checkout, tamper):
+    user_id, reference = checkout
+    data = _notification(reference)
+    tamper(data)
+
+    assert client.post("/api/pay/ozow/callback", data=data).status_code == 403
+    assert _state(app, user_id, reference) == ("pending", "none")
+
+
+def test_forged_failure_does_not_fail_the_payment(app, client, checkout):
+    user_id, reference = checkout
+    data = _notification(reference, status="Cancelled", key="guessed-key")
+
+    assert client.post("/api/pay/ozow/callback", data=data).status_code == 403
+    assert _state(app, user_id, reference) == ("pending", "none")
@@ -0,0 +1,42 @@
+# tests/test_prices.py
+from decimal import Decimal
+
+import pytest
+
+from prices import PriceError, price_columns
+
+
+def test_price_columns():
+    assert price_columns("1,085.50", "1090", "1080") == {
+        "entry_price": Decimal("1085.50"),
+        "tp_price": Decimal("1090"),
+        "sl_price": Decimal("1080"),
+        "risk_reward": Decimal("0.8182"),
+    }
+
+
+@pytest.mark.parametrize("entry, tp, sl", [
+    ("10000000000", "1", "2"),           # wider than Numeric(18, 8)
+    ("1.123456789", "2", "1"),           # more than 8 decimal places
+    ("1", "9999999999", "1.00000001"),   # risk/reward wider than Numeric(12, 4)
+    ("0.00000001", "9999999999.99999999", "0"),
+])
+def test_out_of_range_prices_are_rejected(entry, tp, sl):
+    with pytest.raises(PriceError):
+        price_columns(entry, tp, sl)
+
+
+def test_out_of_range_prices_are_null_when_not_strict():
+    values = price_columns("1", "9999999999", "1.00000001", strict=False)
+    assert values["entry_price"] == 1
+    assert values["risk_reward"] is None
+    assert price_columns("1E+20", "2", "1", strict=False)["entry_price"] is None
+
+
+def test_create_signal_rejects_out_of_range_prices(client, admin_headers):
+    response = client.post("/api/admin/signals", headers=admin_headers, json={
+        "pair": "EURUSD", "entry": "1", "tp": "9999999999", "sl": "1.00000001",
+        "lots": [{"lot_size": 0.1, "win_amount": 10, "loss_amount": 5}]
+    })
+    assert response.status_code == 400
+    assert response.get_json()["message"].startswith("tp is too far")
@@ -0,0 +1,34 @@
+# tests/test_querybudget.py
+import pytest
+from sqlalchemy import text
+
+from querybudget import QueryBudgetExceeded, query_budget
+
+
+def _over_budget_route(app):
+    from models import db
+
+    @app.get("/test/over-budget")
+    @query_budget(1)
+    def over_budget():
+        db.session.execute(text("SELECT 1"))
+        db.session.execute(text("SELECT 2"))
+        return {"ok": True}
+
+
+def test_enforced_under_testing_by_default(make_app, monkeypatch):
+    monkeypatch.delenv("QUERY_BUDGET_ENFORCE", raising=False)
+    app = make_app()
+    _over_budget_route(app)
+
+    assert app.config["QUERY_BUDGET_ENFORCE"] is None
+    with pytest.raises(QueryBudgetExceeded):
+        app.test_client().get("/test/over-budget")
+
+
+def test_explicit_off_only_logs(make_app, caplog):
+    app = make_app(QUERY_BUDGET_ENFORCE="false")
+    _over_budget_route(app)
+
+    assert app.test_client().get("/test/over-budget").status_code == 200
+    assert "issued 2 SQL statements, budget is 1" in caplog.text
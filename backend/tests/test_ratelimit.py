@@ -0,0 +1,70 @@
+# tests/test_ratelimit.py
+from ratelimit import MemoryBackend
+
+
+def test_bucket_empties_and_refills(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("ratelimit.time.monotonic", lambda: clock[0])
+    backend = MemoryBackend()
+
+    assert [backend.hit("k", 2, 1.0)[0] for _ in range(3)] == [True, True, False]
+    assert backend.hit("k", 2, 1.0)[1] == 1.0
+
+    clock[0] += 1
+    assert backend.hit("k", 2, 1.0)[0] is True
+
+
+def test_refilled_buckets_expire(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("ratelimit.time.monotonic", lambda: clock[0])
+    backend = MemoryBackend()
+
+    backend.hit("a", 1, 1.0)
+    backend.hit("slow", 1, 0.01)
+    backend.hit("b", 1, 1.0)
+
+    clock[0] += 2
+    backend.hit("c", 1, 1.0)
+    # "a" has refilled and goes; "slow" still refills and shields "b"
+    assert list(backend._buckets) == ["slow", "b", "c"]
+
+    clock[0] += 100
+    backend.hit("d", 1, 1.0)
+    assert list(backend._buckets) == ["d"]
+
+
+def test_memory_backend_evicts_least_recently_hit():
+    backend = MemoryBackend(max_keys=3)
+    for key in ("a", "b", "c"):
+        backend.hit(key, 1, 0.001)
+
+    # "a" is used again, so "b" is the stalest when "d" arrives
+    backend.hit("a", 1, 0.001)
+    backend.hit("d", 1, 0.001)
+
+    assert list(backend._buckets) == ["c", "a", "d"]
+    # an evicted key starts over with a full bucket
+    assert backend.hit("b", 1, 0.001)[0] is True
+    assert backend.hit("c", 1, 0.001)[0] is True
+    assert len(backend._buckets) == 3
+
+
+def _forgot(client, forwarded_for):
+    return client.post(
+        "/api/forgot-password",
+        json={},
+        headers={"X-Forwarded-For": forwarded_for},
+        environ_base={"REMOTE_ADDR": "10.0.0.1"}
+    ).status_code
+
+
+def test_forged_forwarded_for_does_not_reset_the_limit(make_app):
+    app = make_app(RATELIMIT_ENABLED="true", PROXY_HOPS="1")
+    client = app.test_client()
+
+    # the proxy appends the real client address after whatever it was sent
+    codes = [_forgot(client, f"{i}.{i}.{i}.{i}, 203.0.113.7") for i in range(20)]
+    assert 429 in codes
+
+    # a different real client still has its own bucket
+    assert _forgot(client, "1.1.1.1, 198.51.100.9") != 429
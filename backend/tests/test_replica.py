@@ -0,0 +1,74 @@
+# tests/test_replica.py
+#
+# Replica routing with two SQLite files: the "replica" is a copy of the
+# primary that only changes when a test writes to it directly.
+import json
+import shutil
+
+import pytest
+
+from conftest import ADMIN_EMAIL, ADMIN_PASSWORD, login
+
+SIGNAL = {
+    "pair": "EURUSD", "entry": "1.1", "tp": "1.2", "sl": "1.0",
+    "lots": [{"lot_size": 0.1, "win_amount": 10, "loss_amount": 5}]
+}
+
+
+@pytest.fixture
+def replicated(make_app, tmp_path):
+    """``(app, admin_headers)`` with a replica that has caught up."""
+    replica = tmp_path / "replica.db"
+    app = make_app(DATABASE_REPLICA_URL=f"sqlite:///{replica}")
+    headers = login(app.test_client(), ADMIN_EMAIL, ADMIN_PASSWORD, "admin")
+
+    from models import db
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    shutil.copy(tmp_path / "nari.db", replica)
+    return app, headers
+
+
+def _add_to_replica_only(app, pair):
+    from models import db
+
+    with app.app_context(), db.engines["replica"].begin() as conn:
+        conn.execute(
+            db.metadata.tables["signals"].insert().values(
+                pair=pair, entry="1.1", tp="1.2", sl="1.0"
+            )
+        )
+
+
+def _exported_pairs(client, headers):
+    response = client.get("/api/admin/export/signals", headers=headers)
+    assert response.status_code == 200
+    return {json.loads(line)["pair"] for line in response.get_data(as_text=True).splitlines()}
+
+
+def test_reads_go_to_a_caught_up_replica(replicated):
+    app, headers = replicated
+    _add_to_replica_only(app, "REPLICA")
+
+    assert _exported_pairs(app.test_client(), headers) == {"REPLICA"}
+
+
+def test_reads_stay_on_the_primary_while_the_replica_lags(replicated):
+    app, headers = replicated
+    client = app.test_client()
+    _add_to_replica_only(app, "REPLICA")
+
+    # bumps the signals version on the primary only
+    assert client.post("/api/admin/signals", headers=headers, json=SIGNAL).status_code == 201
+    assert _exported_pairs(client, headers) == {"EURUSD"}
+
+
+def test_unreachable_replica_falls_back_to_the_primary(make_app, tmp_path):
+    app = make_app(DATABASE_REPLICA_URL=f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    client = app.test_client()
+    headers = login(client, ADMIN_EMAIL, ADMIN_PASSWORD, "admin")
+
+    assert client.post("/api/admin/signals", headers=headers, json=SIGNAL).status_code == 201
+    assert _exported_pairs(client, headers) == {"EURUSD"}
@@ -0,0 +1,14 @@
+# tests/test_signal_import.py
+import pytest
+
+
+@pytest.mark.parametrize("content_type", ["application/json", "application/x-ndjson"])
+def test_non_utf8_body_is_a_validation_error(client, admin_headers, content_type):
+    response = client.post(
+        "/api/admin/signals/import", headers=admin_headers,
+        data=b'[{"pair": "EUR\xff"}]', content_type=content_type
+    )
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == [
+        {"message": "Body is not valid UTF-8 (byte 14)"}
+    ]
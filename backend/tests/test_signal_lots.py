@@ -0,0 +1,36 @@
+# tests/test_signal_lots.py
+import pytest
+
+SIGNAL = {"pair": "EURUSD", "entry": "1.1", "tp": "1.2", "sl": "1.0"}
+LOT = {"lot_size": 0.1, "win_amount": 10, "loss_amount": 5}
+
+
+@pytest.mark.parametrize("lots, message", [
+    ("0.1", "Lots must be a list"),
+    ([LOT] * 4, "You must provide 0–3 lot options"),
+    ([{"lot_size": 0.1}], "Invalid lot structure"),
+    ([dict(LOT, win_amount="ten")], "Invalid lot structure"),
+])
+def test_create_signal_validates_lots(app, client, admin_headers, lots, message):
+    from models import Signal
+
+    response = client.post(
+        "/api/admin/signals", headers=admin_headers, json=dict(SIGNAL, lots=lots)
+    )
+    assert response.status_code == 400
+    assert response.get_json()["message"] == message
+    with app.app_context():
+        assert Signal.query.count() == 0
+
+
+def test_create_signal_lots_are_optional(app, client, admin_headers):
+    from models import db, Signal
+
+    for lots in (None, [], [LOT, dict(LOT, lot_size="0.2")]):
+        body = dict(SIGNAL) if lots is None else dict(SIGNAL, lots=lots)
+        response = client.post("/api/admin/signals", headers=admin_headers, json=body)
+        assert response.status_code == 201, response.get_json()
+
+    with app.app_context():
+        signal = db.session.get(Signal, response.get_json()["id"])
+        assert sorted(lot.lot_size for lot in signal.lots) == [0.1, 0.2]
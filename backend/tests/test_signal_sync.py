@@ -0,0 +1,70 @@
+# tests/test_signal_sync.py
+#
+# Delta sync cursors must not step over an event id that has not committed
+# yet: on Postgres ids are taken at insert and can become visible out of order.
+from datetime import datetime, timedelta
+
+from events import settled_cursor
+
+
+def _add_events(app, *events):
+    from models import db, SignalEvent
+
+    with app.app_context():
+        for event_id, age in events:
+            db.session.add(SignalEvent(
+                id=event_id,
+                kind="deleted",
+                signal_id=event_id,
+                payload="{}",
+                created_at=datetime.utcnow() - timedelta(seconds=age)
+            ))
+        db.session.commit()
+
+
+def _changes(client, headers, since):
+    response = client.get(f"/api/signals/changes?since={since}", headers=headers)
+    return response.status_code, response.get_json()
+
+
+def test_settled_cursor_holds_recent_gaps():
+    now = datetime.utcnow()
+    horizon = now - timedelta(seconds=5)
+    old, new = now - timedelta(seconds=60), now
+
+    assert settled_cursor([(1, new), (2, new)], 0, horizon) == 2
+    assert settled_cursor([(1, new), (3, new)], 0, horizon) == 1
+    # old enough: the missing id rolled back
+    assert settled_cursor([(1, new), (3, old), (5, new)], 0, horizon) == 3
+    assert settled_cursor([], 7, horizon) == 7
+
+
+def test_changes_wait_for_a_late_lower_id(app, client, admin_headers):
+    _add_events(app, (1, 60), (2, 60))
+    _, delta = _changes(client, admin_headers, 0)
+    assert delta["cursor"] == 2
+
+    # id 3 is still in flight when 4 commits
+    _add_events(app, (4, 0))
+    status, delta = _changes(client, admin_headers, 2)
+    assert status == 204
+
+    _add_events(app, (3, 0))
+    status, delta = _changes(client, admin_headers, 2)
+    assert status == 200
+    assert delta["cursor"] == 4
+    assert delta["deleted"] == [3, 4]
+
+
+def test_changes_step_over_a_rolled_back_id(app, client, admin_headers):
+    _add_events(app, (1, 60), (3, 60), (4, 0))
+    status, delta = _changes(client, admin_headers, 1)
+    assert status == 200
+    assert delta["cursor"] == 4
+    assert delta["deleted"] == [3, 4]
+
+
+def test_reset_cursor_stops_before_a_gap(app, client, admin_headers):
+    _add_events(app, (1, 60), (2, 60), (4, 0))
+    response = client.get("/api/signals/changes", headers=admin_headers)
+    assert response.get_json() == {"cursor": 2, "reset": True}
@@ -0,0 +1,101 @@
+# tests/test_stream_auth.py
+#
+# Who may open a signal stream, and how an open one is cut off.
+import time
+import threading
+from datetime import timedelta
+
+import pytest
+
+from conftest import CLIENT_PASSWORD, login
+
+
+@pytest.fixture
+def stream_app(make_app):
+    # re-check authorization (once per heartbeat) almost at once
+    return make_app(SSE_HEARTBEAT_SECONDS="0.05")
+
+
+def _frames(client, url, headers=None, after=None):
+    """Frames of a stream until it ends; ``after()`` runs once it is open.
+
+    The body is read in this thread, where its request context lives.
+    """
+    result = {}
+
+    def run():
+        response = client.get(url, headers=headers, buffered=False)
+        result["status"] = response.status_code
+        frames = []
+        try:
+            if response.status_code == 200:
+                for frame in response.response:
+                    frames.append(frame.decode())
+                    if len(frames) == 1 and after:
+                        after()
+        finally:
+            response.close()
+        result["frames"] = frames
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+    assert not thread.is_alive(), "stream was not closed"
+    return result["status"], result["frames"]
+
+
+def _ticket(client, headers):
+    response = client.post("/api/signals/stream/ticket", headers=headers)
+    assert response.status_code == 200
+    return response.get_json()["ticket"]
+
+
+def test_token_in_the_query_string_is_refused(stream_app, make_client_user):
+    client = stream_app.test_client()
+    make_client_user("c@nari.test")
+    token = login(client, "c@nari.test", CLIENT_PASSWORD, None)["Authorization"].split()[1]
+
+    assert client.get(f"/api/signals/stream?jwt={token}").status_code == 401
+    assert client.get("/api/signals/stream?ticket=forged").status_code == 401
+
+
+def test_ticket_expires(make_app, make_client_user):
+    app = make_app(SSE_TICKET_SECONDS="0")
+    client = app.test_client()
+    make_client_user("c@nari.test")
+    ticket = _ticket(client, login(client, "c@nari.test", CLIENT_PASSWORD, None))
+
+    time.sleep(1.1)
+    assert client.get(f"/api/signals/stream?ticket={ticket}").status_code == 401
+
+
+def test_deactivation_closes_an_open_stream(stream_app, make_client_user, admin_headers):
+    client = stream_app.test_client()
+    user_id = make_client_user("c@nari.test")
+    ticket = _ticket(client, login(client, "c@nari.test", CLIENT_PASSWORD, None))
+
+    def deactivate():
+        response = client.put(f"/api/admin/users/{user_id}/deactivate", headers=admin_headers)
+        assert response.status_code == 200
+
+    status, frames = _frames(client, f"/api/signals/stream?ticket={ticket}", after=deactivate)
+    assert status == 200
+    assert frames[-1] == "event: unauthorized\ndata: {}\n\n"
+
+    # and the ticket cannot reopen it
+    assert client.get(f"/api/signals/stream?ticket={ticket}").status_code == 401
+
+
+def test_expired_token_closes_an_open_stream(stream_app, make_client_user):
+    from flask_jwt_extended import create_access_token
+
+    client = stream_app.test_client()
+    user_id = make_client_user("c@nari.test")
+    with stream_app.app_context():
+        token = create_access_token(identity=str(user_id), expires_delta=timedelta(seconds=1))
+
+    status, frames = _frames(
+        client, "/api/signals/stream", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert status == 200
+    assert frames[-1] == "event: unauthorized\ndata: {}\n\n"
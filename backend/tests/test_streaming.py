@@ -0,0 +1,117 @@
+# tests/test_streaming.py
+#
+# Streamed responses: after_request must not drain them, and an idle
+# stream must not hold a database connection.
+import json
+import threading
+
+from conftest import ADMIN_EMAIL, ADMIN_PASSWORD, login
+
+
+def _in_thread(fn):
+    # a hook that drains an endless stream would never return; the body is
+    # read in the same thread since the request context lives there
+    result = {}
+
+    def run():
+        result["value"] = fn()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+    assert not thread.is_alive(), "response was buffered instead of streamed"
+    return result["value"]
+
+
+def _export_bytes(client, headers):
+    # the metrics registry outlives each test's app, so compare differences
+    metrics = client.get("/api/admin/metrics", headers=headers).get_data(as_text=True)
+    line = next(
+        (l for l in metrics.splitlines()
+         if l.startswith("nari_http_response_bytes_total")
+         and 'route="/api/admin/export/signals"' in l),
+        None
+    )
+    return int(line.rsplit(" ", 1)[1]) if line else 0
+
+
+def test_sse_stream_sends_first_frame(client, admin_headers):
+    def first_frame():
+        response = client.get("/api/signals/stream", headers=admin_headers, buffered=False)
+        try:
+            return response, next(iter(response.response))
+        finally:
+            response.close()
+
+    response, frame = _in_thread(first_frame)
+    assert response.status_code == 200
+    assert "Content-Length" not in response.headers
+    assert frame == b"retry: 3000\n\n"
+
+
+def test_sse_stream_releases_its_connection(make_app):
+    from models import db
+
+    app = make_app(SSE_HEARTBEAT_SECONDS="0.05")
+    client = app.test_client()
+    headers = login(client, ADMIN_EMAIL, ADMIN_PASSWORD, "admin")
+    with app.app_context():
+        pool = db.engine.pool
+
+    def idle_stream():
+        response = client.get("/api/signals/stream", headers=headers, buffered=False)
+        try:
+            frames = iter(response.response)
+            next(frames)
+            # the first keep-alive is sent from inside the wait loop
+            return next(frames), pool.checkedout()
+        finally:
+            response.close()
+
+    frame, checked_out = _in_thread(idle_stream)
+    assert frame == b": keep-alive\n\n"
+    assert checked_out == 0
+
+
+def test_export_streams_and_is_counted(app, client, admin_headers):
+    for i in range(3):
+        client.post("/api/admin/signals", headers=admin_headers, json={
+            "pair": f"EURUSD{i}", "entry": "1.1", "tp": "1.2", "sl": "1.0",
+            "lots": [{"lot_size": 0.1, "win_amount": 10, "loss_amount": 5}]
+        })
+
+    before = _export_bytes(client, admin_headers)
+
+    def export():
+        response = client.get("/api/admin/export/signals", headers=admin_headers)
+        return response, response.get_data()
+
+    response, body = _in_thread(export)
+    assert response.status_code == 200
+    assert "Content-Length" not in response.headers
+    rows = [json.loads(line) for line in body.decode().splitlines()]
+    assert [r["pair"] for r in rows] == ["EURUSD0", "EURUSD1", "EURUSD2"]
+
+    # the bytes are still accounted for once the body has been sent
+    assert _export_bytes(client, admin_headers) - before == len(body)
+
+
+
+def test_streams_past_the_cap_are_refused(make_app):
+    app = make_app(SSE_MAX_STREAMS="1")
+    client = app.test_client()
+    headers = login(client, ADMIN_EMAIL, ADMIN_PASSWORD, "admin")
+
+    def two_streams():
+        first = client.get("/api/signals/stream", headers=headers, buffered=False)
+        try:
+            next(iter(first.response))
+            second = client.get("/api/signals/stream", headers=headers, buffered=False)
+            second.close()
+            return second
+        finally:
+            first.close()
+
+    second = _in_thread(two_streams)
+    assert second.status_code == 503
+    assert second.headers["Retry-After"] == "5"
@@ -0,0 +1,105 @@
+# tests/test_subscriptions.py
+#
+# The sweep runs under a frozen clock: ``now`` is passed in, never read.
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, update
+
+from subscriptions import sweep_subscriptions, activate_values
+
+NOW = datetime(2026, 3, 1, 12, 0)
+
+
+@pytest.fixture
+def sweep(app):
+    def run(now=NOW):
+        with app.app_context():
+            return sweep_subscriptions(now)
+    return run
+
+
+def _status(app, user_id):
+    from models import db, User
+
+    with app.app_context():
+        return db.session.get(User, user_id).subscription_status
+
+
+def _outbox(app):
+    from models import OutboxMessage
+
+    with app.app_context():
+        return [
+            (m.subject, sorted(r.email for r in m.recipients))
+            for m in OutboxMessage.query.order_by(OutboxMessage.id)
+        ]
+
+
+@pytest.fixture
+def renew_before_update(app):
+    """Renew a user from another connection right before the sweep's
+    UPDATE, after its SELECT has already picked the user."""
+    from models import db
+
+    with app.app_context():
+        engine = db.engine
+    users = db.metadata.tables["users"]
+    pending = []
+
+    def renew(conn, cursor, statement, parameters, context, executemany):
+        if pending and statement.lstrip().upper().startswith("UPDATE USERS"):
+            user_id = pending.pop()
+            with engine.begin() as other:
+                other.execute(
+                    update(users)
+                    .where(users.c.id == user_id)
+                    .values(**activate_values(NOW + timedelta(days=30)))
+                )
+
+    event.listen(engine, "before_cursor_execute", renew)
+    yield pending.append
+    event.remove(engine, "before_cursor_execute", renew)
+
+
+def test_sweep_moves_subscriptions_along(app, sweep, make_client_user):
+    active = make_client_user("active@nari.test", **activate_values(NOW + timedelta(days=20)))
+    soon = make_client_user("soon@nari.test", **activate_values(NOW + timedelta(days=2)))
+    over = make_client_user("over@nari.test", **activate_values(NOW - timedelta(hours=1)))
+
+    assert sweep() == {"reminded": 1, "expired": 1}
+    assert [_status(app, u) for u in (active, soon, over)] == ["active", "expiring", "expired"]
+    assert [r for _, r in _outbox(app)] == [["soon@nari.test"], ["over@nari.test"]]
+
+    # nothing left to do at the same instant; expiry comes with the clock
+    assert sweep() == {"reminded": 0, "expired": 0}
+    assert sweep(NOW + timedelta(days=3)) == {"reminded": 0, "expired": 1}
+    assert _status(app, soon) == "expired"
+
+
+def test_sweep_pages_through_chunks(make_app, make_client_user):
+    app = make_app(SUBSCRIPTION_SWEEP_CHUNK="2")
+    for i in range(5):
+        make_client_user(f"over{i}@nari.test", **activate_values(NOW - timedelta(days=i)))
+
+    with app.app_context():
+        assert sweep_subscriptions(NOW) == {"reminded": 0, "expired": 5}
+    assert len(_outbox(app)) == 3
+
+
+def test_renewal_during_reminder_pass_wins(app, sweep, make_client_user, renew_before_update):
+    user_id = make_client_user("soon@nari.test", **activate_values(NOW + timedelta(days=2)))
+    renew_before_update(user_id)
+
+    assert sweep() == {"reminded": 0, "expired": 0}
+    assert _status(app, user_id) == "active"
+    assert _outbox(app) == []
+
+
+def test_renewal_during_expiry_pass_wins(app, sweep, make_client_user, renew_before_update):
+    user_id = make_client_user("over@nari.test", **activate_values(NOW - timedelta(hours=1)))
+    renew_before_update(user_id)
+
+    assert sweep() == {"reminded": 0, "expired": 0}
+    assert _status(app, user_id) == "active"
+    assert _outbox(app) == []
@@ -0,0 +1,12 @@
+# wsgi.py
+"""Production entry point.
+
+    flask --app wsgi bootstrap            # once per deploy: schema + admin
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Importing this module only builds the app; it opens no database
+connections, so gunicorn can preload it in the master and fork workers.
+"""
+from app import create_app
+
+app = create_app()